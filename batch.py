@@ -0,0 +1,31 @@
+import argparse
+import logging
+import sys
+
+from scheduler.batch_runner import BatchManifest, BatchRunner
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Schedules all the rosters of a manifest without any prompts.')
+    parser.add_argument('manifest', help='Path of the manifest (JSON) file of the jobs')
+    parser.add_argument('--workers', type=int, default=None, help='Amount of worker processes (default: CPUs)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Add the timing of the phases and the counters of every job to the summary')
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    results = BatchRunner(BatchManifest.from_file(args.manifest), max_workers=args.workers,
+                          profile=args.profile).run()
+
+    for result in results:
+        status = 'OK' if result.succeeded else f'FAILED ({result.error})'
+        print(f'{result.name}: {status}, {result.shifts} shifts in {result.duration:.2f} seconds')
+
+    return 0 if all(result.succeeded for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
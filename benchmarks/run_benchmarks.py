@@ -0,0 +1,302 @@
+"""
+Benchmarks of the scheduling hot paths, on seeded synthetic rosters.
+
+    python -m benchmarks.run_benchmarks                  # compare with the saved baseline
+    python -m benchmarks.run_benchmarks --save-baseline  # replace the saved baseline
+    python -m benchmarks.run_benchmarks --quick -k scheduler
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Optional
+
+from scheduler.holidays import HolidayCalendar
+from scheduler.instrumentation import INSTRUMENTATION
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person, ShiftType
+from scheduler.schedule import Schedule
+from scheduler.scheduler import Scheduler
+from scheduler.shift_table import ShiftTable
+from scheduler.shifts_builder import ShiftsBuilder
+
+from .synthetic import DENSE_CONSTRAINTS, SPARSE_CONSTRAINTS, make_history, make_people
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+# A benchmark regresses when its time or peak memory grows by more than this factor over the baseline
+DEFAULT_THRESHOLD = 2.0
+# Times of benchmarks that are faster than this are too noisy to be compared
+MIN_COMPARED_TIME = 0.005
+DEFAULT_REPEATS = 5
+
+START_DATE = date(2024, 1, 1)
+HORIZONS = {
+    '1m': date(2024, 1, 31),
+    '1y': date(2024, 12, 31),
+    '5y': date(2028, 12, 31),
+}
+CONSTRAINTS = {
+    'sparse': SPARSE_CONSTRAINTS,
+    'dense': DENSE_CONSTRAINTS,
+}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Builds a fresh state for every run, not measured. The synthetic rosters are generated on the first setup, so
+    # only the benchmarks that are run pay for them
+    setup: Callable[[], Any]
+    # Runs the measured code on the state, and returns the amount of operations it did. The operations are counted on a
+    # separate run with the instrumentation enabled, so they may be taken from its counters
+    run: Callable[[Any], int]
+    repeats: int = DEFAULT_REPEATS
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    # Best wall time of the repeats, in seconds
+    wall_time: float
+    # Peak of the memory that was allocated during a run, in bytes
+    peak_memory: int
+    operations: int
+    regressions: list[str] = field(default_factory=list)
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.operations / self.wall_time if self.wall_time else 0.0
+
+
+def _get_counter(name: str) -> int:
+    return INSTRUMENTATION.get_report()['counters'].get(name, 0)
+
+
+def _shifts_builder_benchmark(horizon: str) -> Benchmark:
+    def run(holiday_calendar: HolidayCalendar) -> int:
+        ShiftsBuilder(START_DATE, HORIZONS[horizon], holiday_calendar=holiday_calendar).build()
+        # The holiday lookups
+        return _get_counter('holidays.cache_hits') + _get_counter('holidays.cache_misses')
+
+    return Benchmark(f'shifts_builder[{horizon}]', setup=HolidayCalendar, run=run)
+
+
+def _holidays_benchmark(horizon: str, warm: bool) -> Benchmark:
+    dates = [START_DATE + timedelta(days=day) for day in range((HORIZONS[horizon] - START_DATE).days + 1)]
+
+    def setup() -> HolidayCalendar:
+        holiday_calendar = HolidayCalendar()
+        if warm:
+            for year in range(START_DATE.year, HORIZONS[horizon].year + 1):
+                holiday_calendar.get_year(year)
+        return holiday_calendar
+
+    def run(holiday_calendar: HolidayCalendar) -> int:
+        for _date in dates:
+            holiday_calendar.get_holiday_name(_date)
+        return len(dates)
+
+    return Benchmark(f'get_holiday_name[{horizon},{"warm" if warm else "cold"}]', setup=setup, run=run)
+
+
+def _justice_table_benchmark(people_count: int) -> Benchmark:
+    calls = 100
+
+    @lru_cache(maxsize=None)
+    def get_people() -> list[Person]:
+        return make_people(people_count, START_DATE, HORIZONS['1y'])
+
+    def setup() -> JusticeTable:
+        justice_table = JusticeTable()
+        justice_table.add_debts(workdays=250, weekend_days=100, holidays=15, people=get_people())
+        return justice_table
+
+    def run(justice_table: JusticeTable) -> int:
+        for _ in range(calls):
+            for shift_type in ShiftType:
+                justice_table.get_shift_candidates(shift_type)
+        return calls * len(ShiftType) * people_count
+
+    return Benchmark(f'get_shift_candidates[{people_count}]', setup=setup, run=run)
+
+
+def _scheduler_benchmark(people_count: int, horizon: str, constraints: str, history_years: int) -> Benchmark:
+    end_date = HORIZONS[horizon]
+
+    @lru_cache(maxsize=None)
+    def get_roster() -> tuple[list[Person], Optional[ShiftTable]]:
+        people = make_people(people_count, START_DATE, end_date, constraint_density=CONSTRAINTS[constraints])
+        history = make_history(people, START_DATE - timedelta(days=1), history_years) if history_years else None
+        return people, history
+
+    def setup() -> Scheduler:
+        people, history = get_roster()
+        random.seed(0)
+        return Scheduler(START_DATE, end_date, people, JusticeTable(), previous_schedule=history)
+
+    def run(scheduler: Scheduler) -> int:
+        scheduler.schedule()
+        # The candidates that were examined
+        return _get_counter('scheduler.compatibility_checks')
+
+    repeats = DEFAULT_REPEATS if people_count * (end_date - START_DATE).days < 100_000 else 1
+    return Benchmark(f'scheduler[{people_count},{horizon},{constraints},{history_years}y]', setup=setup, run=run,
+                     repeats=repeats)
+
+
+def _csv_benchmark(horizon: str) -> Benchmark:
+    @lru_cache(maxsize=None)
+    def get_schedule() -> Schedule:
+        people = make_people(100, START_DATE, HORIZONS[horizon])
+        random.seed(0)
+        return Schedule(Scheduler(START_DATE, HORIZONS[horizon], people, JusticeTable()).assign_shifts())
+
+    def setup() -> tuple[Schedule, TemporaryDirectory]:
+        return get_schedule(), TemporaryDirectory()
+
+    def run(state: tuple[Schedule, TemporaryDirectory]) -> int:
+        schedule, output_dir = state
+        with output_dir:
+            schedule.save_to_csv_file(Path(output_dir.name) / 'schedule.csv')
+        # The rows that were written
+        return len(schedule.shifts)
+
+    return Benchmark(f'save_to_csv_file[{horizon}]', setup=setup, run=run)
+
+
+def get_benchmarks(quick: bool = False) -> list[Benchmark]:
+    if quick:
+        return [
+            _shifts_builder_benchmark('1y'),
+            _holidays_benchmark('1y', warm=False),
+            _justice_table_benchmark(100),
+            _scheduler_benchmark(10, '1m', 'sparse', 1),
+            _scheduler_benchmark(100, '1y', 'dense', 1),
+            _csv_benchmark('1y'),
+        ]
+
+    benchmarks = [_shifts_builder_benchmark(horizon) for horizon in HORIZONS]
+    benchmarks += [_holidays_benchmark(horizon, warm) for horizon in ('1y', '5y') for warm in (False, True)]
+    benchmarks += [_justice_table_benchmark(people_count) for people_count in (10, 100, 1000, 5000)]
+
+    # Every dimension is changed on its own, around 100 people with sparse constraints for a year with a year of history
+    scheduler_parameters = [(100, '1y', 'sparse', 1)]
+    scheduler_parameters += [(people_count, '1y', 'sparse', 1) for people_count in (10, 1000, 5000)]
+    scheduler_parameters += [(100, horizon, 'sparse', 1) for horizon in ('1m', '5y')]
+    scheduler_parameters += [(100, '1y', 'dense', 1), (10, '1y', 'dense', 1)]
+    scheduler_parameters += [(100, '1y', 'sparse', history_years) for history_years in (0, 10)]
+    benchmarks += [_scheduler_benchmark(*parameters) for parameters in scheduler_parameters]
+
+    benchmarks += [_csv_benchmark(horizon) for horizon in ('1y', '5y')]
+    return benchmarks
+
+
+def _count_operations(benchmark: Benchmark) -> int:
+    state = benchmark.setup()
+    INSTRUMENTATION.enabled = True
+    INSTRUMENTATION.reset()
+    try:
+        return benchmark.run(state)
+    finally:
+        INSTRUMENTATION.enabled = False
+        INSTRUMENTATION.reset()
+
+
+def run_benchmark(benchmark: Benchmark) -> BenchmarkResult:
+    wall_times = list()
+    for _ in range(benchmark.repeats):
+        state = benchmark.setup()
+        start_time = time.perf_counter()
+        benchmark.run(state)
+        wall_times.append(time.perf_counter() - start_time)
+
+    # Tracing slows down the code, so the memory is measured on a separate run
+    state = benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(benchmark.name, min(wall_times), peak_memory, _count_operations(benchmark))
+
+
+def compare_with_baseline(result: BenchmarkResult, baseline: dict, threshold: float) -> None:
+    if result.name not in baseline:
+        return
+
+    expected = baseline[result.name]
+    if result.operations != expected['operations']:
+        result.regressions.append(f'operations changed from {expected["operations"]}')
+    if result.wall_time > max(expected['wall_time'], MIN_COMPARED_TIME) * threshold:
+        result.regressions.append(f'{result.wall_time / expected["wall_time"]:.1f}x slower')
+    if result.peak_memory > expected['peak_memory'] * threshold:
+        result.regressions.append(f'{result.peak_memory / expected["peak_memory"]:.1f}x more memory')
+
+
+def _format_result(result: BenchmarkResult, name_width: int) -> str:
+    line = f'{result.name:<{name_width}} {result.wall_time * 1000:>10.1f} ms ' \
+           f'{result.peak_memory / 2 ** 10:>10.1f} KiB {result.operations:>10} ops ' \
+           f'{result.operations_per_second:>12.0f} ops/s'
+    if result.regressions:
+        line += f'  REGRESSION: {", ".join(result.regressions)}'
+    return line
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmarks of the scheduling hot paths.')
+    parser.add_argument('--quick', action='store_true', help='Run only a small subset of the benchmarks')
+    parser.add_argument('-k', '--filter', default='', help='Run only the benchmarks that contain this text')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='Path of the baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Factor of time or memory over the baseline that counts as a regression')
+    parser.add_argument('--output', type=Path, default=None, help='Path of a JSON file to write the results to')
+    return parser.parse_args()
+
+
+def main(args: Optional[argparse.Namespace] = None) -> int:
+    args = args or parse_args()
+    # The small rosters break the spacing rules on purpose, the warnings would hide the results
+    logging.basicConfig(level=logging.ERROR)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.is_file() else dict()
+
+    results = list()
+    for benchmark in get_benchmarks(quick=args.quick):
+        if args.filter not in benchmark.name:
+            continue
+
+        result = run_benchmark(benchmark)
+        if not args.save_baseline:
+            compare_with_baseline(result, baseline, args.threshold)
+        print(_format_result(result, name_width=36), flush=True)
+        results.append(result)
+
+    results_json = {result.name: {key: value for key, value in asdict(result).items() if key not in ('name',)}
+                    for result in results}
+    if args.output:
+        args.output.write_text(json.dumps(results_json, indent=2))
+    if args.save_baseline:
+        for result in results_json.values():
+            result.pop('regressions')
+        baseline.update(results_json)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        print(f'Saved the baseline to {args.baseline}')
+
+    regressions = [result for result in results if result.regressions]
+    if regressions:
+        print(f'{len(regressions)} of {len(results)} benchmarks regressed')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import random
+from datetime import date, timedelta
+from typing import Union
+
+from scheduler.models import DateRange, Person, RecurringConstraint
+from scheduler.shift_table import ShiftTable
+from scheduler.shifts_builder import ShiftsBuilder
+
+# Part of the days of the horizon in which a person has constraints
+SPARSE_CONSTRAINTS = 0.02
+DENSE_CONSTRAINTS = 0.15
+
+
+def make_people(count: int, start_date: date, end_date: date, constraint_density: float = SPARSE_CONSTRAINTS,
+                seed: int = 0) -> list[Person]:
+    """
+    :return: People with random weights and constraints (single dates, short date ranges and every other week
+    recurring constraints) that cover about constraint_density of the days between the dates.
+    The same arguments always give the same people.
+    """
+    _random = random.Random(seed)
+    total_days = (end_date - start_date).days + 1
+    people = list()
+
+    for index in range(count):
+        constraints: list[Union[RecurringConstraint, DateRange, date]] = list()
+        constrained_days = int(total_days * constraint_density * _random.uniform(0.5, 1.5))
+
+        if constraint_density >= DENSE_CONSTRAINTS:
+            # Every other week covers 1/14 of the days
+            constraints.append(RecurringConstraint(weekdays=[_random.randrange(7)], start=start_date, end=end_date,
+                                                   every_n_weeks=2))
+            constrained_days -= total_days // 14
+
+        while constrained_days > 0:
+            length = _random.choice([1, 1, 1, 2, 3, 7])
+            first_date = start_date + timedelta(days=_random.randrange(total_days))
+            constraints.append(first_date if length == 1 else
+                               DateRange(start=first_date, end=first_date + timedelta(days=length - 1)))
+            constrained_days -= length
+
+        people.append(Person(full_name=f'Synthetic Person {seed}.{index}',
+                             email_address=f'synthetic.person.{seed}.{index}@example.com',
+                             workdays_shifts_weight=_random.choice([0.5, 1, 1, 1]),
+                             weekend_days_shifts_weight=_random.choice([0.5, 1, 1, 1]),
+                             holidays_shifts_weight=1, constraints=constraints))
+
+    return people
+
+
+def make_history(people: list[Person], end_date: date, years: int, seed: int = 0) -> ShiftTable:
+    """
+    :return: The shifts of the given amount of years before the end date, with random people. The same arguments always
+    give the same history.
+    """
+    _random = random.Random(seed)
+    table = ShiftTable()
+    start_date = end_date.replace(year=end_date.year - years) + timedelta(days=1)
+
+    for shift in ShiftsBuilder(start_date, end_date).iter_shifts():
+        person, backup_person = _random.sample(people, 2)
+        table.append(shift.dates.start, shift.dates.end, shift.type, person.id, backup_person.id, shift.title)
+
+    return table
@@ -0,0 +1,31 @@
+import argparse
+import logging
+from pathlib import Path
+
+from scheduler.shift_history import compact_history
+
+BASE_PATH = Path(__file__).parent
+PREVIOUS_SCHEDULE_PATH = BASE_PATH / 'previous_shifts.json'
+ARCHIVE_PATH = BASE_PATH / 'archive'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Moves the previous shifts that the spacing rules do not need anymore '
+                                                 'to the archive, so they are not read when scheduling.')
+    parser.add_argument('shifts', nargs='?', type=Path, default=PREVIOUS_SCHEDULE_PATH,
+                        help=f'Path of the previous shifts (default: {PREVIOUS_SCHEDULE_PATH})')
+    parser.add_argument('--archive', type=Path, default=ARCHIVE_PATH,
+                        help=f'Directory of the archived shifts, a file per year (default: {ARCHIVE_PATH})')
+    parser.add_argument('--keep', type=int, default=0, help='Minimal amount of recent shifts to keep')
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    archived_shifts = compact_history(args.shifts, args.archive, min_recent_shifts=args.keep)
+    print(f'Archived {archived_shifts} shifts to "{args.archive}"')
+
+
+if __name__ == '__main__':
+    main()
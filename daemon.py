@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+from scheduler.daemon import DaemonConfig, SchedulerDaemon, send_request
+
+BASE_PATH = Path(__file__).parent
+SOCKET_PATH = BASE_PATH / 'scheduler.sock'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Keeps the scheduling state in memory and serves requests locally.')
+    parser.add_argument('--socket', type=Path, default=SOCKET_PATH,
+                        help=f'Unix socket to serve on (default: {SOCKET_PATH})')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Serve on this localhost TCP port instead of a Unix socket')
+    parser.add_argument('--request', default=None,
+                        help='Send this request (JSON) to a running daemon and print its response, for example: '
+                             '\'{"command": "candidates", "date": "2024-02-03"}\'')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    socket_path = args.socket if args.port is None else None
+
+    if args.request is not None:
+        response = send_request(json.loads(args.request), socket_path=socket_path, port=args.port)
+        print(json.dumps(response, indent=2))
+        return 0 if response['ok'] else 1
+
+    logging.basicConfig(level=logging.INFO)
+    daemon = SchedulerDaemon(DaemonConfig(
+        people_path=BASE_PATH / 'people.json',
+        justice_table_path=BASE_PATH / 'justice_table.json',
+        previous_shifts_path=BASE_PATH / 'previous_shifts.json',
+        schedule_path=BASE_PATH / 'schedule.json',
+        snapshots_dir=BASE_PATH / '.snapshots',
+    ))
+    daemon.warm_up()
+    if socket_path is not None:
+        socket_path.unlink(missing_ok=True)
+    try:
+        asyncio.run(daemon.serve(socket_path=socket_path, port=args.port or 0))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if socket_path is not None:
+            socket_path.unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
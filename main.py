@@ -1,14 +1,16 @@
-import json
+import argparse
 from datetime import date
 import logging
 from pathlib import Path
+from typing import Optional
 
-from pydantic import parse_obj_as
-
+from scheduler.history_store import HistoryStore
+from scheduler.instrumentation import INSTRUMENTATION
 from scheduler.justice_table import JusticeTable
 from scheduler.models import Person
-from scheduler.schedule import Schedule
 from scheduler.scheduler import Scheduler
+from scheduler.shift_history import ShiftHistory
+from scheduler.snapshot_cache import SnapshotCache, load_people
 
 _logger = logging.getLogger(__name__)
 # logging.basicConfig(level=logging.INFO)
@@ -18,6 +20,12 @@ PEOPLE_PATH = BASE_PATH / 'people.json'
 JUSTICE_TABLE_PATH = BASE_PATH / 'justice_table.json'
 PREVIOUS_SCHEDULE_PATH = BASE_PATH / 'previous_shifts.json'
 CSV_OUTPUT_PATH = BASE_PATH / 'schedule.csv'
+PUBLISHED_EVENTS_PATH = BASE_PATH / 'published_events.json'
+PROFILE_PATH = BASE_PATH / 'profile.json'
+DATABASE_PATH = BASE_PATH / 'history.db'
+SNAPSHOTS_PATH = BASE_PATH / '.snapshots'
+
+SNAPSHOT_CACHE = SnapshotCache(SNAPSHOTS_PATH)
 
 INTRO_ASCII_ART = r"""
  _________.__    .__  _____  __          
@@ -47,15 +55,20 @@ def get_schedule_dates() -> tuple[date, date]:
 
 def get_people():
     _logger.info(f'Loading people from file: {PEOPLE_PATH}')
-    people = parse_obj_as(list[Person], json.loads(PEOPLE_PATH.read_text()))
+    people = SNAPSHOT_CACHE.load(PEOPLE_PATH, load_people)
     return people
 
 
-def get_scheduler(people: list[Person]) -> Scheduler:
+def get_scheduler(people: list[Person], history_store: Optional[HistoryStore] = None) -> Scheduler:
     start_date, end_date = get_schedule_dates()
+    if history_store is not None:
+        _logger.info('Loading justice table and previous shifts from the database')
+        return Scheduler(start_date, end_date, people, history_store.load_justice_table(),
+                         previous_schedule=history_store.load_shift_history())
+
     if JUSTICE_TABLE_PATH.is_file():
         _logger.info(f'Loading justice table from file: {JUSTICE_TABLE_PATH}')
-        justice_table = JusticeTable.from_file(JUSTICE_TABLE_PATH)
+        justice_table = SNAPSHOT_CACHE.load(JUSTICE_TABLE_PATH, JusticeTable.from_file)
     else:
         _logger.info('Justice table does not exist, creating an empty justice table.')
         justice_table = JusticeTable()
@@ -63,31 +76,70 @@ def get_scheduler(people: list[Person]) -> Scheduler:
     previous_schedule = None
     if PREVIOUS_SCHEDULE_PATH.is_file():
         _logger.info(f'Loading previous shifts from file: {PREVIOUS_SCHEDULE_PATH}')
-        previous_schedule = Schedule.from_json_file(PREVIOUS_SCHEDULE_PATH)
+        previous_schedule = SNAPSHOT_CACHE.load(PREVIOUS_SCHEDULE_PATH, ShiftHistory.from_json_file)
 
     return Scheduler(start_date, end_date, people, justice_table, previous_schedule=previous_schedule)
 
 
+def open_history_store(database_path: Path) -> HistoryStore:
+    is_new = not database_path.is_file()
+    history_store = HistoryStore(database_path)
+    if is_new:
+        _logger.info(f'Migrating "{JUSTICE_TABLE_PATH}" and "{PREVIOUS_SCHEDULE_PATH}" to: "{database_path}"')
+        history_store.migrate_from_json(JUSTICE_TABLE_PATH, PREVIOUS_SCHEDULE_PATH)
+    return history_store
+
+
 def ask_for_confirmation(prompt: str) -> bool:
     answer = input(f'{prompt} | Do you agree (Y/N): ')
     return answer.lower().strip() == 'y'
 
 
-def main() -> None:
+def run(database_path: Optional[Path] = None) -> None:
     print_intro()
     people = get_people()
-    scheduler = get_scheduler(people)
-    schedule = scheduler.schedule()
-    schedule.save_to_csv_file(CSV_OUTPUT_PATH)
+    history_store = open_history_store(database_path) if database_path is not None else None
+    try:
+        scheduler = get_scheduler(people, history_store)
+        schedule = scheduler.schedule()
+        schedule.save_to_csv_file(CSV_OUTPUT_PATH)
+
+        if not ask_for_confirmation(f'Wrote schedule to "{CSV_OUTPUT_PATH}"'):
+            return
+
+        if history_store is not None:
+            _logger.info(f'Saving justice table and shifts to: "{database_path}"')
+            history_store.save(scheduler.justice_table, schedule.shift_table, people_whitelist=people)
+        else:
+            _logger.info(f'Saving justice table to: "{JUSTICE_TABLE_PATH}"')
+            scheduler.justice_table.save_to_file(JUSTICE_TABLE_PATH, people_whitelist=people)
+    finally:
+        if history_store is not None:
+            history_store.close()
 
-    if not ask_for_confirmation(f'Wrote schedule to "{CSV_OUTPUT_PATH}"'):
-        return
+    if ask_for_confirmation('I\'m about to send calendar appointments to all the people'):
+        schedule.sync_appointments(PUBLISHED_EVENTS_PATH)
 
-    _logger.info(f'Saving justice table to: "{JUSTICE_TABLE_PATH}"')
-    scheduler.justice_table.save_to_file(JUSTICE_TABLE_PATH, people_whitelist=people)
 
-    if ask_for_confirmation('I\'m about to send calendar appointments to all the people'):
-        schedule.send_appointments()
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Schedules the shifts and sends the calendar appointments.')
+    parser.add_argument('--profile', nargs='?', type=Path, const=PROFILE_PATH, default=None,
+                        help=f'Write the timing of the phases and the counters of the run (default: {PROFILE_PATH})')
+    parser.add_argument('--database', nargs='?', type=Path, const=DATABASE_PATH, default=None,
+                        help='Keep the justice table and the shifts in an SQLite database instead of the JSON files, '
+                             f'a new database is migrated from the JSON files (default: {DATABASE_PATH})')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    INSTRUMENTATION.enabled = args.profile is not None
+    try:
+        run(args.database)
+    finally:
+        if args.profile is not None:
+            INSTRUMENTATION.save_report(args.profile)
+            print(f'Wrote profile to "{args.profile}"')
 
 
 if __name__ == '__main__':
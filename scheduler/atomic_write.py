@@ -0,0 +1,23 @@
+import os
+from pathlib import Path
+from typing import Callable, Union
+
+
+def write_atomically(file_path: Union[str, Path], write: Callable[[Path], None]) -> None:
+    """
+    Writes the file by calling write with a temporary file next to it, which then replaces the file, so a failure never
+    leaves a partial file behind and readers never see one. The temporary file is unique to the process, so processes
+    that write the same file concurrently do not write into each other's temporary files.
+    """
+    file_path = Path(file_path)
+    temporary_file_path = file_path.with_name(f'{file_path.name}.{os.getpid()}.tmp')
+    try:
+        write(temporary_file_path)
+        os.replace(temporary_file_path, file_path)
+    except BaseException:
+        temporary_file_path.unlink(missing_ok=True)
+        raise
+
+
+def write_text_atomically(file_path: Union[str, Path], content: str) -> None:
+    write_atomically(file_path, lambda temporary_file_path: temporary_file_path.write_text(content))
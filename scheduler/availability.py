@@ -0,0 +1,115 @@
+from collections import deque
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional
+
+from .models import Person, Shift, ShiftType
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+
+def get_people_bits(people: Iterable[Optional[Person]]) -> int:
+    """
+    :return: A bitmap with the bits of the people (by their ids) set.
+    """
+    bits = 0
+    for person in people:
+        if person is not None:
+            bits |= 1 << person.id
+    return bits
+
+
+class AvailabilityBitmap:
+    """
+    The people that have no constraints on every shift of a period, as a bitmap for every shift with a bit for every
+    person (by the id of the person). It is built once from the constraints of all the people, so the constraints of a
+    candidate are checked with a bit operation, and the people that can take a shift are found with a bitwise AND.
+    """
+    # Bitmap of the available people of every shift, by the position of the shift
+    _available: list[int]
+    _people: int
+
+    def __init__(self, shifts: list[Shift], people: Iterable[Person]):
+        """
+        :param shifts: Shifts in chronological order, that do not overlap each other.
+        """
+        starts = [shift.dates.start.toordinal() for shift in shifts]
+        ends = [shift.dates.end.toordinal() for shift in shifts]
+        constrained = [0] * len(shifts)
+        self._people = 0
+        for person in people:
+            bit = 1 << person.id
+            self._people |= bit
+            for position in person.iter_constrained_positions(starts, ends):
+                constrained[position] |= bit
+
+        self._available = [self._people & ~constrained_people for constrained_people in constrained]
+
+    def get_available(self, position: int) -> int:
+        """
+        :return: Bitmap of the people without constraints on the shift in the given position.
+        """
+        return self._available[position]
+
+    def is_available(self, position: int, person: Person) -> bool:
+        """
+        People that the bitmap was not built with are never available.
+        """
+        return bool(self._available[position] >> person.id & 1)
+
+    def get_available_people(self, position: int, people: Iterable[Person]) -> list[Person]:
+        """
+        :return: The given people that have no constraints on the shift in the given position, for example the people
+        that can swap into it.
+        """
+        available = self._available[position]
+        return [person for person in people if available >> person.id & 1]
+
+
+class SpacingMask:
+    """
+    The people that the spacing rules block from the next shift: the people of the last shifts of any type, and of the
+    last shifts of the type of the next shift. Kept as bitmaps (see AvailabilityBitmap) that roll forward as shifts are
+    assigned.
+    """
+    _recent_shifts: deque[int]
+    _recent_shifts_by_type: dict[ShiftType, deque[int]]
+
+    def __init__(self, shifts: Iterable[Shift] = ()):
+        """
+        :param shifts: Assigned shifts before the next shift, in chronological order. Only the last ones matter.
+        """
+        self._recent_shifts = deque(maxlen=MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES)
+        self._recent_shifts_by_type = {shift_type: deque(maxlen=max(min_space, 0))
+                                       for shift_type, min_space in SPACE_BETWEEN_SHIFT_TYPES_MAPPING.items()}
+        for shift in shifts:
+            self.add_shift(shift)
+
+    def add_shift(self, shift: Shift) -> None:
+        people = get_people_bits((shift.person, shift.backup_person))
+        self._recent_shifts.append(people)
+        self._recent_shifts_by_type[shift.type].append(people)
+
+    def replace_shift(self, shift: Shift, shifts_after: int, shifts_of_type_after: int) -> None:
+        """
+        Updates the people of a shift that was already added and then changed.
+        :param shifts_after: The amount of shifts that were added after the shift.
+        :param shifts_of_type_after: The amount of shifts of the type of the shift that were added after it.
+        """
+        people = get_people_bits((shift.person, shift.backup_person))
+        recent_shifts_of_type = self._recent_shifts_by_type[shift.type]
+        if shifts_after < len(self._recent_shifts):
+            self._recent_shifts[-1 - shifts_after] = people
+        if shifts_of_type_after < len(recent_shifts_of_type):
+            recent_shifts_of_type[-1 - shifts_of_type_after] = people
+
+    def get_blocked(self) -> int:
+        """
+        :return: Bitmap of the people that are too close to their last shift of any type.
+        """
+        return reduce(or_, self._recent_shifts, 0)
+
+    def get_blocked_by_type(self, shift_type: ShiftType) -> int:
+        """
+        :return: Bitmap of the people that are too close to their last shift of the given type.
+        """
+        return reduce(or_, self._recent_shifts_by_type[shift_type], 0)
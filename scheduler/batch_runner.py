@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date
+from logging import getLogger
+from pathlib import Path
+from typing import Optional, Union
+
+from pydantic import BaseModel, parse_obj_as
+
+from .atomic_write import write_atomically, write_text_atomically
+from .instrumentation import INSTRUMENTATION
+from .justice_table import JusticeTable
+from .models import Person
+from .models.person_registry import PERSON_REGISTRY
+from .scheduler import Scheduler, SchedulingEngine
+from .shift_history import ShiftHistory
+
+SCHEDULE_CSV_FILE_NAME = 'schedule.csv'
+SCHEDULE_JSON_FILE_NAME = 'schedule.json'
+JUSTICE_TABLE_FILE_NAME = 'justice_table.json'
+SUMMARY_FILE_NAME = 'summary.json'
+
+_logger = getLogger(__name__)
+
+
+class BatchJob(BaseModel):
+    """
+    A single roster to schedule. Relative paths are relative to the directory of the manifest.
+    """
+    name: str
+    start_date: date
+    end_date: date
+    people_path: Path
+    # The justice table and the previous shifts start empty when they are not given or do not exist yet
+    justice_table_path: Optional[Path] = None
+    previous_shifts_path: Optional[Path] = None
+    engine: SchedulingEngine = SchedulingEngine.GREEDY
+    seed: Optional[int] = None
+
+
+class BatchManifest(BaseModel):
+    # Every job writes its outputs to a directory with the name of the job under the output directory
+    output_dir: Path
+    jobs: list[BatchJob]
+
+    @staticmethod
+    def from_file(file_path: Union[str, Path]) -> BatchManifest:
+        file_path = Path(file_path)
+        manifest = BatchManifest.parse_obj(json.loads(file_path.read_text()))
+        return manifest.resolve_paths(file_path.parent)
+
+    def resolve_paths(self, base_path: Path) -> BatchManifest:
+        def resolve(path: Optional[Path]) -> Optional[Path]:
+            return base_path / path if path is not None else None
+
+        jobs = [job.copy(update={
+            'people_path': resolve(job.people_path),
+            'justice_table_path': resolve(job.justice_table_path),
+            'previous_shifts_path': resolve(job.previous_shifts_path),
+        }) for job in self.jobs]
+        return self.copy(update={'output_dir': resolve(self.output_dir), 'jobs': jobs})
+
+
+@dataclass
+class JobResult:
+    name: str
+    succeeded: bool
+    duration: float
+    shifts: int = 0
+    output_dir: Optional[str] = None
+    error: Optional[str] = None
+    # Report of the instrumentation of the job, when profiling is enabled
+    profile: Optional[dict] = None
+
+
+def run_job(job: BatchJob, output_dir: Path, profile: bool = False) -> JobResult:
+    """
+    Schedules the roster of the job and writes the schedule (as CSV and JSON) and the updated justice table to the
+    output directory. The input files are never changed.
+    :param profile: Whether to add the report of the instrumentation of the job to the result.
+    """
+    if profile:
+        INSTRUMENTATION.enabled = True
+        INSTRUMENTATION.reset()
+    start_time = time.perf_counter()
+    try:
+        if job.seed is not None:
+            random.seed(job.seed)
+
+        people = parse_obj_as(list[Person], json.loads(job.people_path.read_text()))
+        justice_table = JusticeTable.from_file(job.justice_table_path) \
+            if job.justice_table_path is not None and job.justice_table_path.is_file() else JusticeTable()
+        previous_shifts = ShiftHistory.from_json_file(job.previous_shifts_path) \
+            if job.previous_shifts_path is not None and job.previous_shifts_path.is_file() else None
+
+        scheduler = Scheduler(job.start_date, job.end_date, people, justice_table, previous_schedule=previous_shifts,
+                              engine=job.engine)
+        schedule = scheduler.schedule()
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_atomically(output_dir / SCHEDULE_CSV_FILE_NAME, schedule.save_to_csv_file)
+        write_atomically(output_dir / SCHEDULE_JSON_FILE_NAME, schedule.save_to_json_file)
+        write_atomically(output_dir / JUSTICE_TABLE_FILE_NAME,
+                         lambda file_path: scheduler.justice_table.save_to_file(file_path, people_whitelist=people))
+    except Exception as error:
+        _logger.exception(f'Job {job.name} failed')
+        return JobResult(name=job.name, succeeded=False, duration=time.perf_counter() - start_time,
+                         error=f'{type(error).__name__}: {error}',
+                         profile=INSTRUMENTATION.get_report() if profile else None)
+
+    return JobResult(name=job.name, succeeded=True, duration=time.perf_counter() - start_time,
+                     shifts=len(schedule.shifts), output_dir=str(output_dir),
+                     profile=INSTRUMENTATION.get_report() if profile else None)
+
+
+def _run_job(job: BatchJob, output_dir: Path, profile: bool) -> JobResult:
+    # Module level, so it can be sent to the worker processes. A worker runs many jobs, and the people of different
+    # rosters must not share ids, so every job starts with an empty registry
+    PERSON_REGISTRY.reset()
+    return run_job(job, output_dir, profile=profile)
+
+
+def _is_valid_job_name(name: str) -> bool:
+    # The name is the directory of the outputs of the job, so it must not point outside the output directory
+    return name not in ('', '.', '..') and Path(name).name == name and '\\' not in name
+
+
+class BatchRunner:
+    """
+    Schedules the jobs of a manifest concurrently on a process pool. A failed job does not stop the others, and the
+    summary of all the jobs (with their timing) is written to the output directory.
+    """
+    _manifest: BatchManifest
+    _max_workers: Optional[int]
+    _profile: bool
+
+    def __init__(self, manifest: BatchManifest, max_workers: Optional[int] = None, profile: bool = False):
+        """
+        :param max_workers: Amount of worker processes, defaults to the amount of CPUs.
+        :param profile: Whether to add the report of the instrumentation of every job to the summary.
+        """
+        self._manifest = manifest
+        self._max_workers = max_workers
+        self._profile = profile
+
+    def run(self) -> list[JobResult]:
+        """
+        :return: The results of the jobs, in the order of the manifest.
+        """
+        names = [job.name for job in self._manifest.jobs]
+        if len(set(names)) != len(names):
+            raise ValueError('Names of the jobs in the manifest must be unique')
+        invalid_names = [name for name in names if not _is_valid_job_name(name)]
+        if invalid_names:
+            raise ValueError(f'Names of the jobs must be plain directory names: {", ".join(invalid_names)}')
+
+        start_time = time.perf_counter()
+        output_dirs = [self._manifest.output_dir / job.name for job in self._manifest.jobs]
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            results = list(executor.map(_run_job, self._manifest.jobs, output_dirs,
+                                        [self._profile] * len(output_dirs)))
+        total_duration = time.perf_counter() - start_time
+
+        summary = {
+            'duration': total_duration,
+            'succeeded': sum(result.succeeded for result in results),
+            'failed': sum(not result.succeeded for result in results),
+            'jobs': [asdict(result) for result in results],
+        }
+        self._manifest.output_dir.mkdir(parents=True, exist_ok=True)
+        write_text_atomically(self._manifest.output_dir / SUMMARY_FILE_NAME, json.dumps(summary, indent=2))
+
+        _logger.info(f'Ran {len(results)} jobs in {total_duration:.2f} seconds, {summary["failed"]} failed')
+        return results
@@ -0,0 +1,63 @@
+import random
+from bisect import bisect_left, insort
+from typing import Iterator
+
+from .models import Person
+
+
+class CandidatesQueue:
+    """
+    People of a single shift type grouped by their debt, from the highest debt to the lowest.
+    People with the same debt are returned in a random order, that is drawn lazily every time the queue is iterated.
+    """
+    # Distinct debts in ascending order
+    _debts: list[float]
+    _groups: dict[float, list[Person]]
+    # Index of every person (by id) in its group
+    _positions: dict[int, int]
+
+    def __init__(self):
+        self._debts = list()
+        self._groups = dict()
+        self._positions = dict()
+
+    def add(self, person: Person, debt: float) -> None:
+        group = self._groups.get(debt)
+        if group is None:
+            group = self._groups[debt] = list()
+            insort(self._debts, debt)
+
+        self._positions[person.id] = len(group)
+        group.append(person)
+
+    def remove(self, person: Person, debt: float) -> None:
+        group = self._groups[debt]
+        position = self._positions.pop(person.id)
+        last_person = group.pop()
+
+        if position < len(group):
+            group[position] = last_person
+            self._positions[last_person.id] = position
+
+        if not group:
+            del self._groups[debt]
+            del self._debts[bisect_left(self._debts, debt)]
+
+    def update(self, person: Person, old_debt: float, new_debt: float) -> None:
+        self.remove(person, old_debt)
+        self.add(person, new_debt)
+
+    def __iter__(self) -> Iterator[Person]:
+        """
+        The queue must not be changed while it is iterated.
+        """
+        for debt in reversed(self._debts):
+            group = self._groups[debt]
+
+            # Lazy Fisher-Yates shuffle, only the returned people are shuffled
+            for index in range(len(group)):
+                random_index = random.randrange(index, len(group))
+                group[index], group[random_index] = group[random_index], group[index]
+                self._positions[group[index].id] = index
+                self._positions[group[random_index].id] = random_index
+                yield group[index]
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import socket
+from dataclasses import dataclass
+from datetime import date
+from itertools import chain
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Generic, Optional, TypeVar, Union
+
+from .atomic_write import write_atomically
+from .holidays import HOLIDAY_CALENDAR
+from .justice_table import JusticeTable
+from .models import Person, Shift
+from .schedule import Schedule
+from .schedule_export import CSV_COLUMNS, iter_shift_rows
+from .schedule_repair import ScheduleRepair
+from .scheduler import Scheduler, SchedulingEngine
+from .shift_history import ShiftHistory
+from .shift_table import ShiftTable
+from .snapshot_cache import SnapshotCache, load_people
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_CANDIDATES_COUNT = 5
+# Requests and responses are single lines of JSON, no longer than this
+MAX_LINE_LENGTH = 2 ** 24
+
+T = TypeVar('T')
+
+_logger = getLogger(__name__)
+
+
+class _WatchedFile(Generic[T]):
+    """
+    The loaded content of a file, that is loaded again only when the modification time or the size of the file change.
+    """
+    _path: Path
+    _load: Callable[[Path], T]
+    _default: Callable[[], T]
+    _key: Optional[tuple[int, int]]
+    _value: Optional[T]
+
+    def __init__(self, path: Path, load: Callable[[Path], T], default: Callable[[], T]):
+        """
+        :param default: Called when the file does not exist.
+        """
+        self._path = path
+        self._load = load
+        self._default = default
+        self._key = None
+        self._value = None
+
+    def _get_key(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> T:
+        key = self._get_key()
+        if self._value is None or key != self._key:
+            _logger.info(f'Loading {self._path}')
+            self._value = self._load(self._path) if key is not None else self._default()
+            self._key = key
+        return self._value
+
+    def set(self, value: T, save: Callable[[Path], None]) -> None:
+        """
+        Replaces the content, and saves it to the file without loading it again.
+        """
+        save(self._path)
+        self._value = value
+        self._key = self._get_key()
+
+
+@dataclass
+class DaemonConfig:
+    people_path: Path
+    justice_table_path: Path
+    previous_shifts_path: Path
+    # The last schedule that was made by the daemon, as JSON
+    schedule_path: Path
+    # Snapshots of the input files, so the daemon starts without validating files that did not change
+    snapshots_dir: Optional[Path] = None
+
+
+def _get_shift_rows(shifts: Union[list[Shift], ShiftTable]) -> list[dict]:
+    return [{column: value.isoformat() if isinstance(value, date) else value for column, value in zip(CSV_COLUMNS, row)}
+            for row in iter_shift_rows(shifts)]
+
+
+class SchedulerDaemon:
+    """
+    Keeps the people, the justice table, the previous shifts and the holidays in memory between requests, and loads a
+    file again only when it changes. Requests are handled one at a time, see handle_request for the commands.
+    """
+    _config: DaemonConfig
+    _people: _WatchedFile[list[Person]]
+    _justice_table: _WatchedFile[JusticeTable]
+    _previous_shifts: _WatchedFile[ShiftHistory]
+    _schedule: _WatchedFile[Optional[Schedule]]
+    _lock: asyncio.Lock
+    _commands: dict[str, Callable[[dict], Any]]
+
+    def __init__(self, config: DaemonConfig):
+        self._config = config
+        snapshot_cache = SnapshotCache(config.snapshots_dir) if config.snapshots_dir is not None else None
+
+        def cached(load: Callable[[Path], T]) -> Callable[[Path], T]:
+            return (lambda path: snapshot_cache.load(path, load)) if snapshot_cache is not None else load
+
+        self._people = _WatchedFile(config.people_path, cached(load_people), list)
+        self._justice_table = _WatchedFile(config.justice_table_path, cached(JusticeTable.from_file), JusticeTable)
+        self._previous_shifts = _WatchedFile(config.previous_shifts_path, cached(ShiftHistory.from_json_file),
+                                             ShiftHistory)
+        self._schedule = _WatchedFile(config.schedule_path, lambda path: Schedule(ShiftTable.from_json_file(path)),
+                                      lambda: None)
+        self._lock = asyncio.Lock()
+        self._commands = {
+            'ping': lambda request: 'pong',
+            'preview': self._preview,
+            'schedule': self._schedule_period,
+            'candidates': self._get_candidates,
+            'export': self._export,
+        }
+
+    def warm_up(self) -> None:
+        """
+        Loads all the files and the holidays of the current and the next year, so the first request is fast as well.
+        """
+        self._people.get()
+        self._justice_table.get()
+        self._previous_shifts.get()
+        self._schedule.get()
+        for year in (date.today().year, date.today().year + 1):
+            HOLIDAY_CALENDAR.get_year(year)
+
+    def _get_previous_shifts(self, start_date: date) -> ShiftHistory:
+        """
+        :return: The previous shifts that start before the given date. The shifts from the date on belong to a period
+        that is scheduled again, and are replaced by its new shifts.
+        """
+        history = self._previous_shifts.get()
+        if history.archived_until is not None and start_date <= history.archived_until:
+            raise ValueError(f'The period starts on {start_date}, before the end of the archived shifts '
+                             f'({history.archived_until})')
+
+        recent_shifts = history.recent_shifts
+        if not len(recent_shifts) or recent_shifts.get_row(len(recent_shifts) - 1)[0] < start_date:
+            return history
+
+        kept_shifts = ShiftTable()
+        for row in recent_shifts.iter_rows():
+            if row[0] < start_date:
+                kept_shifts.append(*row)
+        return ShiftHistory(kept_shifts, history.archived_index, history.archived_until)
+
+    def _make_schedule(self, request: dict) -> tuple[Schedule, JusticeTable, ShiftHistory]:
+        """
+        Schedules the period of the request on a copy of the justice table, which is returned with the schedule and the
+        previous shifts that the period was scheduled after.
+        """
+        if request.get('seed') is not None:
+            random.seed(request['seed'])
+
+        start_date = date.fromisoformat(request['start_date'])
+        previous_shifts = self._get_previous_shifts(start_date)
+        justice_table = self._justice_table.get().copy()
+        scheduler = Scheduler(start_date, date.fromisoformat(request['end_date']), self._people.get(), justice_table,
+                              previous_schedule=previous_shifts, engine=request.get('engine', SchedulingEngine.GREEDY))
+        return scheduler.schedule(), justice_table, previous_shifts
+
+    def _preview(self, request: dict) -> list[dict]:
+        """
+        Schedules the period without saving anything.
+        """
+        schedule, _, _ = self._make_schedule(request)
+        return _get_shift_rows(schedule.shifts)
+
+    def _schedule_period(self, request: dict) -> list[dict]:
+        """
+        Schedules the period, saves the schedule and the justice table, and adds the shifts to the previous shifts, so
+        the next schedule request keeps the spacing from them (as main does with the history store).
+        """
+        schedule, justice_table, previous_shifts = self._make_schedule(request)
+        recent_shifts = ShiftTable()
+        for row in chain(previous_shifts.recent_shifts.iter_rows(), schedule.shift_table.iter_rows()):
+            recent_shifts.append(*row)
+        history = ShiftHistory(recent_shifts, previous_shifts.archived_index, previous_shifts.archived_until)
+        people = self._people.get()
+        self._justice_table.set(justice_table, lambda path: write_atomically(
+            path, lambda temporary_path: justice_table.save_to_file(temporary_path, people_whitelist=people)))
+        self._schedule.set(schedule, lambda path: write_atomically(path, schedule.save_to_json_file))
+        self._previous_shifts.set(history, lambda path: write_atomically(
+            path, Schedule(history.recent_shifts).save_to_json_file))
+        return _get_shift_rows(schedule.shifts)
+
+    def _get_last_schedule(self) -> Schedule:
+        schedule = self._schedule.get()
+        if schedule is None:
+            raise ValueError('There is no schedule yet, send a schedule request first')
+        return schedule
+
+    def _get_candidates(self, request: dict) -> list[dict]:
+        """
+        :return: The people of the roster that can cover the shift of the last schedule on the date of the request
+        (without breaking their constraints or the spacing rules), the best candidate first.
+        """
+        shifts = self._get_last_schedule().shifts
+        _date = date.fromisoformat(request['date'])
+        position = next((position for position, shift in enumerate(shifts) if shift.dates.overlaps_with(_date)), None)
+        if position is None:
+            raise ValueError(f'The last schedule has no shift on {_date}')
+
+        # The spacing rules are checked against the tail of the shifts before the schedule as well
+        previous_shifts = self._get_previous_shifts(shifts[0].dates.start).recent_shifts
+        tail_start = previous_shifts.get_tail_start(MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES,
+                                                    SPACE_BETWEEN_SHIFT_TYPES_MAPPING)
+        timeline = [*previous_shifts.iter_shifts(tail_start), *shifts]
+        first_position = len(timeline) - len(shifts)
+        position += first_position
+
+        justice_table = self._justice_table.get()
+        people_by_id = {person.id: person for person in self._people.get()}
+        repair = ScheduleRepair(timeline, first_position, justice_table)
+        count = request.get('count', DEFAULT_CANDIDATES_COUNT)
+        candidates = list()
+        shift_type = timeline[position].type
+        for person in justice_table.iter_shift_candidates(shift_type):
+            person = people_by_id.get(person.id)
+            if person is not None and repair.is_compatible(person, position):
+                candidates.append({
+                    'full_name': person.full_name,
+                    'email_address': person.email_address,
+                    'debt': justice_table.get_person_record(person).get_debt(shift_type),
+                })
+                if len(candidates) == count:
+                    break
+
+        return candidates
+
+    def _export(self, request: dict) -> str:
+        """
+        Writes the last schedule to the path of the request, as CSV (the default), JSON or Parquet.
+        """
+        schedule = self._get_last_schedule()
+        path = Path(request['path'])
+        save = {
+            'csv': schedule.save_to_csv_file,
+            'json': schedule.save_to_json_file,
+            'parquet': schedule.save_to_parquet_file,
+        }[request.get('format', 'csv')]
+        save(path)
+        return str(path)
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Runs the command of the request (ping, preview, schedule, candidates or export).
+        :return: The response, {"ok": true, "result": ...} or {"ok": false, "error": ...}.
+        """
+        command = self._commands.get(request.get('command'))
+        if command is None:
+            return {'ok': False, 'error': f'Unknown command: {request.get("command")}'}
+
+        try:
+            return {'ok': True, 'result': command(request)}
+        except Exception as error:
+            _logger.exception(f'Request {request} failed')
+            return {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    response = {'ok': False, 'error': f'Invalid request: {error}'}
+                else:
+                    # The requests share the state, so they run one at a time, off the event loop
+                    async with self._lock:
+                        response = await asyncio.to_thread(self.handle_request, request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Optional[Path] = None, host: str = DEFAULT_HOST, port: int = 0,
+                    on_started: Optional[Callable[[asyncio.AbstractServer], None]] = None) -> None:
+        """
+        Serves requests on a Unix socket, or (if no socket path is given) on a local TCP port, until cancelled. This is
+        not HTTP: every request and every response is a single line of JSON.
+        :param port: 0 picks a free port, which can be found through on_started.
+        """
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(self._handle_connection, path=socket_path, limit=MAX_LINE_LENGTH)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host=host, port=port, limit=MAX_LINE_LENGTH)
+
+        _logger.info(f'Serving on {", ".join(str(sock.getsockname()) for sock in server.sockets)}')
+        if on_started is not None:
+            on_started(server)
+        async with server:
+            await server.serve_forever()
+
+
+def send_request(request: dict, socket_path: Optional[Path] = None, host: str = DEFAULT_HOST,
+                 port: Optional[int] = None) -> dict:
+    """
+    Sends a request to a running daemon and waits for its response.
+    """
+    if socket_path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(str(socket_path))
+    else:
+        connection = socket.create_connection((host, port))
+
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps(request).encode() + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Optional
+
+import numpy as np
+
+from .models import Person, ShiftType
+
+SHIFT_TYPES = list(ShiftType)
+SHIFT_TYPE_COLUMNS = {shift_type: column for column, shift_type in enumerate(SHIFT_TYPES)}
+WEIGHT_FIELDS = {
+    ShiftType.WORKDAY: 'workdays_shifts_weight',
+    ShiftType.WEEKEND: 'weekend_days_shifts_weight',
+    ShiftType.HOLIDAY: 'holidays_shifts_weight',
+}
+INITIAL_CAPACITY = 64
+
+_weights_getter = attrgetter(*(WEIGHT_FIELDS[shift_type] for shift_type in SHIFT_TYPES))
+
+
+def get_weights(person: Person) -> tuple[float, ...]:
+    """
+    :return: The weights of the person, by the order of SHIFT_TYPES.
+    """
+    return _weights_getter(person)
+
+
+@dataclass
+class FairnessMetrics:
+    # Population variance of the debts
+    variance: float
+    # Largest distance of a debt from the mean debt
+    max_deviation: float
+    # Gini coefficient of the debts shifted to start at zero: 0 when all the debts are equal, and close to 1 when a
+    # single person holds all the debt above the lowest one
+    gini: float
+
+
+class DebtMatrix:
+    """
+    Debts and weights of people (rows) by shift type (columns, by the order of SHIFT_TYPES), stored in NumPy arrays
+    that grow as people are added.
+    """
+    _size: int
+    _debts: np.ndarray
+    _weights: np.ndarray
+
+    def __init__(self):
+        self._size = 0
+        self._debts = np.zeros((INITIAL_CAPACITY, len(SHIFT_TYPES)))
+        self._weights = np.zeros((INITIAL_CAPACITY, len(SHIFT_TYPES)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def debts(self) -> np.ndarray:
+        return self._debts[:self._size]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights[:self._size]
+
+    def add_rows(self, debts: list[list[float]], people: list[Person]) -> range:
+        """
+        :param debts: The debts of the new rows, by the order of SHIFT_TYPES.
+        :param people: The people of the new rows, whose weights are the weights of the rows.
+        :return: The indexes of the new rows.
+        """
+        required_size = self._size + len(debts)
+        if required_size > len(self._debts):
+            capacity = max(len(self._debts) * 2, required_size)
+            self._debts = np.concatenate([self._debts, np.zeros((capacity - len(self._debts), len(SHIFT_TYPES)))])
+            self._weights = np.concatenate([self._weights, np.zeros((capacity - len(self._weights), len(SHIFT_TYPES)))])
+
+        rows = range(self._size, required_size)
+        if debts:
+            self._debts[self._size:required_size] = debts
+            self._weights[self._size:required_size] = [get_weights(person) for person in people]
+        self._size = required_size
+        return rows
+
+    def get_debt(self, row: int, shift_type: ShiftType) -> float:
+        return float(self._debts[row, SHIFT_TYPE_COLUMNS[shift_type]])
+
+    def set_debt(self, row: int, shift_type: ShiftType, value: float) -> None:
+        self._debts[row, SHIFT_TYPE_COLUMNS[shift_type]] = value
+
+    def distribute(self, rows: list[int], totals: list[float],
+                   people: list[Person]) -> tuple[list[list[float]], list[list[float]]]:
+        """
+        Adds the totals (by the order of SHIFT_TYPES) to the debts of the rows, in proportion to the weights of the
+        people of the rows (that replace the current weights of the rows).
+        :return: The debts of the rows before and after the change.
+        """
+        weights = np.array([get_weights(person) for person in people], dtype=float)
+        self._weights[rows] = weights
+        availability = weights.sum(axis=0)
+        if np.any(availability == 0):
+            raise ZeroDivisionError('The people have no weight in one of the shift types')
+
+        previous_debts = self._debts[rows].tolist()
+        np.add.at(self._debts, rows, np.array(totals, dtype=float) / availability * weights)
+        return previous_debts, self._debts[rows].tolist()
+
+    def get_fairness_metrics(self, rows: Optional[list[int]] = None) -> dict[ShiftType, FairnessMetrics]:
+        """
+        :param rows: Rows to measure, defaults to all the rows.
+        """
+        debts = self.debts if rows is None else self._debts[rows]
+        if not len(debts):
+            return {shift_type: FairnessMetrics(0.0, 0.0, 0.0) for shift_type in SHIFT_TYPES}
+
+        variances = debts.var(axis=0)
+        max_deviations = np.abs(debts - debts.mean(axis=0)).max(axis=0)
+
+        # Gini = sum((2i - n - 1) * x_i) / (n * sum(x)), over the sorted values
+        shifted_debts = np.sort(debts - debts.min(axis=0), axis=0)
+        count = len(shifted_debts)
+        ranks = 2 * np.arange(1, count + 1) - count - 1
+        totals = shifted_debts.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ginis = np.where(totals > 0, ranks @ shifted_debts / (count * totals), 0.0)
+
+        return {shift_type: FairnessMetrics(float(variances[column]), float(max_deviations[column]),
+                                            float(ginis[column]))
+                for column, shift_type in enumerate(SHIFT_TYPES)}
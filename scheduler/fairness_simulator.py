@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from logging import getLogger
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, Field, parse_obj_as
+
+from .debt_matrix import SHIFT_TYPE_COLUMNS, SHIFT_TYPES, get_weights
+from .models import Person, ShiftType
+from .shifts_builder import ShiftsBuilder
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+REPORTED_PERCENTILES = (0, 5, 25, 50, 75, 95, 100)
+# Position of the last shift of people that had no shifts yet, far enough to keep every spacing rule
+_NO_SHIFT = -2 ** 40
+# Candidates are ranked by tier first: people that keep all the rules, people that only break the spacing rules, and
+# people that have constraints on the shift
+_COMPATIBLE_TIER, _SPACING_TIER, _CONSTRAINT_TIER = 2, 1, 0
+
+_logger = getLogger(__name__)
+
+
+class WeightingScheme(BaseModel):
+    """
+    Weights of a roster and spacing settings to simulate.
+    """
+    name: str
+    # The weights of every person of the roster, by the order of the ShiftType enum
+    weights: list[tuple[float, float, float]]
+    spacing: dict[ShiftType, int] = Field(default_factory=lambda: dict(SPACE_BETWEEN_SHIFT_TYPES_MAPPING))
+    min_space: int = MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES
+
+    @staticmethod
+    def from_people(name: str, people: list[Person], **kwargs) -> WeightingScheme:
+        return WeightingScheme(name=name, weights=[get_weights(person) for person in people], **kwargs)
+
+    @staticmethod
+    def from_file(file_path: Union[str, Path]) -> list[WeightingScheme]:
+        return parse_obj_as(list[WeightingScheme], json.loads(Path(file_path).read_text()))
+
+
+@dataclass
+class PeriodShifts:
+    # Columns of the types of the shifts (see SHIFT_TYPES) and their lengths in days, in chronological order
+    types: np.ndarray
+    days: np.ndarray
+
+    @property
+    def totals(self) -> np.ndarray:
+        """
+        :return: Total days of every shift type.
+        """
+        return np.bincount(self.types, weights=self.days, minlength=len(SHIFT_TYPES))
+
+
+@dataclass
+class SimulationResult:
+    # Debts at the end of the last period, by scenario, person and shift type
+    debts: np.ndarray
+    # Shifts that were given to people that broke the spacing rules or had constraints on them, by scenario
+    spacing_violations: np.ndarray
+    constraint_violations: np.ndarray
+
+
+@dataclass
+class SchemeReport:
+    name: str
+    scenarios: int
+    # Percentiles (REPORTED_PERCENTILES) of the final debts of all the people in all the scenarios, by shift type
+    debt_percentiles: dict[ShiftType, list[float]]
+    # Mean over the scenarios of the difference between the highest and the lowest final debt, by shift type
+    mean_debt_spread: dict[ShiftType, float]
+    # Percentiles of the amounts of violations in a scenario
+    spacing_violation_percentiles: list[float]
+    constraint_violation_percentiles: list[float]
+
+    @staticmethod
+    def from_result(name: str, result: SimulationResult) -> SchemeReport:
+        debts = result.debts.reshape(-1, len(SHIFT_TYPES))
+        debt_percentiles = np.percentile(debts, REPORTED_PERCENTILES, axis=0)
+        spreads = (result.debts.max(axis=1) - result.debts.min(axis=1)).mean(axis=0)
+        return SchemeReport(
+            name=name,
+            scenarios=len(result.debts),
+            debt_percentiles={shift_type: debt_percentiles[:, column].tolist()
+                              for column, shift_type in enumerate(SHIFT_TYPES)},
+            mean_debt_spread={shift_type: float(spreads[column]) for column, shift_type in enumerate(SHIFT_TYPES)},
+            spacing_violation_percentiles=np.percentile(result.spacing_violations, REPORTED_PERCENTILES).tolist(),
+            constraint_violation_percentiles=np.percentile(result.constraint_violations,
+                                                           REPORTED_PERCENTILES).tolist(),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'scenarios': self.scenarios,
+            'percentiles': list(REPORTED_PERCENTILES),
+            'debt_percentiles': {shift_type.value: values for shift_type, values in self.debt_percentiles.items()},
+            'mean_debt_spread': {shift_type.value: value for shift_type, value in self.mean_debt_spread.items()},
+            'spacing_violation_percentiles': self.spacing_violation_percentiles,
+            'constraint_violation_percentiles': self.constraint_violation_percentiles,
+        }
+
+
+def build_periods(start_date: date, periods: int, period_months: int = 1) -> list[PeriodShifts]:
+    """
+    :return: The shifts of consecutive periods of the given amount of months, with the real holidays. Like periods that
+    are scheduled one after the other, a period starts the day after the last shift of the period before it.
+    """
+    period_shifts = list()
+    for _ in range(periods):
+        shifts = ShiftsBuilder(start_date, _add_months(start_date, period_months) - timedelta(days=1)).build()
+        period_shifts.append(PeriodShifts(
+            types=np.array([SHIFT_TYPE_COLUMNS[shift.type] for shift in shifts], dtype=np.intp),
+            days=np.array([shift.dates.total_days for shift in shifts], dtype=float),
+        ))
+        start_date = shifts[-1].dates.end + timedelta(days=1)
+    return period_shifts
+
+
+def _add_months(_date: date, months: int) -> date:
+    month = _date.month - 1 + months
+    year, month = _date.year + month // 12, month % 12 + 1
+    # The day is clamped to the end of the month
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, min(_date.day, (next_month - timedelta(days=1)).day))
+
+
+def _choose(tiers: np.ndarray, debts: np.ndarray, noise: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Chooses a person in every scenario (row): from the best tier, the person with the highest debt, and a random one
+    among people with the same debt (like the candidates queue).
+    :return: The chosen people and their tiers.
+    """
+    best_tiers = tiers.max(axis=1, keepdims=True)
+    ranked_debts = np.where(tiers == best_tiers, debts, -np.inf)
+    best_debts = ranked_debts.max(axis=1, keepdims=True)
+    people = np.where(ranked_debts == best_debts, noise, -1).argmax(axis=1)
+    return people, best_tiers[:, 0]
+
+
+def simulate(periods: list[PeriodShifts], scheme: WeightingScheme, densities: np.ndarray,
+             rng: np.random.Generator) -> SimulationResult:
+    """
+    Replays the periods for all the scenarios at once, every array has a row for every scenario. The people are chosen
+    like the greedy engine chooses them, without repairing the assigned shifts: when there are not enough people that
+    keep the rules, the rules are broken and the violation is counted.
+    :param densities: Probability of every scenario that a person has a constraint on a day.
+    """
+    weights = np.array(scheme.weights, dtype=float)
+    if np.any(weights.sum(axis=0) == 0):
+        raise ZeroDivisionError(f'The people of {scheme.name} have no weight in one of the shift types')
+    if len(weights) < 2:
+        raise ValueError(f'{scheme.name} needs at least two people, for the person and the backup person of a shift')
+
+    scenarios, people = len(densities), len(weights)
+    type_spaces = np.array([scheme.spacing.get(shift_type, 0) for shift_type in SHIFT_TYPES])
+    debts = np.zeros((scenarios, people, len(SHIFT_TYPES)))
+    last_shift = np.full((scenarios, people), _NO_SHIFT)
+    last_shift_by_type = np.full((scenarios, people, len(SHIFT_TYPES)), _NO_SHIFT)
+    total_shifts, total_shifts_by_type = 0, np.zeros(len(SHIFT_TYPES), dtype=int)
+    spacing_violations = np.zeros(scenarios, dtype=int)
+    constraint_violations = np.zeros(scenarios, dtype=int)
+    all_scenarios = np.arange(scenarios)
+
+    for period in periods:
+        debts += period.totals / weights.sum(axis=0) * weights
+        for column, days in zip(period.types.tolist(), period.days.tolist()):
+            # A constraint on any of the days of the shift is a constraint on the shift
+            constraint_probabilities = 1 - (1 - densities) ** days
+            free = rng.random((scenarios, people)) >= constraint_probabilities[:, np.newaxis]
+            spaced = (total_shifts - last_shift - 1 >= scheme.min_space) & \
+                     (total_shifts_by_type[column] - last_shift_by_type[:, :, column] - 1 >= type_spaces[column])
+            tiers = np.where(free, np.where(spaced, _COMPATIBLE_TIER, _SPACING_TIER), _CONSTRAINT_TIER)
+            column_debts = debts[:, :, column]
+            noise = rng.random((scenarios, people))
+
+            main_people, main_tiers = _choose(tiers, column_debts, noise)
+            tiers[all_scenarios, main_people] = -1
+            backup_people, backup_tiers = _choose(tiers, column_debts, noise)
+
+            for chosen_tiers in (main_tiers, backup_tiers):
+                spacing_violations += chosen_tiers == _SPACING_TIER
+                constraint_violations += chosen_tiers == _CONSTRAINT_TIER
+
+            debts[all_scenarios, main_people, column] -= days
+            for chosen_people in (main_people, backup_people):
+                last_shift[all_scenarios, chosen_people] = total_shifts
+                last_shift_by_type[all_scenarios, chosen_people, column] = total_shifts_by_type[column]
+            total_shifts += 1
+            total_shifts_by_type[column] += 1
+
+    return SimulationResult(debts, spacing_violations, constraint_violations)
+
+
+def _simulate_batch(periods: list[PeriodShifts], scheme: WeightingScheme, scenarios: int,
+                    density_range: tuple[float, float], seed: tuple[int, int]) -> SimulationResult:
+    # Module level, so it can be sent to the worker processes
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    densities = rng.uniform(*density_range, size=scenarios)
+    return simulate(periods, scheme, densities, rng)
+
+
+class FairnessSimulator:
+    """
+    Simulates how the debts drift over many future periods under different weighting schemes. Every scheme runs the
+    same scenarios (the same sampled constraint densities and random choices), in batches that are spread over a
+    process pool.
+    """
+    _periods: list[PeriodShifts]
+    _scenarios: int
+    _density_range: tuple[float, float]
+    _seed: int
+    _max_workers: Optional[int]
+    _batch_size: int
+
+    def __init__(self, start_date: date, periods: int, period_months: int = 1, scenarios: int = 100,
+                 density_range: tuple[float, float] = (0.02, 0.15), seed: int = 0, max_workers: Optional[int] = None,
+                 batch_size: int = 50):
+        """
+        :param density_range: The constraint density of every scenario (the probability that a person has a constraint
+        on a day) is drawn uniformly from this range.
+        :param max_workers: Amount of worker processes, defaults to the amount of CPUs.
+        :param batch_size: Amount of scenarios that a worker simulates at once.
+        """
+        self._periods = build_periods(start_date, periods, period_months)
+        self._scenarios = scenarios
+        self._density_range = density_range
+        self._seed = seed
+        self._max_workers = max_workers
+        self._batch_size = batch_size
+
+    def run_results(self, schemes: list[WeightingScheme]) -> list[SimulationResult]:
+        """
+        :return: The results of all the scenarios of every scheme, in the order of the schemes.
+        """
+        batch_sizes = [min(self._batch_size, self._scenarios - start)
+                       for start in range(0, self._scenarios, self._batch_size)]
+        tasks = [(scheme_index, batch_index) for scheme_index in range(len(schemes))
+                 for batch_index in range(len(batch_sizes))]
+
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            batches = list(executor.map(
+                _simulate_batch,
+                [self._periods] * len(tasks),
+                [schemes[scheme_index] for scheme_index, _ in tasks],
+                [batch_sizes[batch_index] for _, batch_index in tasks],
+                [self._density_range] * len(tasks),
+                # The seed depends only on the batch, so all the schemes run the same scenarios
+                [(self._seed, batch_index) for _, batch_index in tasks],
+            ))
+
+        results = list()
+        for scheme_index in range(len(schemes)):
+            scheme_batches = batches[scheme_index * len(batch_sizes):(scheme_index + 1) * len(batch_sizes)]
+            results.append(SimulationResult(*(np.concatenate([getattr(batch, field) for batch in scheme_batches])
+                                              for field in ('debts', 'spacing_violations', 'constraint_violations'))))
+        return results
+
+    def run(self, schemes: list[WeightingScheme]) -> list[SchemeReport]:
+        """
+        :return: A report of every scheme, in the order of the schemes.
+        """
+        _logger.info(f'Simulating {len(self._periods)} periods of {self._scenarios} scenarios for {len(schemes)} '
+                     f'schemes')
+        return [SchemeReport.from_result(scheme.name, result)
+                for scheme, result in zip(schemes, self.run_results(schemes))]
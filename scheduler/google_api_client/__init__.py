@@ -0,0 +1,10 @@
+from .appointments import Appointment, AppointmentAction, AppointmentResult
+
+
+def __getattr__(name: str):
+    # The Google libraries are slow to import, so they are imported only when the client is used
+    if name == 'GoogleAPIClient':
+        from .google_api_client import GoogleAPIClient
+        return GoogleAPIClient
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,29 @@
+import datetime
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class AppointmentAction(Enum):
+    INSERT = 'insert'
+    PATCH = 'patch'
+    DELETE = 'delete'
+
+
+@dataclass
+class Appointment:
+    title: str
+    start_date: datetime.date
+    end_date: datetime.date
+    target_email: str
+
+
+@dataclass
+class AppointmentResult:
+    appointment: Appointment
+    action: AppointmentAction = AppointmentAction.INSERT
+    # Set by the response of an insert, and should be given for a patch or a delete
+    event_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    succeeded: bool = False
@@ -1,24 +1,96 @@
 import datetime
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 from pathlib import Path
+from typing import Optional
 
+import httplib2
+from google.auth.credentials import Credentials as BaseCredentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, Resource
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest, HttpRequest
+
+from .appointments import Appointment, AppointmentAction, AppointmentResult
 
 _logger = getLogger(__name__)
 CREDENTIALS_FILE_PATH = Path(__file__).parent / 'credentials.json'
 TOKEN_JSON_PATH = Path(__file__).parent / 'token.json'
 SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/userinfo.profile']
 
+DEFAULT_ROOT_URL = 'https://www.googleapis.com/'
+CALENDAR_SERVICE_PATH = 'calendar/v3/'
+CALENDAR_BATCH_PATH = 'batch/calendar/v3'
+
+# Google allows up to 50 calls in a single calendar batch request
+BATCH_SIZE = 50
+MAX_WORKERS = 4
+MAX_ATTEMPTS = 5
+INITIAL_BACKOFF = 1.0
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+# Statuses of deleting an event that does not exist anymore
+DELETED_STATUSES = {404, 410}
+
+
+def _is_retryable(error: Exception) -> bool:
+    if not isinstance(error, HttpError):
+        # Connection errors
+        return True
+
+    if error.resp.status in RETRYABLE_STATUSES:
+        return True
+
+    if error.resp.status == 403:
+        try:
+            errors = json.loads(error.content).get('error', dict()).get('errors', list())
+        except (ValueError, AttributeError):
+            return False
+        return any(details.get('reason') in RATE_LIMIT_REASONS for details in errors)
+
+    return False
+
+
+def _get_retry_after(error: Exception) -> float:
+    if isinstance(error, HttpError):
+        try:
+            return float(error.resp.get('retry-after', 0))
+        except ValueError:
+            pass
+    return 0
+
 
 class GoogleAPIClient:
-    _credentials: Credentials
+    _credentials: Optional[BaseCredentials]
+    _root_url: str
+    _max_workers: int
+    _initial_backoff: float
+    _service: Optional[Resource]
+    _local: threading.local
 
-    def __init__(self):
-        self._credentials = self.get_credentials()
+    def __init__(self, credentials: Optional[BaseCredentials] = None, root_url: str = DEFAULT_ROOT_URL,
+                 max_workers: int = MAX_WORKERS, initial_backoff: float = INITIAL_BACKOFF):
+        """
+        :param credentials: Defaults to the credentials of the user (see get_credentials), which are loaded only when
+        the first request is sent.
+        :param root_url: Root url of the Google APIs, can be replaced with a local server for testing.
+        :param max_workers: Amount of batch requests that are sent at the same time.
+        :param initial_backoff: Seconds to wait before the first retry, doubled on every retry.
+        """
+        self._credentials = credentials
+        self._root_url = root_url
+        self._max_workers = max_workers
+        self._initial_backoff = initial_backoff
+        self._service = None
+        self._local = threading.local()
 
     @staticmethod
     def get_credentials() -> Credentials:
@@ -37,33 +109,152 @@ class GoogleAPIClient:
 
         return credentials
 
-    def schedule_appointment(self, title: str, start_date: datetime.date, end_date: datetime.date,
-                             target_email: str) -> None:
-        """
-        Schedule an appointment on Google Calendar API.
-        :param title: The title of the appointment.
-        :param start_date: The start date of the appointment (as a date object).
-        :param end_date: The end date of the appointment (as a date object).
-        :param target_email: The email address of the person to invite to the appointment.
-        """
-        service = build('calendar', 'v3', credentials=self._credentials)
-        event = {
-            'summary': title,
+    @property
+    def credentials(self) -> BaseCredentials:
+        if self._credentials is None:
+            self._credentials = self.get_credentials()
+        return self._credentials
+
+    def _get_calendar_service(self) -> Resource:
+        # Built once, from the discovery document that comes with the library
+        if self._service is None:
+            self._service = build('calendar', 'v3', credentials=self.credentials, static_discovery=True,
+                                  client_options={'api_endpoint': f'{self._root_url}{CALENDAR_SERVICE_PATH}'})
+        return self._service
+
+    def _get_http(self) -> httplib2.Http:
+        # httplib2 is not thread safe, so every thread has its own connection
+        if not hasattr(self._local, 'http'):
+            self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return self._local.http
+
+    @staticmethod
+    def _get_event(appointment: Appointment) -> dict:
+        return {
+            'summary': appointment.title,
             'start': {
-                'date': start_date.isoformat(),
+                'date': appointment.start_date.isoformat(),
                 'timeZone': 'Asia/Jerusalem',
             },
             'end': {
-                'date': (end_date + datetime.timedelta(days=1)).isoformat(),
+                'date': (appointment.end_date + datetime.timedelta(days=1)).isoformat(),
                 'timeZone': 'Asia/Jerusalem',
             },
-            'attendees': [{'email': target_email}],
+            'attendees': [{'email': appointment.target_email}],
             'reminders': {
                 'useDefault': True,
             }
         }
+
+    def _get_request(self, result: AppointmentResult) -> HttpRequest:
+        events = self._get_calendar_service().events()
+
+        if result.action == AppointmentAction.INSERT:
+            return events.insert(calendarId='primary', body=self._get_event(result.appointment))
+        if result.action == AppointmentAction.PATCH:
+            return events.patch(calendarId='primary', eventId=result.event_id,
+                                body=self._get_event(result.appointment))
+        return events.delete(calendarId='primary', eventId=result.event_id)
+
+    @staticmethod
+    def _handle_response(result: AppointmentResult, response: Optional[dict], error: Optional[Exception]) -> bool:
+        """
+        :return: Whether the action succeeded, deleting an event that does not exist anymore counts as a success.
+        """
+        if error is None or result.action == AppointmentAction.DELETE and isinstance(error, HttpError) \
+                and error.resp.status in DELETED_STATUSES:
+            if result.action == AppointmentAction.INSERT:
+                result.event_id = response['id']
+            result.error, result.succeeded = None, True
+            return True
+
+        result.error = str(error)
+        return False
+
+    def _execute_batch(self, results: list[AppointmentResult]) -> dict[int, Exception]:
+        """
+        Sends the actions in a single batch request.
+        :return: The errors of the actions that failed, by their indexes.
+        """
+        errors = dict()
+
+        def handle_response(request_id: str, response: Optional[dict], error: Optional[Exception]) -> None:
+            if not self._handle_response(results[int(request_id)], response, error):
+                errors[int(request_id)] = error
+
+        batch = BatchHttpRequest(callback=handle_response, batch_uri=f'{self._root_url}{CALENDAR_BATCH_PATH}')
+        for index, result in enumerate(results):
+            result.attempts += 1
+            batch.add(self._get_request(result), request_id=str(index))
+
         try:
-            service.events().insert(calendarId='primary', body=event).execute()
-        except HttpError as error:
-            _logger.exception(error)
-            _logger.error('Encountered an error while scheduling an appointment')
+            batch.execute(http=self._get_http())
+        except (HttpError, httplib2.HttpLib2Error, OSError) as error:
+            for index, result in enumerate(results):
+                result.error = str(error)
+                errors[index] = error
+
+        return errors
+
+    def _wait_before_retry(self, attempt: int, retry_after: float) -> None:
+        """
+        Exponential backoff with jitter, but never less than the Retry-After header of the last responses asked for.
+        """
+        backoff = self._initial_backoff * 2 ** (attempt - 1) * (1 + random.random())
+        time.sleep(max(backoff, retry_after))
+
+    def _send_batch(self, results: list[AppointmentResult]) -> None:
+        """
+        Sends the actions in a single batch request, and sends again the ones that failed on rate limits or
+        server errors, with exponential backoff.
+        """
+        pending_results = results
+        retry_after = 0.0
+
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                self._wait_before_retry(attempt, retry_after)
+
+            errors = self._execute_batch(pending_results)
+            retryable_errors = {index: error for index, error in errors.items() if _is_retryable(error)}
+            retry_after = max((_get_retry_after(error) for error in retryable_errors.values()), default=0)
+            pending_results = [pending_results[index] for index in sorted(retryable_errors)]
+            if not pending_results:
+                return
+
+    def send_actions(self, results: list[AppointmentResult]) -> list[AppointmentResult]:
+        """
+        Sends the actions (inserts, patches and deletes of appointments) to Google Calendar API, in batch requests that
+        are sent concurrently. The given results are updated in place.
+        """
+        batches = [results[index:index + BATCH_SIZE] for index in range(0, len(results), BATCH_SIZE)]
+        # Built before the threads start, so they share a single service
+        self._get_calendar_service()
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            list(executor.map(self._send_batch, batches))
+
+        for result in results:
+            if not result.succeeded:
+                _logger.error(f'Encountered an error while trying to {result.action.value} an appointment '
+                              f'{result.appointment}: {result.error}')
+
+        return results
+
+    def schedule_appointments(self, appointments: list[Appointment]) -> list[AppointmentResult]:
+        """
+        Schedules the appointments on Google Calendar API, in batch requests that are sent concurrently.
+        :return: The result of every appointment, in the same order.
+        """
+        return self.send_actions([AppointmentResult(appointment) for appointment in appointments])
+
+    def schedule_appointment(self, title: str, start_date: datetime.date, end_date: datetime.date,
+                             target_email: str) -> None:
+        """
+        Schedule an appointment on Google Calendar API.
+        :param title: The title of the appointment.
+        :param start_date: The start date of the appointment (as a date object).
+        :param end_date: The end date of the appointment (as a date object).
+        :param target_email: The email address of the person to invite to the appointment.
+        """
+        self.schedule_appointments([Appointment(title, start_date, end_date, target_email)])
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .justice_table import JusticeTable
+from .last_shift_index import LastShiftIndex
+from .models import JusticeRecord, Person, Shift, ShiftType
+from .models.person_registry import PERSON_REGISTRY
+from .shift_history import ShiftHistory
+from .shift_table import NO_PERSON, ShiftTable
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+# Seconds to wait for the lock of another run before giving up
+LOCK_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    email_address TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (full_name, email_address)
+);
+CREATE TABLE IF NOT EXISTS justice_records (
+    person_id INTEGER PRIMARY KEY REFERENCES people (id),
+    workdays_debt REAL NOT NULL,
+    weekend_days_debt REAL NOT NULL,
+    holidays_debt REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shifts (
+    id INTEGER PRIMARY KEY,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    person_id INTEGER REFERENCES people (id),
+    backup_person_id INTEGER REFERENCES people (id),
+    title TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shifts_by_start_date ON shifts (start_date);
+CREATE INDEX IF NOT EXISTS shifts_by_type ON shifts (type, start_date);
+CREATE INDEX IF NOT EXISTS shifts_by_person ON shifts (person_id, start_date);
+CREATE INDEX IF NOT EXISTS shifts_by_backup_person ON shifts (backup_person_id, start_date);
+"""
+
+# Stores that were created before the shifts were unique may hold a shift more than once, the last written one is kept
+UNIQUE_SHIFTS_MIGRATION = """
+BEGIN IMMEDIATE;
+DELETE FROM shifts WHERE id NOT IN (SELECT MAX(id) FROM shifts GROUP BY start_date, end_date, type);
+CREATE UNIQUE INDEX IF NOT EXISTS shifts_by_dates_and_type ON shifts (start_date, end_date, type);
+COMMIT;
+"""
+
+# The columns of the debts in the justice_records table, by the order of the ShiftType enum
+DEBT_COLUMNS = {
+    ShiftType.WORKDAY: 'workdays_debt',
+    ShiftType.WEEKEND: 'weekend_days_debt',
+    ShiftType.HOLIDAY: 'holidays_debt',
+}
+
+Debts = tuple[float, ...]
+
+
+class HistoryStore:
+    """
+    The justice table and the history of the shifts, in an SQLite database.
+    Every save is a single small transaction: only the debts that changed are written, as the change since they were
+    loaded from (or last saved to) the store, so runs that save concurrently add up instead of overwriting each other.
+    A shift is identified by its dates and type, saving it again replaces its people and title. The shifts are indexed
+    by their start date and their people.
+    """
+    _connection: sqlite3.Connection
+    # Ids of the people in the database, by the identities of the people (ids in the process may be reused, see
+    # PersonRegistry)
+    _row_ids: dict[tuple[str, str], int]
+    # Debts of the people (by their identities) as they were last loaded or saved
+    _saved_debts: dict[tuple[str, str], Debts]
+
+    def __init__(self, file_path: Union[str, Path]):
+        self._connection = sqlite3.connect(file_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.executescript(SCHEMA)
+        if self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND "
+                                    "name = 'shifts_by_dates_and_type'").fetchone() is None:
+            self._connection.executescript(UNIQUE_SHIFTS_MIGRATION)
+        self._row_ids = dict()
+        self._saved_debts = dict()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> HistoryStore:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Takes the write lock up front, so two runs never interleave their writes
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self._connection
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def _get_row_id(self, person: Person) -> int:
+        """
+        Adds the person to the database (or updates its details), must be called within a transaction.
+        """
+        row_id = self._row_ids.get(person.identity)
+        if row_id is None:
+            self._connection.execute(
+                'INSERT INTO people (full_name, email_address, data) VALUES (?, ?, ?) '
+                'ON CONFLICT (full_name, email_address) DO UPDATE SET data = excluded.data',
+                (person.full_name, person.email_address, person.json()))
+            row_id, = self._connection.execute('SELECT id FROM people WHERE full_name = ? AND email_address = ?',
+                                               person.identity).fetchone()
+            self._row_ids[person.identity] = row_id
+
+        return row_id
+
+    def _load_people(self, row_ids: Optional[set[int]] = None) -> dict[int, Person]:
+        """
+        :return: The people with the given ids in the database (defaults to all the people), by these ids.
+        """
+        query = 'SELECT id, data FROM people'
+        if row_ids is not None:
+            query += f' WHERE id IN ({", ".join(str(row_id) for row_id in row_ids)})'
+
+        people = dict()
+        for row_id, data in self._connection.execute(query):
+            person = Person.parse_raw(data)
+            people[row_id] = person
+            self._row_ids[person.identity] = row_id
+        return people
+
+    def is_empty(self) -> bool:
+        return self._connection.execute('SELECT NOT EXISTS (SELECT 1 FROM justice_records) AND '
+                                        'NOT EXISTS (SELECT 1 FROM shifts)').fetchone()[0] == 1
+
+    def load_justice_table(self) -> JusticeTable:
+        columns = ', '.join(DEBT_COLUMNS[shift_type] for shift_type in ShiftType)
+        rows = self._connection.execute(f'SELECT person_id, {columns} FROM justice_records').fetchall()
+        people = self._load_people({row[0] for row in rows})
+
+        records = list()
+        for row_id, *debts in rows:
+            person = people[row_id]
+            records.append(JusticeRecord(person=person, **dict(zip(DEBT_COLUMNS.values(), debts))))
+            self._saved_debts[person.identity] = tuple(debts)
+        return JusticeTable(records)
+
+    def _read_shifts(self, conditions: list[str], parameters: list) -> ShiftTable:
+        query = 'SELECT start_date, end_date, type, person_id, backup_person_id, title FROM shifts'
+        if conditions:
+            query += f' WHERE {" AND ".join(conditions)}'
+        rows = self._connection.execute(f'{query} ORDER BY start_date, id', parameters).fetchall()
+
+        people = self._load_people({row_id for row in rows for row_id in row[3:5] if row_id is not None})
+        table = ShiftTable()
+        for start, end, shift_type, person_row_id, backup_person_row_id, title in rows:
+            table.append(date.fromisoformat(start), date.fromisoformat(end), ShiftType(shift_type),
+                         people[person_row_id].id if person_row_id is not None else NO_PERSON,
+                         people[backup_person_row_id].id if backup_person_row_id is not None else NO_PERSON, title)
+        return table
+
+    @staticmethod
+    def _get_date_conditions(start_date: Optional[date], end_date: Optional[date]) -> tuple[list[str], list]:
+        conditions, parameters = list(), list()
+        if start_date is not None:
+            conditions.append('start_date >= ?')
+            parameters.append(start_date.isoformat())
+        if end_date is not None:
+            conditions.append('start_date <= ?')
+            parameters.append(end_date.isoformat())
+        return conditions, parameters
+
+    def load_shift_table(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> ShiftTable:
+        """
+        :return: The shifts that start within the given dates (defaults to all the shifts), in chronological order.
+        """
+        return self._read_shifts(*self._get_date_conditions(start_date, end_date))
+
+    def _get_tail_start_date(self) -> Optional[str]:
+        """
+        :return: Start date of the first shift of the shortest tail of the shifts that the spacing rules look at (see
+        ShiftTable.get_tail_start), or None if they look at all the shifts.
+        """
+        tail_start_date = None
+        for shift_type, min_shifts in [(None, MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES),
+                                       *SPACE_BETWEEN_SHIFT_TYPES_MAPPING.items()]:
+            if min_shifts <= 0:
+                continue
+            condition, parameters = ('WHERE type = ? ', [shift_type.value]) if shift_type is not None else ('', [])
+            row = self._connection.execute(f'SELECT start_date FROM shifts {condition}'
+                                           f'ORDER BY start_date DESC, id DESC LIMIT 1 OFFSET ?',
+                                           parameters + [min_shifts - 1]).fetchone()
+            if row is None:
+                return None
+            tail_start_date = min(tail_start_date or row[0], row[0])
+        return tail_start_date
+
+    def _load_last_shift_index(self, until_date: str) -> LastShiftIndex:
+        """
+        :return: Index of the shifts that start before the given date, built by the database without reading them.
+        """
+        totals = dict(self._connection.execute('SELECT type, COUNT(*) FROM shifts WHERE start_date < ? GROUP BY type',
+                                               [until_date]))
+        rows = self._connection.execute(
+            'WITH positions AS ('
+            '  SELECT type, person_id, backup_person_id,'
+            '         ROW_NUMBER() OVER (ORDER BY start_date, id) - 1 AS position,'
+            '         ROW_NUMBER() OVER (PARTITION BY type ORDER BY start_date, id) - 1 AS position_of_type'
+            '  FROM shifts WHERE start_date < ?'
+            '), assignments AS ('
+            '  SELECT person_id, type, position, position_of_type FROM positions WHERE person_id IS NOT NULL'
+            '  UNION ALL'
+            '  SELECT backup_person_id, type, position, position_of_type FROM positions'
+            '  WHERE backup_person_id IS NOT NULL'
+            ') '
+            'SELECT person_id, type, MAX(position), MAX(position_of_type), data FROM assignments '
+            'JOIN people ON people.id = person_id GROUP BY person_id, type ORDER BY person_id',
+            [until_date]).fetchall()
+
+        raw_people = dict()
+        for row_id, shift_type, last_shift, last_shift_of_type, data in rows:
+            raw_person = raw_people.setdefault(row_id, {'person': json.loads(data), 'last_shift': last_shift,
+                                                        'last_shift_by_type': dict()})
+            raw_person['last_shift'] = max(raw_person['last_shift'], last_shift)
+            raw_person['last_shift_by_type'][shift_type] = last_shift_of_type
+
+        return LastShiftIndex.from_dict({
+            'total_shifts': sum(totals.values()),
+            'total_shifts_by_type': {shift_type.value: totals.get(shift_type.value, 0) for shift_type in ShiftType},
+            'people': list(raw_people.values()),
+        })
+
+    def load_shift_history(self) -> ShiftHistory:
+        """
+        :return: The shifts that the spacing rules look at as the recent shifts, and the index of all the shifts before
+        them, so scheduling a period does not read the whole history.
+        """
+        tail_start_date = self._get_tail_start_date()
+        if tail_start_date is None:
+            return ShiftHistory(self.load_shift_table())
+
+        recent_shifts = self._read_shifts(['start_date >= ?'], [tail_start_date])
+        archived_until = self._connection.execute('SELECT MAX(end_date) FROM shifts WHERE start_date < ?',
+                                                  [tail_start_date]).fetchone()[0]
+        return ShiftHistory(recent_shifts, self._load_last_shift_index(tail_start_date),
+                            date.fromisoformat(archived_until) if archived_until is not None else None)
+
+    def get_person_shifts(self, person: Person, start_date: Optional[date] = None,
+                          end_date: Optional[date] = None) -> list[Shift]:
+        """
+        :return: The shifts of the person (as the main or the backup person) that start within the given dates, in
+        chronological order.
+        """
+        row = self._connection.execute('SELECT id FROM people WHERE full_name = ? AND email_address = ?',
+                                       person.identity).fetchone()
+        if row is None:
+            return list()
+
+        conditions, parameters = self._get_date_conditions(start_date, end_date)
+        table = self._read_shifts(['(person_id = ? OR backup_person_id = ?)'] + conditions,
+                                  [row[0], row[0]] + parameters)
+        return list(table.iter_shifts())
+
+    def _write_debts(self, justice_table: JusticeTable, people_whitelist: Optional[list[Person]]) -> int:
+        records = justice_table.iter_records()
+        if people_whitelist:
+            people_ids = {person.id for person in people_whitelist}
+            records = (record for record in records if record.person.id in people_ids)
+
+        changes = list()
+        for record in records:
+            debts = tuple(record.get_debt(shift_type) for shift_type in ShiftType)
+            saved_debts = self._saved_debts.get(record.person.identity, (0.0,) * len(debts))
+            if debts != saved_debts:
+                changes.append((self._get_row_id(record.person),
+                                *(debt - saved_debt for debt, saved_debt in zip(debts, saved_debts))))
+                self._saved_debts[record.person.identity] = debts
+
+        columns = list(DEBT_COLUMNS.values())
+        self._connection.executemany(
+            f'INSERT INTO justice_records (person_id, {", ".join(columns)}) VALUES (?, ?, ?, ?) '
+            f'ON CONFLICT (person_id) DO UPDATE SET '
+            f'{", ".join(f"{column} = {column} + excluded.{column}" for column in columns)}', changes)
+        return len(changes)
+
+    def _write_shifts(self, shifts: ShiftTable) -> None:
+        def get_row_id(person_id: int) -> Optional[int]:
+            return self._get_row_id(PERSON_REGISTRY.get_person(person_id)) if person_id != NO_PERSON else None
+
+        self._connection.executemany(
+            'INSERT INTO shifts (start_date, end_date, type, person_id, backup_person_id, title) '
+            'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (start_date, end_date, type) DO UPDATE SET '
+            'person_id = excluded.person_id, backup_person_id = excluded.backup_person_id, title = excluded.title',
+            ((start.isoformat(), end.isoformat(), shift_type.value, get_row_id(person_id),
+              get_row_id(backup_person_id), title)
+             for start, end, shift_type, person_id, backup_person_id, title in shifts.iter_rows()))
+
+    def save(self, justice_table: Optional[JusticeTable] = None, shifts: Optional[ShiftTable] = None,
+             people_whitelist: Optional[list[Person]] = None) -> int:
+        """
+        Writes the debts that changed and the shifts (replacing the saved shifts with the same dates and type), in a
+        single transaction.
+        :param people_whitelist: Write only the debts of these people (as JusticeTable.save_to_file, an empty whitelist
+        writes all the debts).
+        :return: The amount of records whose debts were written.
+        """
+        saved_debts = self._saved_debts.copy()
+        try:
+            with self._transaction():
+                written_records = self._write_debts(justice_table, people_whitelist) \
+                    if justice_table is not None else 0
+                if shifts is not None:
+                    self._write_shifts(shifts)
+        except BaseException:
+            self._saved_debts = saved_debts
+            self._row_ids = dict()
+            raise
+
+        return written_records
+
+    def migrate_from_json(self, justice_table_path: Optional[Union[str, Path]] = None,
+                          previous_shifts_path: Optional[Union[str, Path]] = None) -> None:
+        """
+        One shot import of the JSON files of JusticeTable.save_to_file and Schedule.save_to_json_file (files that do
+        not exist are skipped). The store must be empty.
+        """
+        if not self.is_empty():
+            raise ValueError('The history store already holds records or shifts, it can be migrated only once')
+
+        justice_table = JusticeTable.from_file(justice_table_path) \
+            if justice_table_path is not None and Path(justice_table_path).is_file() else None
+        shifts = ShiftTable.from_json_file(previous_shifts_path) \
+            if previous_shifts_path is not None and Path(previous_shifts_path).is_file() else None
+        self.save(justice_table, shifts)
@@ -1,10 +1,21 @@
+import hashlib
+import json
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
 from enum import Enum
-from typing import Optional
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+
 from pyluach import dates
 
+from .atomic_write import write_text_atomically
+from .instrumentation import INSTRUMENTATION
+
+DEFAULT_MAX_CACHED_YEARS = 16
+
 
 @dataclass
 class Date:
@@ -36,8 +47,9 @@ class CustomHoliday(ABC):
 
 class CustomHebrewHoliday(CustomHoliday):
     def contains(self, _date: dates.GregorianDate) -> bool:
-        start = self.date_range.start.to_hebrew_date(_date.to_heb().year)
-        end = self.date_range.end.to_hebrew_date(_date.to_heb().year)
+        hebrew_year = _date.to_heb().year
+        start = self.date_range.start.to_hebrew_date(hebrew_year)
+        end = self.date_range.end.to_hebrew_date(hebrew_year)
         return start <= _date <= end
 
 
@@ -96,7 +108,7 @@ def _get_custom_holiday_name(_date: dates.GregorianDate) -> Optional[str]:
             return holiday.name
 
 
-def get_holiday_name(_date: date) -> Optional[str]:
+def _compute_holiday_name(_date: date) -> Optional[str]:
     pyluach_date = dates.GregorianDate(_date.year, _date.month, _date.day)
     if any(holiday.contains(pyluach_date) for holiday in IGNORED_HOLIDAYS):
         return None
@@ -106,3 +118,95 @@ def get_holiday_name(_date: date) -> Optional[str]:
         holiday_name = _get_custom_holiday_name(pyluach_date)
 
     return holiday_name
+
+
+def _get_settings_hash() -> str:
+    """
+    :return: Hash of the custom and the ignored holidays, that the computed holidays depend on.
+    """
+    return hashlib.sha256(repr((CUSTOM_HOLIDAYS, IGNORED_HOLIDAYS)).encode()).hexdigest()[:16]
+
+
+class HolidayCalendar:
+    """
+    Computes the holidays of a whole gregorian year at once, and keeps the most recently used years in memory.
+    If a cache directory is given, computed years are also stored there and loaded by later runs, as long as the custom
+    and the ignored holidays did not change.
+    """
+    _years: OrderedDict[int, Mapping[date, str]]
+    _max_cached_years: int
+    _cache_dir: Optional[Path]
+
+    def __init__(self, max_cached_years: int = DEFAULT_MAX_CACHED_YEARS, cache_dir: Optional[Union[str, Path]] = None):
+        self._years = OrderedDict()
+        self._max_cached_years = max_cached_years
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+
+    @staticmethod
+    def _compute_year(year: int) -> dict[date, str]:
+        holidays = dict()
+        current_date = date(year, 1, 1)
+
+        while current_date.year == year:
+            holiday_name = _compute_holiday_name(current_date)
+            if holiday_name:
+                holidays[current_date] = holiday_name
+            current_date += timedelta(days=1)
+
+        return holidays
+
+    def _get_cache_file_path(self, year: int) -> Path:
+        return self._cache_dir / f'holidays_{year}_{_get_settings_hash()}.json'
+
+    def _load_year(self, year: int) -> dict[date, str]:
+        if self._cache_dir is None:
+            INSTRUMENTATION.count('holidays.years_computed')
+            return self._compute_year(year)
+
+        cache_file_path = self._get_cache_file_path(year)
+        if cache_file_path.is_file():
+            try:
+                holidays = {date.fromisoformat(_date): name
+                            for _date, name in json.loads(cache_file_path.read_text()).items()}
+            except ValueError:
+                # A broken cache file (for example one that an older version left partially written) is computed again
+                pass
+            else:
+                INSTRUMENTATION.count('holidays.years_loaded_from_disk')
+                return holidays
+
+        INSTRUMENTATION.count('holidays.years_computed')
+        holidays = self._compute_year(year)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written atomically, since processes (like the workers of the batch runner) may share the cache directory
+        write_text_atomically(cache_file_path,
+                              json.dumps({_date.isoformat(): name for _date, name in holidays.items()}))
+        return holidays
+
+    def get_year(self, year: int) -> Mapping[date, str]:
+        """
+        :return: Read-only mapping of every holiday date in the gregorian year to the holiday name.
+        """
+        if year in self._years:
+            if INSTRUMENTATION.enabled:
+                INSTRUMENTATION.count('holidays.cache_hits')
+            self._years.move_to_end(year)
+            return self._years[year]
+
+        INSTRUMENTATION.count('holidays.cache_misses')
+        holidays = MappingProxyType(self._load_year(year))
+        self._years[year] = holidays
+        if len(self._years) > self._max_cached_years:
+            self._years.popitem(last=False)
+
+        return holidays
+
+    def get_holiday_name(self, _date: date) -> Optional[str]:
+        return self.get_year(_date.year).get(_date)
+
+
+HOLIDAY_CALENDAR = HolidayCalendar()
+
+
+def get_holiday_name(_date: date) -> Optional[str]:
+    return HOLIDAY_CALENDAR.get_holiday_name(_date)
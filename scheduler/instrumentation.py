@@ -0,0 +1,73 @@
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+
+class Instrumentation:
+    """
+    Opt-in timers of the phases of a run, counters and distributions of values (for example, the amount of candidates
+    that were examined for every shift).
+    Disabled by default. Hot paths check the enabled flag before recording anything, so a disabled instrumentation
+    costs a single attribute lookup.
+    """
+    enabled: bool
+    _timers: dict[str, list[float]]
+    _counters: dict[str, int]
+    _distributions: dict[str, list[float]]
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        # Timers are [calls, total seconds] and distributions are [count, total, min, max]
+        self._timers = dict()
+        self._counters = dict()
+        self._distributions = dict()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer = self._timers.setdefault(name, [0, 0.0])
+            timer[0] += 1
+            timer[1] += time.perf_counter() - start_time
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+
+        distribution = self._distributions.get(name)
+        if distribution is None:
+            self._distributions[name] = [1, value, value, value]
+        else:
+            distribution[0] += 1
+            distribution[1] += value
+            distribution[2] = min(distribution[2], value)
+            distribution[3] = max(distribution[3], value)
+
+    def get_report(self) -> dict:
+        return {
+            'phases': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in self._timers.items()},
+            'counters': dict(sorted(self._counters.items())),
+            'distributions': {name: {'count': count, 'mean': total / count, 'min': minimum, 'max': maximum}
+                              for name, (count, total, minimum, maximum) in self._distributions.items()},
+        }
+
+    def save_report(self, file_path: Union[str, Path]) -> None:
+        Path(file_path).write_text(json.dumps(self.get_report(), indent=2))
+
+
+INSTRUMENTATION = Instrumentation()
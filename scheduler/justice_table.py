@@ -1,21 +1,65 @@
 from __future__ import annotations
 
 import json
-import random
 from pathlib import Path
-from typing import Union, Optional
+from typing import Iterator, Union, Optional, TYPE_CHECKING
 
 from pydantic import parse_obj_as
 from pydantic.json import pydantic_encoder
 
+from .candidates_queue import CandidatesQueue
 from .models import JusticeRecord, Person, ShiftType
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .debt_matrix import DebtMatrix, FairnessMetrics
+
 
 class JusticeTable:
-    _records: list[JusticeRecord]
+    """
+    The debts of the records are kept in a debt matrix (a row for every record), so the debts of many people are
+    changed and measured with array operations.
+    """
+    # Records by the id of their person
+    _records: dict[int, JusticeRecord]
+    _rows: dict[int, int]
+    _debt_matrix: DebtMatrix
+    _candidates_queues: dict[ShiftType, CandidatesQueue]
 
     def __init__(self, records: Optional[list[JusticeRecord]] = None):
-        self._records = records or list()
+        # NumPy is slow to import, so it is imported only when a justice table is created
+        from .debt_matrix import DebtMatrix
+
+        self._records = dict()
+        self._rows = dict()
+        self._debt_matrix = DebtMatrix()
+        self._candidates_queues = {shift_type: CandidatesQueue() for shift_type in ShiftType}
+
+        unique_records = dict()
+        for record in records or list():
+            unique_records.setdefault(record.person.id, record)
+        self._add_records(list(unique_records.values()))
+
+    def __reduce__(self):
+        # The records are indexed by the ids of their people, which are only stable within a process
+        return JusticeTable, (list(self._records.values()),)
+
+    def _add_records(self, records: list[JusticeRecord]) -> None:
+        # The debts are read before the records are bound
+        debts = [[record.get_debt(shift_type) for shift_type in ShiftType] for record in records]
+        rows = self._debt_matrix.add_rows(debts, [record.person for record in records])
+        for record, row, record_debts in zip(records, rows, debts):
+            record.bind_to_debt_matrix(self._debt_matrix, row)
+            self._records[record.person.id] = record
+            self._rows[record.person.id] = row
+            for shift_type, debt in zip(ShiftType, record_debts):
+                self._candidates_queues[shift_type].add(record.person, debt)
+
+            record.set_debt_listener(self._on_debt_change)
+
+    def _on_debt_change(self, record: JusticeRecord, shift_type: ShiftType, previous_debt: float) -> None:
+        self._candidates_queues[shift_type].update(record.person, previous_debt, record.get_debt(shift_type))
 
     @staticmethod
     def from_file(file_path: Union[str, Path]) -> JusticeTable:
@@ -24,48 +68,82 @@ class JusticeTable:
         return JusticeTable(records)
 
     def save_to_file(self, file_path: Union[str, Path], people_whitelist: Optional[list[Person]] = None) -> None:
-        records = self._records
+        records = list(self._records.values())
         if people_whitelist:
-            records = [record for record in records if record.person in people_whitelist]
+            people_ids = {person.id for person in people_whitelist}
+            records = [record for record in records if record.person.id in people_ids]
         Path(file_path).write_text(json.dumps(records, default=pydantic_encoder))
 
+    def copy(self) -> JusticeTable:
+        """
+        :return: A justice table with copies of the records, that can be changed without changing this table.
+        """
+        return JusticeTable([record.copy() for record in self._records.values()])
+
+    def iter_records(self) -> Iterator[JusticeRecord]:
+        return iter(self._records.values())
+
     def get_person_record(self, person: Person) -> JusticeRecord:
-        for record in self._records:
-            if record.person == person:
-                return record
+        record = self._records.get(person.id)
+        if record is None:
+            record = JusticeRecord.get_default(person)
+            self._add_records([record])
 
-        record = JusticeRecord.get_default(person)
-        self._records.append(record)
         return record
 
+    def iter_shift_candidates(self, shift_type: ShiftType) -> Iterator[Person]:
+        """
+        :return: Lazy iterator that starts with the best candidate to the worst, candidates with the same debt are
+        returned in a random order. The debts must not be changed while iterating.
+        """
+        return iter(self._candidates_queues[shift_type])
+
     def get_shift_candidates(self, shift_type: ShiftType) -> list[Person]:
         """
         :return: Sorted list that starts with the best candidate to the worst.
         """
-        candidates = list()
-        candidate_groups = dict()
-
-        for record in self._records:
-            debt = record.get_debt(shift_type)
-            if debt not in candidate_groups.keys():
-                candidate_groups[debt] = [record.person]
-            else:
-                candidate_groups[debt].append(record.person)
+        return list(self.iter_shift_candidates(shift_type))
 
-        for debt in reversed(sorted(candidate_groups.keys())):
-            candidate_group = candidate_groups[debt]
-            random.shuffle(candidate_group)
-            candidates.extend(candidate_group)
-
-        return candidates
+    def _get_rows(self, people: list[Person]) -> list[int]:
+        new_records = dict()
+        for person in people:
+            if person.id not in self._records and person.id not in new_records:
+                new_records[person.id] = JusticeRecord.get_default(person)
+        self._add_records(list(new_records.values()))
+        return [self._rows[person.id] for person in people]
 
     def add_debts(self, workdays: int, weekend_days: int, holidays: int, people: list[Person]) -> None:
-        workdays_availability = sum(person.workdays_shifts_weight for person in people)
-        weekend_days_availability = sum(person.weekend_days_shifts_weight for person in people)
-        holidays_availability = sum(person.holidays_shifts_weight for person in people)
+        """
+        Splits the days of every shift type between the people, by their weights.
+        """
+        if not people:
+            return
+
+        rows = self._get_rows(people)
+        totals_by_type = {ShiftType.WORKDAY: workdays, ShiftType.WEEKEND: weekend_days, ShiftType.HOLIDAY: holidays}
+        previous_debts, debts = self._debt_matrix.distribute(
+            rows, [totals_by_type[shift_type] for shift_type in ShiftType], people)
+
+        # The records and the candidates queues are updated once for every person (even if the person appears more
+        # than once), after all the debts were changed
+        updates = dict()
+        for person, row, person_previous_debts, person_debts in zip(people, rows, previous_debts, debts):
+            updates.setdefault(row, (self._records[person.id], person_previous_debts, person_debts))
+
+        for record, person_previous_debts, person_debts in updates.values():
+            record.sync_debts(person_debts)
+            for shift_type, previous_debt, debt in zip(ShiftType, person_previous_debts, person_debts):
+                self._candidates_queues[shift_type].update(record.person, previous_debt, debt)
+
+    def get_debts(self, people: list[Person]) -> np.ndarray:
+        """
+        :return: Copy of the debts of the people, a row for every person and a column for every shift type (by the order
+        of the ShiftType enum).
+        """
+        return self._debt_matrix.debts[self._get_rows(people)]
 
-        for person in people:
-            record = self.get_person_record(person)
-            record.workdays_debt += (workdays / workdays_availability) * person.workdays_shifts_weight
-            record.weekend_days_debt += (weekend_days / weekend_days_availability) * person.weekend_days_shifts_weight
-            record.holidays_debt += (holidays / holidays_availability) * person.holidays_shifts_weight
+    def get_fairness_metrics(self, people: Optional[list[Person]] = None) -> dict[ShiftType, FairnessMetrics]:
+        """
+        :return: Spread of the debts of the people (defaults to all the people of the table) by shift type.
+        """
+        return self._debt_matrix.get_fairness_metrics(self._get_rows(people) if people is not None else None)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import sys
+from typing import Optional, Union
+
+from .models import Person, Shift, ShiftType
+from .models.person_registry import PERSON_REGISTRY
+from .shift_table import ShiftTable, NO_PERSON, SHIFT_TYPES
+
+
+class LastShiftIndex:
+    """
+    Keeps the position of the last shift of every person, overall and per shift type.
+    Shifts must be added in chronological order, a person counts as assigned to a shift both as the main and as the
+    backup person.
+    """
+    _total_shifts: int
+    _total_shifts_by_type: dict[ShiftType, int]
+    _last_shift: dict[Person, int]
+    _last_shift_by_type: dict[ShiftType, dict[Person, int]]
+
+    def __init__(self, shifts: Optional[Union[list[Shift], ShiftTable]] = None):
+        self._total_shifts = 0
+        self._total_shifts_by_type = {shift_type: 0 for shift_type in ShiftType}
+        self._last_shift = dict()
+        self._last_shift_by_type = {shift_type: dict() for shift_type in ShiftType}
+
+        if isinstance(shifts, ShiftTable):
+            self.add_shift_table(shifts)
+        else:
+            for shift in shifts or list():
+                self.add_shift(shift)
+
+    def copy(self) -> LastShiftIndex:
+        index = LastShiftIndex()
+        index._total_shifts = self._total_shifts
+        index._total_shifts_by_type = self._total_shifts_by_type.copy()
+        index._last_shift = self._last_shift.copy()
+        index._last_shift_by_type = {shift_type: last_shift.copy()
+                                     for shift_type, last_shift in self._last_shift_by_type.items()}
+        return index
+
+    def _add(self, shift_type: ShiftType, people: tuple[Optional[Person], Optional[Person]]) -> None:
+        last_shift_of_type = self._last_shift_by_type[shift_type]
+
+        for person in people:
+            if person is not None:
+                self._last_shift[person] = self._total_shifts
+                last_shift_of_type[person] = self._total_shifts_by_type[shift_type]
+
+        self._total_shifts += 1
+        self._total_shifts_by_type[shift_type] += 1
+
+    def add_shift(self, shift: Shift) -> None:
+        self._add(shift.type, (shift.person, shift.backup_person))
+
+    def add_shift_table(self, table: ShiftTable) -> None:
+        """
+        Adds the shifts of the table without building their models.
+        """
+        def get_person(person_id: int) -> Optional[Person]:
+            return PERSON_REGISTRY.get_person(person_id) if person_id != NO_PERSON else None
+
+        for type_code, person_id, backup_person_id in zip(table.types, table.person_ids, table.backup_person_ids):
+            self._add(SHIFT_TYPES[type_code], (get_person(person_id), get_person(backup_person_id)))
+
+    def to_dict(self) -> dict:
+        """
+        :return: The index as a dict that can be written as JSON (by pydantic_encoder).
+        """
+        return {
+            'total_shifts': self._total_shifts,
+            'total_shifts_by_type': {shift_type.value: total
+                                     for shift_type, total in self._total_shifts_by_type.items()},
+            'people': [{
+                'person': person,
+                'last_shift': last_shift,
+                'last_shift_by_type': {shift_type.value: last_shift_of_type[person]
+                                       for shift_type, last_shift_of_type in self._last_shift_by_type.items()
+                                       if person in last_shift_of_type},
+            } for person, last_shift in self._last_shift.items()],
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> LastShiftIndex:
+        """
+        Reads a dict that was returned by to_dict (and went through JSON).
+        """
+        index = LastShiftIndex()
+        index._total_shifts = data['total_shifts']
+        index._total_shifts_by_type = {ShiftType(shift_type): total
+                                       for shift_type, total in data['total_shifts_by_type'].items()}
+        for raw_person in data['people']:
+            person = Person.parse_obj(raw_person['person'])
+            index._last_shift[person] = raw_person['last_shift']
+            for shift_type, last_shift in raw_person['last_shift_by_type'].items():
+                index._last_shift_by_type[ShiftType(shift_type)][person] = last_shift
+        return index
+
+    @property
+    def total_shifts(self) -> int:
+        return self._total_shifts
+
+    def get_total_shifts_of_type(self, shift_type: ShiftType) -> int:
+        return self._total_shifts_by_type[shift_type]
+
+    def get_last_shift(self, person: Person, shift_type: Optional[ShiftType] = None) -> Optional[int]:
+        """
+        :return: Position of the last shift of the person (among the shifts of the given type, or of any type), or None
+        if the person has no such shifts.
+        """
+        last_shift = self._last_shift if shift_type is None else self._last_shift_by_type[shift_type]
+        return last_shift.get(person)
+
+    def set_last_shift(self, person: Person, last_shift: Optional[int], shift_type: Optional[ShiftType] = None) -> None:
+        """
+        Replaces the position of the last shift of the person (see get_last_shift), for shifts that were changed after
+        they were added.
+        """
+        last_shifts = self._last_shift if shift_type is None else self._last_shift_by_type[shift_type]
+        if last_shift is None:
+            last_shifts.pop(person, None)
+        else:
+            last_shifts[person] = last_shift
+
+    def get_space_from_last_shift(self, person: Person, shift_type: ShiftType, any_type: bool = False) -> int:
+        """
+        :return: The amount of shifts (of the given type, or of any type) that were added since the last shift of the
+        person, or sys.maxsize if the person has no shifts at all.
+        """
+        if any_type:
+            last_shift, total_shifts = self._last_shift.get(person), self._total_shifts
+        else:
+            last_shift, total_shifts = self._last_shift_by_type[shift_type].get(person), \
+                self._total_shifts_by_type[shift_type]
+
+        if last_shift is None:
+            return sys.maxsize
+
+        return total_shifts - last_shift - 1
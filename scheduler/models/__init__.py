@@ -2,3 +2,4 @@ from .person import Person
 from .shift import Shift, ShiftType
 from .justice_record import JusticeRecord
 from .date_range import DateRange
+from .recurring_constraint import RecurringConstraint
@@ -0,0 +1,66 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Iterator, Union
+
+from scheduler.models.date_range import DateRange
+from scheduler.models.recurring_constraint import RecurringConstraint
+
+Constraint = Union[RecurringConstraint, DateRange, date]
+
+
+class ConstraintsIndex:
+    """
+    Sorted and merged intervals of the constraints of a person (as date ordinals), queried with bisect.
+    Recurring constraints are kept as is and checked only against the dates of the queried range.
+    """
+    _starts: list[int]
+    _ends: list[int]
+    _recurring_constraints: list[RecurringConstraint]
+
+    def __init__(self, constraints: list[Constraint]):
+        self._starts = list()
+        self._ends = list()
+        self._recurring_constraints = list()
+
+        intervals = list()
+        for constraint in constraints:
+            if isinstance(constraint, RecurringConstraint):
+                self._recurring_constraints.append(constraint)
+            elif isinstance(constraint, date):
+                intervals.append((constraint.toordinal(), constraint.toordinal()))
+            else:
+                intervals.append((constraint.start.toordinal(), constraint.end.toordinal()))
+
+        for start, end in sorted(intervals):
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def overlaps_with(self, date_range: DateRange) -> bool:
+        # The last interval that starts before the end of the range is the only one that may overlap with it
+        index = bisect_right(self._starts, date_range.end.toordinal()) - 1
+        if index >= 0 and self._ends[index] >= date_range.start.toordinal():
+            return True
+
+        return any(constraint.overlaps_with(date_range) for constraint in self._recurring_constraints)
+
+    def iter_overlapping_positions(self, starts: list[int], ends: list[int]) -> Iterator[int]:
+        """
+        :param starts: Start date ordinals of sorted date ranges that do not overlap each other.
+        :param ends: End date ordinals of the ranges.
+        :return: Positions of the ranges that overlap with the constraints (a position may be returned more than once).
+        """
+        for start, end in zip(self._starts, self._ends):
+            # The ranges that overlap with an interval are the ones from the first range that ends in it or after it, to
+            # the last range that starts in it or before it
+            yield from range(bisect_left(ends, start), bisect_right(starts, end))
+
+        if self._recurring_constraints and starts:
+            # Only the dates of the recurring constraints within the ranges are visited, and found with bisect
+            for constraint in self._recurring_constraints:
+                for ordinal in constraint.iter_date_ordinals(starts[0], ends[-1]):
+                    position = bisect_left(ends, ordinal)
+                    if starts[position] <= ordinal:
+                        yield position
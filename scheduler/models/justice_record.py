@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from typing import Callable, Optional, TYPE_CHECKING
+
+from pydantic import BaseModel, PrivateAttr
 
 from scheduler.models import Person, ShiftType
 
+if TYPE_CHECKING:
+    from scheduler.debt_matrix import DebtMatrix
+
 SHIFT_TYPE_TO_FIELD_MAPPING = {
     ShiftType.WEEKEND: 'weekend_days_debt',
     ShiftType.WORKDAY: 'workdays_debt',
     ShiftType.HOLIDAY: 'holidays_debt'
 }
+FIELD_TO_SHIFT_TYPE_MAPPING = {field: shift_type for shift_type, field in SHIFT_TYPE_TO_FIELD_MAPPING.items()}
 
 
 class JusticeRecord(BaseModel):
@@ -19,6 +25,14 @@ class JusticeRecord(BaseModel):
     weekend_days_debt: float
     holidays_debt: float
 
+    # Called with the record, the shift type and the previous debt whenever a debt is changed (by add_debt, set_debt or
+    # by assigning a debt field)
+    _debt_listener: Optional[Callable[[JusticeRecord, ShiftType, float], None]] = PrivateAttr(default=None)
+    # The row of the record in the debt matrix of its justice table. The matrix holds the same debts as the fields, and
+    # every change of a debt is written to both
+    _debt_matrix: Optional[DebtMatrix] = PrivateAttr(default=None)
+    _row: int = PrivateAttr(default=-1)
+
     @staticmethod
     def get_default(person: Person) -> JusticeRecord:
         return JusticeRecord(
@@ -29,10 +43,58 @@ class JusticeRecord(BaseModel):
         )
 
     def get_debt(self, shift_type: ShiftType) -> float:
-        return self.dict()[SHIFT_TYPE_TO_FIELD_MAPPING[shift_type]]
+        return getattr(self, SHIFT_TYPE_TO_FIELD_MAPPING[shift_type])
+
+    def bind_to_debt_matrix(self, debt_matrix: Optional[DebtMatrix], row: int = -1) -> None:
+        """
+        The row of the debt matrix must hold the debts of the record.
+        """
+        self._debt_matrix = debt_matrix
+        self._row = row
+
+    def sync_debts(self, debts: list[float]) -> None:
+        """
+        Sets the debts (by the order of ShiftType) after the row of the record in the debt matrix was changed, without
+        calling the listener.
+        """
+        for shift_type, debt in zip(ShiftType, debts):
+            super().__setattr__(SHIFT_TYPE_TO_FIELD_MAPPING[shift_type], debt)
+
+    def __getstate__(self):
+        # The listener and the debt matrix belong to the justice table that holds the record, and are set again by it
+        state = super().__getstate__()
+        state['__private_attribute_values__'] = {**state['__private_attribute_values__'], '_debt_listener': None,
+                                                 '_debt_matrix': None, '_row': -1}
+        return state
+
+    def _copy_and_set_values(self, values, fields_set, *, deep: bool) -> JusticeRecord:
+        # Copies do not belong to the justice table of the record
+        record = super()._copy_and_set_values(values, fields_set, deep=deep)
+        record.bind_to_debt_matrix(None)
+        record.set_debt_listener(None)
+        return record
+
+    def __setattr__(self, name, value) -> None:
+        shift_type = FIELD_TO_SHIFT_TYPE_MAPPING.get(name)
+        if shift_type is None:
+            super().__setattr__(name, value)
+        else:
+            self.set_debt(shift_type, value)
+
+    def set_debt_listener(self, debt_listener: Optional[Callable[[JusticeRecord, ShiftType, float], None]]) -> None:
+        self._debt_listener = debt_listener
 
     def add_debt(self, shift_type: ShiftType, value: float) -> None:
-        setattr(self, SHIFT_TYPE_TO_FIELD_MAPPING[shift_type], self.get_debt(shift_type) + value)
+        self.set_debt(shift_type, self.get_debt(shift_type) + value)
+
+    def set_debt(self, shift_type: ShiftType, value: float) -> None:
+        previous_debt = self.get_debt(shift_type)
+        if self._debt_matrix is not None:
+            self._debt_matrix.set_debt(self._row, shift_type, value)
+        super().__setattr__(SHIFT_TYPE_TO_FIELD_MAPPING[shift_type], value)
+
+        if self._debt_listener:
+            self._debt_listener(self, shift_type, previous_debt)
 
     def substract_debt(self, shift_type: ShiftType, value: float) -> None:
         self.add_debt(shift_type, -value)
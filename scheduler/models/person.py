@@ -1,12 +1,18 @@
 from datetime import date
-from typing import Union
+from typing import Iterator, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
+from scheduler.models.constraints_index import ConstraintsIndex
 from scheduler.models.date_range import DateRange
+from scheduler.models.person_registry import PERSON_REGISTRY
+from scheduler.models.recurring_constraint import RecurringConstraint
 
 
 class Person(BaseModel):
+    # The registry keeps weak references to the people
+    __slots__ = ('__weakref__',)
+
     full_name: str
     email_address: str
     workdays_shifts_weight: float
@@ -14,10 +20,79 @@ class Person(BaseModel):
     holidays_shifts_weight: float
 
     # days in which the person cannot do the shift
-    constraints: list[Union[DateRange, date]] = Field(default_factory=list)
+    constraints: list[Union[RecurringConstraint, DateRange, date]] = Field(default_factory=list)
+
+    # Built on the first lookup, and dropped when the constraints are assigned or the person is copied with new ones
+    _constraints_index: Optional[ConstraintsIndex] = PrivateAttr(default=None)
+    _hash: int = PrivateAttr()
+    _id: int = PrivateAttr()
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._intern()
+
+    def _intern(self) -> None:
+        self._hash = hash(f'{self.full_name}.{self.email_address}')
+        self._id = PERSON_REGISTRY.get_id(self)
+
+    @classmethod
+    def construct(cls, _fields_set=None, **values) -> 'Person':
+        person = super().construct(_fields_set, **values)
+        person._intern()
+        return person
+
+    def __setstate__(self, state) -> None:
+        # Ids and string hashes are only stable within a process, so unpickled people are hashed and interned again
+        super().__setstate__(state)
+        self._intern()
+
+    def __setattr__(self, name, value) -> None:
+        super().__setattr__(name, value)
+        if name == 'constraints':
+            self._constraints_index = None
+
+    def _copy_and_set_values(self, values, fields_set, *, deep: bool) -> 'Person':
+        # Copies are interned as well, and may have a new identity
+        person = super()._copy_and_set_values(values, fields_set, deep=deep)
+        person._intern()
+        if person.constraints is not self.constraints:
+            person._constraints_index = None
+        return person
+
+    @property
+    def identity(self) -> tuple[str, str]:
+        return self.full_name, self.email_address
+
+    @property
+    def id(self) -> int:
+        """
+        Stable id of the person in the current process, see PersonRegistry.
+        """
+        return self._id
+
+    def _get_constraints_index(self) -> ConstraintsIndex:
+        if self._constraints_index is None:
+            self._constraints_index = ConstraintsIndex(self.constraints)
+        return self._constraints_index
+
+    def update_constraints_index(self) -> None:
+        """
+        Should be called after the constraints list is changed in place, assigning new constraints updates the index.
+        """
+        self._constraints_index = ConstraintsIndex(self.constraints)
+
+    def has_constraint_on(self, date_range: DateRange) -> bool:
+        return self._get_constraints_index().overlaps_with(date_range)
+
+    def iter_constrained_positions(self, starts: list[int], ends: list[int]) -> Iterator[int]:
+        """
+        :return: Positions of the date ranges (sorted, given as start and end date ordinals) that the person has
+        constraints on, see ConstraintsIndex.iter_overlapping_positions.
+        """
+        return self._get_constraints_index().iter_overlapping_positions(starts, ends)
 
     def __hash__(self) -> int:
-        return hash(f'{self.full_name}.{self.email_address}')
+        return self._hash
 
     def __eq__(self, other) -> bool:
         return hash(self) == hash(other)
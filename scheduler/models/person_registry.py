@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import heapq
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from scheduler.models.person import Person
+
+
+class _Reference(weakref.ref):
+    __slots__ = ('person_id', 'key', 'references')
+
+    person_id: int
+    # The id of the person, which is the key of the reference in the references of its person id
+    key: int
+    references: dict[int, _Reference]
+
+
+class PersonRegistry:
+    """
+    Interns people to small integer ids, two people with the same full name and email address get the same id.
+    Only weak references to the people are kept: once no person with an id is alive, the id is given to the next new
+    identity, so long running processes do not keep old people and the ids (and the bitmaps built from them) stay small.
+    Objects that store ids instead of people (like ShiftTable) should keep the people alive.
+    """
+    _ids: dict[tuple[str, str], int]
+    # The live people of every id by their object ids (None for free ids), the current one is the last. Copies of a
+    # person share its id, so the references are kept in a dict to add, remove and reorder them in constant time
+    _references: list[Optional[dict[int, _Reference]]]
+    _identities: list[Optional[tuple[str, str]]]
+    _free_ids: list[int]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets all the people, the people that were interned before must not be used together with new ones.
+        """
+        self._ids = dict()
+        self._references = list()
+        self._identities = list()
+        self._free_ids = list()
+
+    def get_id(self, person: Person) -> int:
+        """
+        Interns the person, which becomes the current person of its id.
+        """
+        person_id = self._ids.get(person.identity)
+        if person_id is None:
+            if self._free_ids:
+                person_id = heapq.heappop(self._free_ids)
+                self._references[person_id] = dict()
+                self._identities[person_id] = person.identity
+            else:
+                person_id = len(self._references)
+                self._references.append(dict())
+                self._identities.append(person.identity)
+            self._ids[person.identity] = person_id
+
+        references = self._references[person_id]
+        reference = references.pop(id(person), None)
+        if reference is None:
+            reference = _Reference(person, self._release)
+            reference.person_id, reference.key, reference.references = person_id, id(person), references
+        references[reference.key] = reference
+        return person_id
+
+    def _release(self, reference: _Reference) -> None:
+        person_id, references = reference.person_id, reference.references
+        if references.get(reference.key) is reference:
+            del references[reference.key]
+        # The references of a reset registry are not in it anymore
+        if references or person_id >= len(self._references) or self._references[person_id] is not references:
+            return
+
+        del self._ids[self._identities[person_id]]
+        self._references[person_id] = None
+        self._identities[person_id] = None
+        heapq.heappush(self._free_ids, person_id)
+
+    def make_current(self, person: Person) -> None:
+        """
+        Makes the (already interned) person the current person of its id, for example the people of the people file
+        over older copies of them that were read from the history.
+        """
+        references = self._references[person.id]
+        references[id(person)] = references.pop(id(person))
+
+    def get_person(self, person_id: int) -> Person:
+        """
+        :return: The current person of the given id: the person that was made current or interned last, out of the
+        people with this id that are still alive.
+        """
+        return next(reversed(self._references[person_id].values()))()
+
+
+PERSON_REGISTRY = PersonRegistry()
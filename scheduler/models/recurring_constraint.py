@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+from pydantic import BaseModel, conint
+
+from scheduler.models.date_range import DateRange
+
+# The monday of the first week, used to count weeks when the constraint has no start date
+_FIRST_MONDAY = date.min
+
+
+class RecurringConstraint(BaseModel):
+    """
+    Weekdays in which the person cannot do the shift, for example every tuesday, or every other weekend between two
+    dates. The constraint is never expanded to a list of dates, only the dates of a checked range are tested.
+    """
+    # Same numbering as date.weekday() - monday is 0 and sunday is 6
+    weekdays: list[conint(ge=0, le=6)]
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+    # Weeks are counted from the week of the start date, for example 2 means every other week
+    every_n_weeks: conint(ge=1) = 1
+
+    def contains_date(self, _date: date) -> bool:
+        if self.start and _date < self.start or self.end and _date > self.end:
+            return False
+
+        if _date.weekday() not in self.weekdays:
+            return False
+
+        first_date = self.start or _FIRST_MONDAY
+        first_monday = first_date - timedelta(days=first_date.weekday())
+        return ((_date - first_monday).days // 7) % self.every_n_weeks == 0
+
+    def iter_date_ordinals(self, start: int, end: int) -> Iterator[int]:
+        """
+        :return: Ordinals of the dates between the given date ordinals (including both) that the constraint contains,
+        week by week for every weekday (so not in order).
+        """
+        start = max(start, self.start.toordinal()) if self.start else start
+        end = min(end, self.end.toordinal()) if self.end else end
+        first_date = self.start or _FIRST_MONDAY
+        first_monday = first_date.toordinal() - first_date.weekday()
+        for weekday in set(self.weekdays):
+            # The weekday of an ordinal is (ordinal - 1) % 7
+            first_ordinal = start + (weekday - (start - 1) % 7) % 7
+            # Skipped to the first week that the constraint repeats in, see contains_date
+            first_ordinal += 7 * (-((first_ordinal - first_monday) // 7) % self.every_n_weeks)
+            yield from range(first_ordinal, end + 1, 7 * self.every_n_weeks)
+
+    def overlaps_with(self, date_range: DateRange) -> bool:
+        current_date = date_range.start
+
+        while current_date <= date_range.end:
+            if self.contains_date(current_date):
+                return True
+            current_date += timedelta(days=1)
+
+        return False
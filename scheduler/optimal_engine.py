@@ -0,0 +1,324 @@
+import math
+import random
+import time
+from bisect import bisect_left
+from logging import getLogger
+from typing import Optional
+
+from .availability import AvailabilityBitmap
+from .justice_table import JusticeTable
+from .models import Person, Shift, ShiftType
+from .spacing import SPACE_BETWEEN_SHIFT_TYPES_MAPPING, MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES
+
+# The default time budget grows with the size of the search space (the roles of the shifts times the people), within
+# these bounds (in seconds)
+TIME_BUDGET_PER_ROLE_AND_PERSON = 0.0002
+MIN_TIME_BUDGET = 0.5
+MAX_TIME_BUDGET = 10.0
+
+# Cost of a single broken constraint or spacing rule, much higher than any fairness difference
+VIOLATION_COST = 1000.0
+# Weight of spreading the backup shifts evenly, compared to paying the debts
+BACKUP_FAIRNESS_WEIGHT = 0.1
+
+INITIAL_TEMPERATURE = 2.0
+FINAL_TEMPERATURE = 0.01
+ITERATIONS_BETWEEN_TIME_CHECKS = 256
+# The search stops before the time budget is over once the best assignment keeps all the rules, and was not improved
+# for this many iterations
+ITERATIONS_WITHOUT_IMPROVEMENT = 64 * ITERATIONS_BETWEEN_TIME_CHECKS
+
+MAIN = 0
+BACKUP = 1
+
+_logger = getLogger(__name__)
+
+
+def get_default_time_budget(shifts: int, people: int) -> float:
+    """
+    :return: The time budget (in seconds) for the given amounts of shifts and people.
+    """
+    return min(max(2 * shifts * people * TIME_BUDGET_PER_ROLE_AND_PERSON, MIN_TIME_BUDGET), MAX_TIME_BUDGET)
+
+
+class OptimalEngine:
+    """
+    Schedules the whole period at once, as an assignment of people to the (main and backup) roles of all the shifts.
+    Constraints and spacing rules are hard constraints, and the objective is to pay the debts of the justice table as
+    evenly as possible (sum of the squares of the remaining debts).
+    Starts from a greedy assignment and improves it with simulated annealing until the time budget is over, or until
+    the best assignment keeps all the rules and stops improving. The best assignment that was found is applied to the
+    shifts and the justice table.
+    """
+    _shifts: list[Shift]
+    _people: list[Person]
+    _justice_table: JusticeTable
+    _time_budget: float
+    _availability: AvailabilityBitmap
+
+    # Index of every shift in the whole timeline (previous shifts first), and among the shifts of its type
+    _positions: list[int]
+    _type_positions: list[int]
+
+    # Sorted positions of the shifts of every person, in the whole timeline and among the shifts of every type
+    _person_positions: list[list[int]]
+    _person_type_positions: list[dict[ShiftType, list[int]]]
+
+    _remaining_debts: list[dict[ShiftType, float]]
+    _backup_counts: list[int]
+
+    # People indexes of the roles of every shift, or None when the role is not assigned
+    _assignments: list[list[Optional[int]]]
+    _cost: float
+    _violations: int
+
+    def __init__(self, shifts: list[Shift], previous_shifts: list[Shift], people: list[Person],
+                 justice_table: JusticeTable, time_budget: Optional[float] = None):
+        """
+        :param time_budget: Defaults to a budget that grows with the shifts and the people, see get_default_time_budget.
+        """
+        self._shifts = shifts
+        self._people = people
+        self._justice_table = justice_table
+        self._time_budget = time_budget if time_budget is not None else get_default_time_budget(len(shifts),
+                                                                                                len(people))
+        self._availability = AvailabilityBitmap(shifts, people)
+
+        people_indexes = {person.id: index for index, person in enumerate(people)}
+        self._person_positions = [list() for _ in people]
+        self._person_type_positions = [{shift_type: list() for shift_type in ShiftType} for _ in people]
+        self._remaining_debts = [{shift_type: justice_table.get_person_record(person).get_debt(shift_type)
+                                  for shift_type in ShiftType} for person in people]
+        self._backup_counts = [0] * len(people)
+
+        total_shifts_by_type = {shift_type: 0 for shift_type in ShiftType}
+        for position, shift in enumerate(previous_shifts):
+            for person in (shift.person, shift.backup_person):
+                if person is not None and person.id in people_indexes:
+                    person_index = people_indexes[person.id]
+                    self._person_positions[person_index].append(position)
+                    self._person_type_positions[person_index][shift.type].append(total_shifts_by_type[shift.type])
+            total_shifts_by_type[shift.type] += 1
+
+        self._positions = list()
+        self._type_positions = list()
+        for position, shift in enumerate(shifts, start=len(previous_shifts)):
+            self._positions.append(position)
+            self._type_positions.append(total_shifts_by_type[shift.type])
+            total_shifts_by_type[shift.type] += 1
+
+        self._assignments = [[None, None] for _ in shifts]
+        self._cost = 0.0
+        self._violations = 0
+
+    @staticmethod
+    def _get_spacing_violations(positions: list[int], index: int, min_space: int) -> int:
+        """
+        :return: How many of the spacing rules around the position at the given index are broken.
+        """
+        violations = 0
+        if index > 0 and positions[index] - positions[index - 1] - 1 < min_space:
+            violations += 1
+        if index < len(positions) - 1 and positions[index + 1] - positions[index] - 1 < min_space:
+            violations += 1
+        return violations
+
+    @classmethod
+    def _insert_position(cls, positions: list[int], position: int, min_space: int) -> int:
+        """
+        :return: The change in the amount of broken spacing rules.
+        """
+        index = bisect_left(positions, position)
+        violations = -cls._get_spacing_violations_between(positions, index - 1, index, min_space)
+        positions.insert(index, position)
+        return violations + cls._get_spacing_violations(positions, index, min_space)
+
+    @classmethod
+    def _remove_position(cls, positions: list[int], position: int, min_space: int) -> int:
+        """
+        :return: The change in the amount of broken spacing rules.
+        """
+        index = bisect_left(positions, position)
+        violations = -cls._get_spacing_violations(positions, index, min_space)
+        del positions[index]
+        return violations + cls._get_spacing_violations_between(positions, index - 1, index, min_space)
+
+    @staticmethod
+    def _get_spacing_violations_between(positions: list[int], first_index: int, second_index: int,
+                                        min_space: int) -> int:
+        if first_index < 0 or second_index >= len(positions):
+            return 0
+        return int(positions[second_index] - positions[first_index] - 1 < min_space)
+
+    def _get_fairness_cost(self, person_index: int, shift_index: int, role: int, added: bool) -> float:
+        """
+        :return: The change in the fairness part of the cost, when the person is added to (or removed from) the role.
+        """
+        shift = self._shifts[shift_index]
+        sign = 1 if added else -1
+
+        if role == MAIN:
+            remaining_debt = self._remaining_debts[person_index][shift.type]
+            new_remaining_debt = remaining_debt - sign * shift.dates.total_days
+            self._remaining_debts[person_index][shift.type] = new_remaining_debt
+            return new_remaining_debt ** 2 - remaining_debt ** 2
+
+        backup_count = self._backup_counts[person_index]
+        self._backup_counts[person_index] = backup_count + sign
+        return BACKUP_FAIRNESS_WEIGHT * ((backup_count + sign) ** 2 - backup_count ** 2)
+
+    def _assign(self, shift_index: int, role: int, person_index: int) -> float:
+        """
+        :return: The change in the cost.
+        """
+        shift = self._shifts[shift_index]
+        self._assignments[shift_index][role] = person_index
+
+        violations = self._insert_position(self._person_positions[person_index], self._positions[shift_index],
+                                           MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES)
+        violations += self._insert_position(self._person_type_positions[person_index][shift.type],
+                                            self._type_positions[shift_index],
+                                            SPACE_BETWEEN_SHIFT_TYPES_MAPPING[shift.type])
+        violations += int(not self._availability.is_available(shift_index, self._people[person_index]))
+
+        cost = VIOLATION_COST * violations + self._get_fairness_cost(person_index, shift_index, role, added=True)
+        self._violations += violations
+        self._cost += cost
+        return cost
+
+    def _unassign(self, shift_index: int, role: int) -> float:
+        """
+        :return: The change in the cost.
+        """
+        shift = self._shifts[shift_index]
+        person_index = self._assignments[shift_index][role]
+        self._assignments[shift_index][role] = None
+
+        violations = self._remove_position(self._person_positions[person_index], self._positions[shift_index],
+                                           MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES)
+        violations += self._remove_position(self._person_type_positions[person_index][shift.type],
+                                            self._type_positions[shift_index],
+                                            SPACE_BETWEEN_SHIFT_TYPES_MAPPING[shift.type])
+        violations -= int(not self._availability.is_available(shift_index, self._people[person_index]))
+
+        cost = VIOLATION_COST * violations + self._get_fairness_cost(person_index, shift_index, role, added=False)
+        self._violations += violations
+        self._cost += cost
+        return cost
+
+    def _reassign(self, changes: list[tuple[int, int, int]]) -> float:
+        """
+        Replaces the person of every (shift index, role) with the given person index.
+        :return: The change in the cost.
+        """
+        cost = 0.0
+        for shift_index, role, _ in changes:
+            cost += self._unassign(shift_index, role)
+        for shift_index, role, person_index in changes:
+            cost += self._assign(shift_index, role, person_index)
+        return cost
+
+    def _build_initial_assignment(self) -> None:
+        """
+        Greedy assignment in chronological order, to the people with the highest remaining debt that do not break any
+        rule. When there are not enough such people, the rules are broken and left to the local search.
+        """
+        for shift_index, shift in enumerate(self._shifts):
+            candidates = sorted(range(len(self._people)),
+                                key=lambda index: (-self._remaining_debts[index][shift.type], random.random()))
+
+            for role in (MAIN, BACKUP):
+                best_person_index, best_violations = None, math.inf
+                for person_index in candidates:
+                    if person_index == self._assignments[shift_index][MAIN]:
+                        continue
+
+                    violations = self._violations
+                    self._assign(shift_index, role, person_index)
+                    violations = self._violations - violations
+                    self._unassign(shift_index, role)
+
+                    if violations < best_violations:
+                        best_person_index, best_violations = person_index, violations
+                        if not violations:
+                            break
+
+                self._assign(shift_index, role, best_person_index)
+
+    def _get_random_move(self) -> Optional[list[tuple[int, int, int]]]:
+        shift_index = random.randrange(len(self._shifts))
+        main_person_index, backup_person_index = self._assignments[shift_index]
+        move_type = random.randrange(4)
+
+        if move_type == 0:
+            return [(shift_index, MAIN, backup_person_index), (shift_index, BACKUP, main_person_index)]
+
+        if move_type == 1:
+            other_shift_index = random.randrange(len(self._shifts))
+            other_main_person_index, other_backup_person_index = self._assignments[other_shift_index]
+            if self._shifts[shift_index].type != self._shifts[other_shift_index].type or \
+                    main_person_index in (other_main_person_index, other_backup_person_index) or \
+                    other_main_person_index == backup_person_index:
+                return None
+            return [(shift_index, MAIN, other_main_person_index), (other_shift_index, MAIN, main_person_index)]
+
+        person_index = random.randrange(len(self._people))
+        if person_index in (main_person_index, backup_person_index):
+            return None
+        return [(shift_index, MAIN if move_type == 2 else BACKUP, person_index)]
+
+    def _improve(self) -> list[list[Optional[int]]]:
+        """
+        Simulated annealing over the moves of _get_random_move.
+        :return: The best assignments that were found.
+        """
+        best_assignments = [list(roles) for roles in self._assignments]
+        best_cost, best_violations = self._cost, self._violations
+        last_improvement = 0
+        start_time = time.perf_counter()
+        temperature = INITIAL_TEMPERATURE
+        iteration = 0
+
+        while True:
+            iteration += 1
+            if iteration % ITERATIONS_BETWEEN_TIME_CHECKS == 0:
+                elapsed_fraction = (time.perf_counter() - start_time) / self._time_budget
+                if elapsed_fraction >= 1 or \
+                        best_violations == 0 and iteration - last_improvement >= ITERATIONS_WITHOUT_IMPROVEMENT:
+                    break
+                temperature = INITIAL_TEMPERATURE * (FINAL_TEMPERATURE / INITIAL_TEMPERATURE) ** elapsed_fraction
+
+            move = self._get_random_move()
+            if move is None:
+                continue
+
+            previous_people = [(shift_index, role, self._assignments[shift_index][role]) for shift_index, role, _ in move]
+            cost = self._reassign(move)
+
+            if cost <= 0 or random.random() < math.exp(-cost / temperature):
+                if self._cost < best_cost - 1e-9:
+                    best_cost, best_violations = self._cost, self._violations
+                    last_improvement = iteration
+                    best_assignments = [list(roles) for roles in self._assignments]
+            else:
+                self._reassign(previous_people)
+
+        return best_assignments
+
+    def solve(self) -> None:
+        if len(self._people) < 2:
+            raise ValueError('At least two people are needed to schedule shifts')
+
+        self._build_initial_assignment()
+        best_assignments = self._improve() if self._shifts else self._assignments
+
+        self._reassign([(shift_index, role, best_assignments[shift_index][role])
+                        for shift_index in range(len(self._shifts)) for role in (MAIN, BACKUP)])
+
+        if self._violations:
+            _logger.warning(f'Could not find a schedule that keeps all the rules, {self._violations} rules are broken')
+
+        for shift, (main_person_index, backup_person_index) in zip(self._shifts, self._assignments):
+            shift.person = self._people[main_person_index]
+            shift.backup_person = self._people[backup_person_index]
+            self._justice_table.get_person_record(shift.person).substract_debt(shift.type, shift.dates.total_days)
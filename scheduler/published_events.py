@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from pathlib import Path
+from typing import Optional, Union
+
+from .atomic_write import write_text_atomically
+from .google_api_client import Appointment, AppointmentAction, AppointmentResult
+from .models import Shift
+
+MAIN_ROLE = 'person'
+BACKUP_ROLE = 'backup_person'
+BACKUP_TITLE_SUFFIX = ' - REZERVA'
+
+
+def get_shift_appointments(shift: Shift) -> dict[str, Appointment]:
+    """
+    :return: The appointments of the main and the backup person of the shift, by their keys. Shifts never overlap, so
+    a shift is identified by its start date, and keeps its key when its people or end date change.
+    """
+    start = shift.dates.start.isoformat()
+    return {
+        f'{start}/{MAIN_ROLE}': Appointment(
+            title=shift.title,
+            start_date=shift.dates.start,
+            end_date=shift.dates.end,
+            target_email=shift.person.email_address
+        ),
+        f'{start}/{BACKUP_ROLE}': Appointment(
+            title=f'{shift.title}{BACKUP_TITLE_SUFFIX}',
+            start_date=shift.dates.start,
+            end_date=shift.dates.end,
+            target_email=shift.backup_person.email_address
+        ),
+    }
+
+
+class PublishedEvents:
+    """
+    The appointments that were already sent to the calendar, with their event ids, by the keys of
+    get_shift_appointments.
+    """
+    _events: dict[str, tuple[str, Appointment]]
+
+    def __init__(self, events: Optional[dict[str, tuple[str, Appointment]]] = None):
+        self._events = events or dict()
+
+    @staticmethod
+    def from_file(file_path: Union[str, Path]) -> PublishedEvents:
+        file_path = Path(file_path)
+        if not file_path.is_file():
+            return PublishedEvents()
+
+        events = dict()
+        for key, event in json.loads(file_path.read_text()).items():
+            events[key] = (event['event_id'], Appointment(
+                title=event['title'],
+                start_date=date.fromisoformat(event['start_date']),
+                end_date=date.fromisoformat(event['end_date']),
+                target_email=event['target_email']
+            ))
+        return PublishedEvents(events)
+
+    def save_to_file(self, file_path: Union[str, Path]) -> None:
+        events = {key: {
+            'event_id': event_id,
+            'title': appointment.title,
+            'start_date': appointment.start_date.isoformat(),
+            'end_date': appointment.end_date.isoformat(),
+            'target_email': appointment.target_email
+        } for key, (event_id, appointment) in self._events.items()}
+
+        write_text_atomically(file_path, json.dumps(events))
+
+    def get_actions(self, shifts: list[Shift]) -> list[tuple[str, AppointmentResult]]:
+        """
+        :return: The actions (by the keys of their appointments) that make the calendar match the shifts. Published
+        appointments that start within the dates of the shifts and do not belong to any of them are deleted.
+        """
+        appointments = dict()
+        for shift in shifts:
+            appointments.update(get_shift_appointments(shift))
+
+        actions = list()
+        for key, appointment in appointments.items():
+            if key not in self._events:
+                actions.append((key, AppointmentResult(appointment)))
+            else:
+                event_id, published_appointment = self._events[key]
+                if appointment != published_appointment:
+                    actions.append((key, AppointmentResult(appointment, AppointmentAction.PATCH, event_id)))
+
+        if shifts:
+            start_date, end_date = shifts[0].dates.start, shifts[-1].dates.end
+            for key, (event_id, published_appointment) in self._events.items():
+                if key not in appointments and start_date <= published_appointment.start_date <= end_date:
+                    actions.append((key, AppointmentResult(published_appointment, AppointmentAction.DELETE, event_id)))
+
+        return actions
+
+    def apply(self, actions: list[tuple[str, AppointmentResult]]) -> None:
+        """
+        Updates the published appointments with the actions that succeeded.
+        """
+        for key, result in actions:
+            if not result.succeeded:
+                continue
+
+            if result.action == AppointmentAction.DELETE:
+                self._events.pop(key, None)
+            else:
+                self._events[key] = (result.event_id, result.appointment)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Iterator, Optional, Union
+
+from .justice_table import JusticeTable
+from .models import Person, Shift
+from .schedule import Schedule
+from .schedule_repair import ScheduleRepair
+from .shift_history import ShiftHistory
+from .shift_table import ShiftTable
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+# The attributes of the roles of a shift, the debts are charged only to the main person
+MAIN_ROLE = 'person'
+BACKUP_ROLE = 'backup_person'
+ROLES = (MAIN_ROLE, BACKUP_ROLE)
+
+_logger = getLogger(__name__)
+
+
+@dataclass
+class ShiftChange:
+    # Position of the shift in the schedule
+    position: int
+    role: str
+    previous_person: Person
+    # None only while the role is being reassigned
+    person: Optional[Person]
+
+
+def _get_previous_shifts(previous_schedule: Optional[Union[Schedule, ShiftTable, ShiftHistory]]) -> list[Shift]:
+    """
+    :return: The tail of the previous shifts that the spacing rules look at.
+    """
+    if isinstance(previous_schedule, ShiftHistory):
+        previous_shifts = previous_schedule.recent_shifts
+    elif isinstance(previous_schedule, Schedule):
+        previous_shifts = previous_schedule.shift_table
+    else:
+        previous_shifts = previous_schedule or ShiftTable()
+
+    tail_start = previous_shifts.get_tail_start(MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING)
+    return list(previous_shifts.iter_shifts(tail_start))
+
+
+class _Rescheduler:
+    _shifts: list[Shift]
+    _justice_table: JusticeTable
+    _changed_people: dict[int, Person]
+    _repair: ScheduleRepair
+    _first_position: int
+
+    def __init__(self, schedule: Schedule, justice_table: JusticeTable, changed_people: list[Person],
+                 previous_schedule: Optional[Union[Schedule, ShiftTable, ShiftHistory]]):
+        previous_shifts = _get_previous_shifts(previous_schedule)
+        self._shifts = schedule.shifts
+        self._justice_table = justice_table
+        self._changed_people = {person.id: person for person in changed_people}
+        # The repair checks the spacing rules on both sides of a shift, against the previous shifts as well
+        self._repair = ScheduleRepair([*previous_shifts, *self._shifts], len(previous_shifts), justice_table)
+        self._first_position = len(previous_shifts)
+
+    def _get_current_person(self, person: Person) -> Person:
+        # The shifts and the justice table may hold older models of the people whose constraints were changed
+        return self._changed_people.get(person.id, person)
+
+    def _iter_freed_roles(self) -> Iterator[tuple[int, str]]:
+        for position, shift in enumerate(self._shifts):
+            for role in ROLES:
+                person = getattr(shift, role)
+                if person is not None and person.id in self._changed_people and \
+                        self._changed_people[person.id].has_constraint_on(shift.dates):
+                    yield position, role
+
+    def _set_person(self, position: int, role: str, person: Optional[Person],
+                    previous_person: Optional[Person]) -> None:
+        """
+        Sets the person in the role of the shift, and moves the debt of the shift from the previous main person to the
+        new one.
+        """
+        shift = self._shifts[position]
+        setattr(shift, role, person)
+        if role == MAIN_ROLE:
+            if previous_person is not None:
+                self._justice_table.get_person_record(previous_person).add_debt(shift.type, shift.dates.total_days)
+            if person is not None:
+                self._justice_table.get_person_record(person).substract_debt(shift.type, shift.dates.total_days)
+
+    def _find_person(self, position: int) -> Optional[Person]:
+        """
+        :return: The compatible person with the highest debt, or (breaking the spacing rules) the person with the
+        highest debt that has no constraints on the shift.
+        """
+        shift = self._shifts[position]
+        timeline_position = self._first_position + position
+        relaxed_person = None
+        for candidate in self._justice_table.iter_shift_candidates(shift.type):
+            candidate = self._get_current_person(candidate)
+            if self._repair.is_compatible(candidate, timeline_position):
+                return candidate
+            if relaxed_person is None and candidate not in (shift.person, shift.backup_person) and \
+                    not candidate.has_constraint_on(shift.dates):
+                relaxed_person = candidate
+
+        if relaxed_person is not None:
+            _logger.warning('Could not find a person for shift %s without breaking the spacing rules', shift.dates)
+        return relaxed_person
+
+    def reschedule(self) -> list[ShiftChange]:
+        freed_roles = list(self._iter_freed_roles())
+        changes = [ShiftChange(position, role, getattr(self._shifts[position], role), None)
+                   for position, role in freed_roles]
+
+        # All the freed roles are emptied first, so the people that were taken out do not block each other
+        for change in changes:
+            self._set_person(change.position, change.role, None, change.previous_person)
+
+        for change in changes:
+            change.person = self._find_person(change.position)
+            if change.person is None:
+                self._revert(changes)
+                shift_dates = self._shifts[change.position].dates
+                raise RuntimeError(f'Not enough people without constraints on shift {shift_dates}')
+            self._set_person(change.position, change.role, change.person, None)
+
+        return changes
+
+    def _revert(self, changes: list[ShiftChange]) -> None:
+        for change in changes:
+            self._set_person(change.position, change.role, change.previous_person, change.person)
+
+
+def reschedule(schedule: Schedule, justice_table: JusticeTable, changed_people: list[Person],
+               previous_schedule: Optional[Union[Schedule, ShiftTable, ShiftHistory]] = None) -> list[ShiftChange]:
+    """
+    Reassigns only the roles in the shifts of the schedule that people with new constraints can not take anymore, and
+    changes the justice table only by the debts of these shifts. The rest of the schedule is not changed, and the new
+    people keep the spacing rules with the shifts around them.
+    The shifts of the schedule are changed in place.
+    :param changed_people: The people whose constraints were changed, with their new constraints.
+    :param previous_schedule: The shifts before the schedule, see Scheduler.
+    :return: The changes, by the order of the shifts.
+    """
+    return _Rescheduler(schedule, justice_table, changed_people, previous_schedule).reschedule()
@@ -1,65 +1,132 @@
 from __future__ import annotations
 
 import json
+from logging import getLogger
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union, TYPE_CHECKING
 
-import pandas as pd
-from pydantic import parse_obj_as
+from pydantic import parse_obj_as, validate_model
 from pydantic.json import pydantic_encoder
 
-from scheduler.google_api_client import GoogleAPIClient
-from scheduler.models import Shift
+from scheduler.google_api_client import AppointmentResult
+from scheduler.instrumentation import INSTRUMENTATION
+from scheduler.models import Person, Shift
+from scheduler.published_events import PublishedEvents, get_shift_appointments
+from scheduler.schedule_export import write_csv, write_parquet
+from scheduler.shift_table import ShiftTable
 
+if TYPE_CHECKING:
+    from scheduler.google_api_client import GoogleAPIClient
+
+_logger = getLogger(__name__)
 
-class Schedule:
-    _shifts: list[Shift]
-    _google_api_client: GoogleAPIClient
 
-    def __init__(self, shifts: list[Shift]):
+class Schedule:
+    _shifts: Union[list[Shift], ShiftTable]
+    _google_api_client: Optional[GoogleAPIClient]
+
+    def __init__(self, shifts: Union[list[Shift], ShiftTable], google_api_client: Optional[GoogleAPIClient] = None):
+        """
+        :param shifts: Shift models, or a shift table (that is turned into models only when they are asked for).
+        :param google_api_client: Defaults to a client with the credentials of the user, created only when appointments
+        are sent.
+        """
         self._shifts = shifts
-        self._google_api_client = GoogleAPIClient()
+        self._google_api_client = google_api_client
 
     @staticmethod
     def from_json_file(file_path: Union[str, Path]) -> Schedule:
-        shifts = parse_obj_as(list[Shift], json.loads(Path(file_path).read_text()))
-        return Schedule(shifts)
+        """
+        A person is validated only the first time it appears in the file, and the shifts that have the same person hold
+        the same model of it. Files that are not valid shifts raise a ValidationError, as parse_obj_as would.
+        """
+        raw_shifts = json.loads(Path(file_path).read_text())
+        if not isinstance(raw_shifts, list):
+            return Schedule(parse_obj_as(list[Shift], raw_shifts))
+        people = dict()
+
+        def get_person(raw_person) -> Optional[Person]:
+            if raw_person is None:
+                return None
+            if not isinstance(raw_person, dict):
+                return Person.parse_obj(raw_person)
+            identity = raw_person.get('full_name'), raw_person.get('email_address')
+            if identity not in people or people[identity][0] != raw_person:
+                people[identity] = raw_person, Person.parse_obj(raw_person)
+            return people[identity][1]
+
+        def get_shift(raw_shift) -> Shift:
+            if not isinstance(raw_shift, dict):
+                return Shift.parse_obj(raw_shift)
+            # The other fields are validated as by Shift.parse_obj (with the defaults of the model), but the people are
+            # validated by get_person, since validating a shift would copy them
+            values, _, error = validate_model(Shift, {**raw_shift, 'person': None, 'backup_person': None})
+            if error is not None:
+                raise error
+            return Shift.construct(**{**values, 'person': get_person(raw_shift.get('person')),
+                                      'backup_person': get_person(raw_shift.get('backup_person'))})
+
+        return Schedule([get_shift(raw_shift) for raw_shift in raw_shifts])
 
     @property
     def _json_shifts(self) -> str:
-        return json.dumps(self._shifts, default=pydantic_encoder)
+        return json.dumps(self.shifts, default=pydantic_encoder)
 
     def save_to_json_file(self, file_path: Union[str, Path]) -> None:
-        Path(file_path).write_text(self._json_shifts)
-
-    def save_to_csv_file(self, file_path: Union[str, Path]):
-        df = pd.read_json(self._json_shifts)
+        with INSTRUMENTATION.phase('export'):
+            Path(file_path).write_text(self._json_shifts)
 
-        for column in ['person', 'backup_person']:
-            df[column] = df[column].map(lambda p: p['full_name'])
+    def save_to_csv_file(self, file_path: Union[str, Path]) -> None:
+        with INSTRUMENTATION.phase('export'):
+            write_csv(self._shifts, file_path)
 
-        df['start_date'] = df['dates'].map(lambda d: d['start'])
-        df['end_date'] = df['dates'].map(lambda d: d['end'])
-        df.pop('dates')
-
-        df.to_csv(file_path)
+    def save_to_parquet_file(self, file_path: Union[str, Path]) -> None:
+        with INSTRUMENTATION.phase('export'):
+            write_parquet(self._shifts, file_path)
 
     @property
     def shifts(self) -> list[Shift]:
+        if isinstance(self._shifts, ShiftTable):
+            self._shifts = list(self._shifts.iter_shifts())
         return self._shifts
 
-    def send_appointments(self):
-        for shift in self._shifts:
-            self._google_api_client.schedule_appointment(
-                title=shift.title,
-                start_date=shift.dates.start,
-                end_date=shift.dates.end,
-                target_email=shift.person.email_address
-            )
-
-            self._google_api_client.schedule_appointment(
-                title=f'{shift.title} - REZERVA',
-                start_date=shift.dates.start,
-                end_date=shift.dates.end,
-                target_email=shift.backup_person.email_address
-            )
+    @property
+    def shift_table(self) -> ShiftTable:
+        if isinstance(self._shifts, ShiftTable):
+            return self._shifts
+        return ShiftTable(self._shifts)
+
+    @property
+    def google_api_client(self) -> GoogleAPIClient:
+        if self._google_api_client is None:
+            from scheduler.google_api_client import GoogleAPIClient
+            self._google_api_client = GoogleAPIClient()
+        return self._google_api_client
+
+    def send_appointments(self) -> list[AppointmentResult]:
+        appointments = list()
+        for shift in self.shifts:
+            appointments.extend(get_shift_appointments(shift).values())
+
+        with INSTRUMENTATION.phase('send'):
+            results = self.google_api_client.schedule_appointments(appointments)
+        succeeded = sum(result.succeeded for result in results)
+        _logger.info(f'Sent {succeeded} out of {len(results)} appointments')
+        return results
+
+    def sync_appointments(self, published_events_path: Union[str, Path]) -> list[AppointmentResult]:
+        """
+        Sends only the changes between the schedule and the appointments that were published before (inserts, patches
+        and deletes), and saves the published appointments with their event ids.
+        """
+        published_events = PublishedEvents.from_file(published_events_path)
+        actions = published_events.get_actions(self.shifts)
+        with INSTRUMENTATION.phase('send'):
+            results = self.google_api_client.send_actions([result for _, result in actions])
+
+        published_events.apply(actions)
+        published_events.save_to_file(published_events_path)
+
+        succeeded = sum(result.succeeded for result in results)
+        _logger.info(f'Synced {succeeded} out of {len(results)} changed appointments')
+        return results
@@ -0,0 +1,80 @@
+import csv
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from .models import Person, Shift
+from .models.person_registry import PERSON_REGISTRY
+from .shift_table import NO_PERSON, ShiftTable
+
+CSV_COLUMNS = ['person', 'backup_person', 'type', 'title', 'start_date', 'end_date']
+PARQUET_BATCH_SIZE = 10_000
+
+
+ShiftRow = tuple[Optional[str], Optional[str], str, str, date, date]
+
+
+def _get_name(person: Optional[Person]) -> Optional[str]:
+    return person.full_name if person is not None else None
+
+
+def _get_name_by_id(person_id: int) -> Optional[str]:
+    return PERSON_REGISTRY.get_person(person_id).full_name if person_id != NO_PERSON else None
+
+
+def iter_shift_rows(shifts: Union[Iterable[Shift], ShiftTable]) -> Iterator[ShiftRow]:
+    """
+    :return: The row of every shift, by the order of CSV_COLUMNS. Roles that are not assigned have no name (empty in
+    CSV files and null in Parquet files).
+    """
+    if isinstance(shifts, ShiftTable):
+        for start, end, shift_type, person_id, backup_person_id, title in shifts.iter_rows():
+            yield _get_name_by_id(person_id), _get_name_by_id(backup_person_id), shift_type.value, title, start, end
+        return
+
+    for shift in shifts:
+        yield (_get_name(shift.person), _get_name(shift.backup_person), shift.type.value, shift.title,
+               shift.dates.start, shift.dates.end)
+
+
+def write_csv(shifts: Union[Iterable[Shift], ShiftTable], file_path: Union[str, Path]) -> None:
+    """
+    Writes the shifts one row at a time, with a leading index column (the same format pandas writes).
+    """
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow([''] + CSV_COLUMNS)
+        for index, row in enumerate(iter_shift_rows(shifts)):
+            writer.writerow((index, *row))
+
+
+def write_parquet(shifts: Union[Iterable[Shift], ShiftTable], file_path: Union[str, Path],
+                  batch_size: int = PARQUET_BATCH_SIZE) -> None:
+    """
+    Writes the shifts as a Parquet file, one row group of at most batch_size shifts at a time.
+    Requires pyarrow, which is not installed by default.
+    """
+    # pyarrow is optional, and is needed only here
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError('Writing Parquet files requires pyarrow (pip install pyarrow)') from error
+
+    schema = pa.schema([(column, pa.string()) for column in CSV_COLUMNS[:4]] +
+                       [(column, pa.date32()) for column in CSV_COLUMNS[4:]])
+
+    def write_batch(writer: pq.ParquetWriter, rows: list[tuple]) -> None:
+        columns = [list(column) for column in zip(*rows)]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    with pq.ParquetWriter(file_path, schema) as writer:
+        rows = list()
+        for row in iter_shift_rows(shifts):
+            rows.append(row)
+            if len(rows) == batch_size:
+                write_batch(writer, rows)
+                rows = list()
+
+        if rows:
+            write_batch(writer, rows)
@@ -0,0 +1,233 @@
+from itertools import islice
+from logging import getLogger
+from typing import Optional
+
+from .justice_table import JusticeTable
+from .models import Person, Shift
+from .spacing import SPACE_BETWEEN_SHIFT_TYPES_MAPPING, MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES
+
+# Bounds of the neighborhood search, for every shift that needs to be repaired
+MAX_BLOCKED_PEOPLE = 10
+MAX_REPLACEMENTS = 20
+SWAP_WINDOW = 10
+
+_logger = getLogger(__name__)
+
+# A change of the person in a role (0 is the main person and 1 is the backup person) of the shift in a position
+Change = tuple[int, int, Person]
+
+
+def _get_person(shift: Shift, role: int) -> Optional[Person]:
+    return shift.person if role == 0 else shift.backup_person
+
+
+def _set_person(shift: Shift, role: int, person: Person) -> None:
+    if role == 0:
+        shift.person = person
+    else:
+        shift.backup_person = person
+
+
+class ScheduleRepair:
+    """
+    Finds people for a shift that does not have enough compatible people, by moving people that are blocked only by
+    the spacing rules out of the already assigned shifts that block them (a move replaces them with another person and
+    a swap exchanges them with a person of a nearby shift).
+    Only the spacing window around the changed shifts is checked, the rest of the timeline is not validated again.
+    """
+    _timeline: list[Shift]
+    _first_position: int
+    _justice_table: JusticeTable
+    # The changes that revert the changes find_candidates kept, since they were last popped
+    _kept_reverse_changes: list[Change]
+
+    def __init__(self, timeline: list[Shift], first_position: int, justice_table: JusticeTable):
+        """
+        :param timeline: The previous shifts followed by the shifts of the period.
+        :param first_position: Position of the first shift that may be changed, the shifts before it are the previous
+        shifts.
+        """
+        self._timeline = timeline
+        self._first_position = first_position
+        self._justice_table = justice_table
+        self._kept_reverse_changes = list()
+
+    def _get_blocking_positions(self, person: Person, position: int, end_position: int) -> list[int]:
+        """
+        :return: Positions of the shifts of the person that are too close to the shift in the given position, out of
+        the shifts before end_position.
+        """
+        shift_type = self._timeline[position].type
+        min_type_space = SPACE_BETWEEN_SHIFT_TYPES_MAPPING[shift_type]
+        blocking_positions = list()
+
+        for positions in (range(position - 1, -1, -1), range(position + 1, end_position)):
+            space, type_space = 0, 0
+            for current_position in positions:
+                if space >= MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES and type_space >= min_type_space:
+                    break
+
+                current_shift = self._timeline[current_position]
+                if person in (current_shift.person, current_shift.backup_person):
+                    if space < MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES or \
+                            current_shift.type == shift_type and type_space < min_type_space:
+                        blocking_positions.append(current_position)
+
+                space += 1
+                if current_shift.type == shift_type:
+                    type_space += 1
+
+        return blocking_positions
+
+    def is_compatible(self, person: Person, position: int, end_position: Optional[int] = None) -> bool:
+        """
+        :return: Whether the person can take the shift in the given position, by its constraints and the spacing rules
+        against the shifts before end_position (defaults to the whole timeline).
+        """
+        end_position = end_position if end_position is not None else len(self._timeline)
+        shift = self._timeline[position]
+        if person in (shift.person, shift.backup_person) or person.has_constraint_on(shift.dates):
+            return False
+
+        return not self._get_blocking_positions(person, position, end_position)
+
+    def _apply(self, changes: list[Change]) -> list[Change]:
+        """
+        :return: The changes that revert the given changes.
+        """
+        reverse_changes = list()
+        for position, role, person in changes:
+            shift = self._timeline[position]
+            reverse_changes.append((position, role, _get_person(shift, role)))
+            _set_person(shift, role, person)
+
+        return list(reversed(reverse_changes))
+
+    def _is_valid(self, changes: list[Change], end_position: int) -> bool:
+        """
+        Checks only the people that were added by the (already applied) changes, removing people never breaks a rule.
+        """
+        for position, role, person in changes:
+            shift = self._timeline[position]
+            other_person = _get_person(shift, 1 - role)
+            if person == other_person or person.has_constraint_on(shift.dates):
+                return False
+
+            if self._get_blocking_positions(person, position, end_position):
+                return False
+
+        return True
+
+    def _get_possible_changes(self, person: Person, blocking_position: int, end_position: int) -> list[list[Change]]:
+        """
+        :return: Moves and swaps that take the person out of the shift in the blocking position.
+        """
+        shift = self._timeline[blocking_position]
+        role = 0 if shift.person == person else 1
+        possible_changes = list()
+
+        replacements = islice(self._justice_table.iter_shift_candidates(shift.type), MAX_REPLACEMENTS)
+        for replacement in replacements:
+            if replacement != person:
+                possible_changes.append([(blocking_position, role, replacement)])
+
+        window_start = max(self._first_position, blocking_position - SWAP_WINDOW)
+        for other_position in range(window_start, end_position):
+            other_shift = self._timeline[other_position]
+            if other_position == blocking_position or other_shift.type != shift.type:
+                continue
+            for other_role in (0, 1):
+                other_person = _get_person(other_shift, other_role)
+                if other_person == person:
+                    continue
+                possible_changes.append([(blocking_position, role, other_person), (other_position, other_role, person)])
+
+        return possible_changes
+
+    def _free_person(self, person: Person, position: int) -> Optional[list[Change]]:
+        """
+        Tries to change the shifts before the given position so the person becomes compatible with it.
+        :return: The reverse of the applied changes, or None if the person could not be freed (nothing is changed).
+        """
+        if person.has_constraint_on(self._timeline[position].dates):
+            return None
+
+        reverse_changes = list()
+        for blocking_position in self._get_blocking_positions(person, position, position):
+            if blocking_position < self._first_position:
+                self._apply(reverse_changes)
+                return None
+
+            for changes in self._get_possible_changes(person, blocking_position, position):
+                current_reverse_changes = self._apply(changes)
+                if self._is_valid(changes, position):
+                    reverse_changes = current_reverse_changes + reverse_changes
+                    break
+                self._apply(current_reverse_changes)
+            else:
+                self._apply(reverse_changes)
+                return None
+
+        if not self.is_compatible(person, position, position):
+            self._apply(reverse_changes)
+            return None
+
+        return reverse_changes
+
+    def _update_debts(self, reverse_changes: list[Change]) -> None:
+        # The last reverse change of every position holds the person that was there before all the changes
+        previous_people = {position: person for position, role, person in reverse_changes if role == 0}
+
+        for position, previous_person in previous_people.items():
+            shift = self._timeline[position]
+            if shift.person != previous_person:
+                self._justice_table.get_person_record(previous_person).add_debt(shift.type, shift.dates.total_days)
+                self._justice_table.get_person_record(shift.person).substract_debt(shift.type,
+                                                                                   shift.dates.total_days)
+
+    def _get_candidates(self, position: int, count: int) -> list[Person]:
+        shift_type = self._timeline[position].type
+        return list(islice((person for person in self._justice_table.iter_shift_candidates(shift_type)
+                            if self.is_compatible(person, position, position)), count))
+
+    def find_candidates(self, position: int, count: int = 2) -> list[Person]:
+        """
+        Changes the assigned shifts before the given position (and updates the justice table), until there are enough
+        compatible people for the shift in the given position, or until the search is over.
+        :return: The compatible people, the best candidate first.
+        """
+        candidates = self._get_candidates(position, count)
+        shift_type = self._timeline[position].type
+
+        shift_dates = self._timeline[position].dates
+        blocked_people = [person for person in self._justice_table.get_shift_candidates(shift_type)
+                          if person not in candidates and not person.has_constraint_on(shift_dates)]
+        blocked_people = blocked_people[:MAX_BLOCKED_PEOPLE]
+        for person in blocked_people:
+            if len(candidates) >= count:
+                break
+
+            reverse_changes = self._free_person(person, position)
+            if reverse_changes is None:
+                continue
+
+            new_candidates = self._get_candidates(position, count)
+            if len(new_candidates) > len(candidates):
+                _logger.info('Moved %s out of %s shifts to free them for shift %s', person, len(reverse_changes),
+                             self._timeline[position].dates)
+                self._update_debts(reverse_changes)
+                self._kept_reverse_changes += reverse_changes
+                candidates = new_candidates
+            else:
+                self._apply(reverse_changes)
+
+        return candidates
+
+    def pop_reverse_changes(self) -> list[Change]:
+        """
+        :return: The changes that revert the changes that find_candidates kept since the last call, which tell the
+        positions that were changed and the people that were there before.
+        """
+        reverse_changes = self._kept_reverse_changes
+        self._kept_reverse_changes = list()
+        return reverse_changes
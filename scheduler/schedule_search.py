@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import copy
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from logging import getLogger
+from typing import Callable, Optional, Union
+
+from .justice_table import JusticeTable
+from .models import Person, Shift, ShiftType
+from .schedule import Schedule
+from .scheduler import Scheduler
+from .shift_table import ShiftTable
+
+# Scores a scheduled period by its shifts, the justice table after the period and the people pool, lower is better
+ScoreFunction = Callable[[list[Shift], JusticeTable, list[Person]], float]
+
+_logger = getLogger(__name__)
+
+
+def get_debts_score(shifts: list[Shift], justice_table: JusticeTable, people: list[Person]) -> float:
+    """
+    Sum of the squares of the debts that are left after the period, of all the people and shift types.
+    """
+    return sum(justice_table.get_person_record(person).get_debt(shift_type) ** 2
+               for person in people for shift_type in ShiftType)
+
+
+def get_spacing_score(shifts: list[Shift], justice_table: JusticeTable, people: list[Person]) -> float:
+    """
+    Sum of 1 / (space + 1) over every two consecutive shifts (main or backup) of the same person, so shifts that are
+    close to each other cost more than shifts that are spread over the period.
+    """
+    last_positions = dict()
+    score = 0.0
+
+    for position, shift in enumerate(shifts):
+        for person in (shift.person, shift.backup_person):
+            if person.id in last_positions:
+                score += 1 / (position - last_positions[person.id])
+            last_positions[person.id] = position
+
+    return score
+
+
+@dataclass
+class TrialResult:
+    seed: int
+    score: float
+    shifts: list[Shift]
+    justice_table: JusticeTable
+
+    @property
+    def schedule(self) -> Schedule:
+        return Schedule(self.shifts)
+
+
+class ScheduleSearch:
+    """
+    Runs the greedy scheduler with many random seeds on a process pool, and keeps the schedule with the best score.
+    Every trial starts from its own copy of the justice table, and a trial can be reproduced with its seed.
+    """
+    _start_date: date
+    _end_date: date
+    _people_pool: list[Person]
+    _justice_table: JusticeTable
+    _previous_schedule: Optional[Union[Schedule, ShiftTable]]
+    _score_function: ScoreFunction
+
+    def __init__(self, start_date: date, end_date: date, people_pool: list[Person], justice_table: JusticeTable,
+                 previous_schedule: Optional[Union[Schedule, ShiftTable]] = None,
+                 score_function: ScoreFunction = get_debts_score):
+        """
+        :param score_function: Should be a module level function, so it can be sent to the worker processes.
+        """
+        self._start_date = start_date
+        self._end_date = end_date
+        self._people_pool = people_pool
+        self._justice_table = justice_table
+        self._previous_schedule = previous_schedule
+        self._score_function = score_function
+
+    def run_trial(self, seed: int) -> TrialResult:
+        random.seed(seed)
+        scheduler = Scheduler(self._start_date, self._end_date, self._people_pool,
+                              copy.deepcopy(self._justice_table), previous_schedule=self._previous_schedule)
+        shifts = scheduler.assign_shifts()
+        score = self._score_function(shifts, scheduler.justice_table, self._people_pool)
+        return TrialResult(seed=seed, score=score, shifts=shifts, justice_table=scheduler.justice_table)
+
+    def get_trial_score(self, seed: int) -> float:
+        """
+        :return: The score of the trial, or infinity if the scheduler could not find people for all the shifts.
+        """
+        try:
+            return self.run_trial(seed).score
+        except RuntimeError:
+            _logger.info(f'Trial with seed {seed} could not find people for all the shifts')
+            return math.inf
+
+    def search(self, trials: int, first_seed: int = 0, max_workers: Optional[int] = None) -> TrialResult:
+        """
+        Runs the trials with the seeds first_seed, first_seed + 1, ... and runs the best one again, so only the seeds and
+        the scores are sent between the processes.
+        :param max_workers: Amount of worker processes, defaults to the amount of CPUs.
+        """
+        seeds = list(range(first_seed, first_seed + trials))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(self,)) as executor:
+            scores = list(executor.map(_get_trial_score, seeds, chunksize=max(1, trials // 64)))
+
+        best_score, best_seed = min(zip(scores, seeds))
+        if math.isinf(best_score):
+            raise RuntimeError(f'None of the {trials} trials could find people for all the shifts')
+
+        _logger.info(f'Best trial is {best_seed} with score {best_score}')
+        return self.run_trial(best_seed)
+
+
+_worker_search: Optional[ScheduleSearch] = None
+
+
+def _init_worker(search: ScheduleSearch) -> None:
+    global _worker_search
+    _worker_search = search
+
+
+def _get_trial_score(seed: int) -> float:
+    return _worker_search.get_trial_score(seed)
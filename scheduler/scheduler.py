@@ -1,23 +1,31 @@
-import sys
 from datetime import date
-from logging import getLogger
-from typing import Optional
+from enum import Enum
+from logging import DEBUG, getLogger
+from typing import Optional, Union
 
+from .availability import AvailabilityBitmap, SpacingMask
+from .instrumentation import INSTRUMENTATION
 from .justice_table import JusticeTable
+from .last_shift_index import LastShiftIndex
 from .models import Shift, ShiftType
 from .models.person import Person
+from .models.person_registry import PERSON_REGISTRY
+from .optimal_engine import OptimalEngine
 from .schedule import Schedule
+from .schedule_repair import Change, ScheduleRepair
+from .shift_history import ShiftHistory
+from .shift_table import ShiftTable
 from .shifts_builder import ShiftsBuilder
+from .spacing import SPACE_BETWEEN_SHIFT_TYPES_MAPPING, MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES
 
-SPACE_BETWEEN_SHIFT_TYPES_MAPPING = {
-    ShiftType.WEEKEND: 2,
-    ShiftType.WORKDAY: 5,
-    ShiftType.HOLIDAY: 0
-}
+_logger = getLogger(__name__)
 
-MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES = 2
 
-_logger = getLogger(__name__)
+class SchedulingEngine(Enum):
+    # Chooses the people shift after shift, from the highest debt to the lowest
+    GREEDY = 'greedy'
+    # Optimizes the whole period at once, see OptimalEngine
+    OPTIMAL = 'optimal'
 
 
 class Scheduler:
@@ -26,65 +34,216 @@ class Scheduler:
     _people_pool: list[Person]
     _justice_table: JusticeTable
     _shifts = list[Shift]
+    _total_days: dict[ShiftType, int]
+    # Only the tail of the previous shifts that can affect the spacing rules of the period, as models
     _previous_shifts = list[Shift]
+    _previous_shifts_index: LastShiftIndex
+    _last_shift_index: LastShiftIndex
+    # The previous shifts followed by the shifts of the period, and its repair (created on the first repair)
+    _timeline: list[Shift]
+    _repair: Optional[ScheduleRepair]
+    # Built when the shifts are assigned, the spacing mask rolls forward with the last shift index
+    _availability: Optional[AvailabilityBitmap]
+    _spacing_mask: SpacingMask
+    _engine: SchedulingEngine
+    _time_budget: Optional[float]
 
     def __init__(self, start_date: date, end_date: date, people_pool: list[Person], justice_table: JusticeTable,
-                 previous_schedule: Optional[Schedule] = None):
+                 previous_schedule: Optional[Union[Schedule, ShiftTable, ShiftHistory]] = None,
+                 engine: Union[SchedulingEngine, str] = SchedulingEngine.GREEDY,
+                 time_budget: Optional[float] = None):
+        """
+        :param previous_schedule: The shifts before the period. A shift table avoids building models for all of them,
+        and a shift history avoids reading the archived shifts at all.
+        :param engine: The scheduling engine to use.
+        :param time_budget: Time (in seconds) the optimal engine is allowed to search for a better schedule, defaults to
+        a budget that grows with the period and the people (see get_default_time_budget).
+        """
         self._start_data = start_date
         self._end_date = end_date
         self._people_pool = people_pool
         self._justice_table = justice_table
-        self._shifts = ShiftsBuilder(start_date, end_date).build()
-        self._previous_shifts = previous_schedule.shifts if previous_schedule else list()
+        # The people of the pool are the current people, over older copies of them from the history
+        for person in people_pool:
+            PERSON_REGISTRY.make_current(person)
+        with INSTRUMENTATION.phase('build'):
+            # The total days of every shift type are counted as the shifts are built, in the same pass
+            self._shifts = list()
+            self._total_days = dict.fromkeys(ShiftType, 0)
+            for shift in ShiftsBuilder(start_date, end_date).iter_shifts():
+                self._shifts.append(shift)
+                self._total_days[shift.type] += shift.dates.total_days
+        if isinstance(previous_schedule, ShiftHistory):
+            previous_history = previous_schedule
+        elif isinstance(previous_schedule, Schedule):
+            previous_history = ShiftHistory(previous_schedule.shift_table)
+        else:
+            previous_history = ShiftHistory(previous_schedule or ShiftTable())
+        previous_shifts = previous_history.recent_shifts
+        tail_start = previous_shifts.get_tail_start(MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES,
+                                                    SPACE_BETWEEN_SHIFT_TYPES_MAPPING)
+        self._previous_shifts = list(previous_shifts.iter_shifts(tail_start))
+        self._previous_shifts_index = previous_history.get_last_shift_index()
+        self._last_shift_index = self._previous_shifts_index.copy()
+        self._timeline = [*self._previous_shifts, *self._shifts]
+        self._repair = None
+        self._availability = None
+        self._spacing_mask = SpacingMask(self._previous_shifts)
+        self._engine = SchedulingEngine(engine)
+        self._time_budget = time_budget
 
     @property
     def justice_table(self) -> JusticeTable:
         return self._justice_table
 
     def _get_space_from_last_shift(self, person: Person, shift: Shift, any_type: bool = False) -> int:
-        all_shifts = [*self._previous_shifts, *self._shifts]
-        relevant_shifts = all_shifts[:all_shifts.index(shift)]
-        any_previous_shift = False
-        space = 0
-
-        for current_shift in reversed(relevant_shifts):
-            if any_type or current_shift.type == shift.type:
-                if current_shift.person != person and current_shift.backup_person != person:
-                    space += 1
-                else:
-                    any_previous_shift = True
-                    break
+        """
+        The shifts are assigned in chronological order, so the index holds exactly the shifts before the given shift.
+        """
+        return self._last_shift_index.get_space_from_last_shift(person, shift.type, any_type=any_type)
+
+    def _reject(self, person: Person, shift: Shift, available: int, blocked_by_type: int) -> None:
+        """
+        Logs and counts why an incompatible candidate was rejected, by the order of the checks: constraints, spacing
+        from the last shift of the same type, and spacing from the last shift of any type.
+        """
+        bit = 1 << person.id
+        if not available & bit:
+            _logger.debug('%s has constraints on shift: %s', person.full_name, shift.dates)
+            self._count_rejection('constraint')
+        elif blocked_by_type & bit:
+            if _logger.isEnabledFor(DEBUG):
+                _logger.debug('%s space from last %s shift is too small (%s): %s', person, shift.type,
+                              self._get_space_from_last_shift(person, shift), shift.dates)
+            self._count_rejection('type_spacing')
+        else:
+            if _logger.isEnabledFor(DEBUG):
+                _logger.debug('%s space from last shift is too small %s', person,
+                              self._get_space_from_last_shift(person, shift, any_type=True))
+            self._count_rejection('spacing')
+
+    @staticmethod
+    def _count_rejection(reason: str) -> None:
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count(f'scheduler.rejections.{reason}')
+
+    def _get_relaxed_candidates(self, shift: Shift, candidates: list[Person]) -> list[Person]:
+        """
+        :return: The given candidates, followed by the people without constraints on the shift that had their last
+        shifts longest ago (ignoring the spacing rules).
+        """
+        other_people = [person for person in self._justice_table.get_shift_candidates(shift.type)
+                        if person not in candidates and not person.has_constraint_on(shift.dates)]
+        other_people.sort(key=lambda person: (self._get_space_from_last_shift(person, shift, any_type=True),
+                                              self._get_space_from_last_shift(person, shift)), reverse=True)
+        return [*candidates, *other_people]
+
+    def _repair_for_shift(self, shift: Shift, candidates: list[Person]) -> list[Person]:
+        """
+        Called when there are not enough compatible people for the shift. Changes the shifts that were already assigned
+        to free more people, and if that is not enough, breaks the spacing rules.
+        """
+        INSTRUMENTATION.count('scheduler.repairs')
+        if self._repair is None:
+            self._repair = ScheduleRepair(self._timeline, len(self._previous_shifts), self._justice_table)
+        assigned_shifts = self._last_shift_index.total_shifts - self._previous_shifts_index.total_shifts
+        position = len(self._previous_shifts) + assigned_shifts
+        candidates = self._repair.find_candidates(position)
+        self._apply_repair(position, self._repair.pop_reverse_changes())
+
+        if len(candidates) < 2:
+            _logger.warning('Could not find people for shift %s without breaking the spacing rules', shift.dates)
+            INSTRUMENTATION.count('scheduler.relaxed_shifts')
+            candidates = self._get_relaxed_candidates(shift, candidates)
+
+        if len(candidates) < 2:
+            raise RuntimeError(f'Not enough people without constraints on shift {shift.dates}')
 
-        if not any_previous_shift:
-            return sys.maxsize
+        return candidates
 
-        return space
+    def _apply_repair(self, position: int, reverse_changes: list[Change]) -> None:
+        """
+        Updates the last shift index and the spacing mask with the shifts that the repair changed (before the shift in
+        the given position of the timeline), without adding all the assigned shifts again.
+        """
+        if not reverse_changes:
+            return
 
-    def _is_compatible_for_shift(self, person: Person, shift: Shift) -> bool:
-        has_constraint = any(shift.dates.overlaps_with(constraint) for constraint in person.constraints)
-        if has_constraint:
-            _logger.debug(f'{person.full_name} has constraints on shift: {shift.dates}')
-            return False
+        changed_positions = {changed_position for changed_position, _, _ in reverse_changes}
+        changed_people = {person for _, _, person in reverse_changes if person is not None}
+        changed_types = {self._timeline[changed_position].type for changed_position in changed_positions}
+        for changed_position in changed_positions:
+            changed_shift = self._timeline[changed_position]
+            changed_people.update(person for person in (changed_shift.person, changed_shift.backup_person)
+                                  if person is not None)
 
-        min_shift_space = SPACE_BETWEEN_SHIFT_TYPES_MAPPING[shift.type]
-        space_from_last_shift = self._get_space_from_last_shift(person, shift)
-        if space_from_last_shift < min_shift_space:
-            _logger.debug(f'{person} space from last {shift.type} shift is too '
-                          f'small ({space_from_last_shift}): {shift.dates}')
-            return False
+        # The changed shifts are close to the position, so the people are found by walking back from it
+        for person in changed_people:
+            self._update_last_shifts(person, position, changed_types)
 
-        space_from_last_shift = self._get_space_from_last_shift(person, shift, any_type=True)
-        if self._get_space_from_last_shift(person, shift, any_type=True) < MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES:
-            _logger.debug(f'{person} space from last shift is too small {space_from_last_shift}')
-            return False
+        shifts_of_type_after = dict.fromkeys(ShiftType, 0)
+        for current_position in range(position - 1, min(changed_positions) - 1, -1):
+            current_shift = self._timeline[current_position]
+            if current_position in changed_positions:
+                self._spacing_mask.replace_shift(current_shift, position - 1 - current_position,
+                                                 shifts_of_type_after[current_shift.type])
+            shifts_of_type_after[current_shift.type] += 1
 
-        return True
+    def _update_last_shifts(self, person: Person, position: int, shift_types: set[ShiftType]) -> None:
+        """
+        Finds the last shift of the person (of any type and of each of the given types) before the shift in the given
+        position of the timeline, and sets it in the last shift index.
+        """
+        index = self._last_shift_index
+        last_shift = None
+        last_shifts_by_type = dict()
+        shifts_of_type_after = dict.fromkeys(ShiftType, 0)
+        first_position = len(self._previous_shifts)
+
+        for current_position in range(position - 1, first_position - 1, -1):
+            current_shift = self._timeline[current_position]
+            if person in (current_shift.person, current_shift.backup_person):
+                if last_shift is None:
+                    last_shift = index.total_shifts - (position - current_position)
+                if current_shift.type in shift_types and current_shift.type not in last_shifts_by_type:
+                    total_shifts_of_type = index.get_total_shifts_of_type(current_shift.type)
+                    last_shifts_by_type[current_shift.type] = \
+                        total_shifts_of_type - 1 - shifts_of_type_after[current_shift.type]
+                if last_shift is not None and len(last_shifts_by_type) == len(shift_types):
+                    break
+            shifts_of_type_after[current_shift.type] += 1
+
+        # People without shifts in the period keep their last shifts from before the period
+        index.set_last_shift(person, last_shift if last_shift is not None else
+                             self._previous_shifts_index.get_last_shift(person))
+        for shift_type in shift_types:
+            index.set_last_shift(person, last_shifts_by_type[shift_type] if shift_type in last_shifts_by_type else
+                                 self._previous_shifts_index.get_last_shift(person, shift_type), shift_type)
+
+    def _choose_person_for_shift(self, position: int, shift: Shift) -> None:
+        # The compatible people are found with bit operations, the candidates are only looked up in them
+        available = self._availability.get_available(position)
+        blocked_by_type = self._spacing_mask.get_blocked_by_type(shift.type)
+        compatible = available & ~blocked_by_type & ~self._spacing_mask.get_blocked()
+        count_rejections = INSTRUMENTATION.enabled or _logger.isEnabledFor(DEBUG)
 
-    def _choose_person_for_shift(self, shift: Shift) -> None:
         candidates = list()
-        for candidate in self._justice_table.get_shift_candidates(shift.type):
-            if self._is_compatible_for_shift(candidate, shift):
+        examined_candidates = 0
+        for candidate in self._justice_table.iter_shift_candidates(shift.type):
+            examined_candidates += 1
+            if compatible >> candidate.id & 1:
                 candidates.append(candidate)
+                if len(candidates) == 2:
+                    break
+            elif count_rejections:
+                self._reject(candidate, shift, available, blocked_by_type)
+
+        if INSTRUMENTATION.enabled:
+            INSTRUMENTATION.count('scheduler.compatibility_checks', examined_candidates)
+            INSTRUMENTATION.record('scheduler.candidates_examined_per_shift', examined_candidates)
+
+        if len(candidates) < 2:
+            candidates = self._repair_for_shift(shift, candidates)
 
         chosen_person = candidates[0]
         chosen_backup_person = candidates[1]
@@ -94,19 +253,33 @@ class Scheduler:
 
         shift.person = chosen_person
         shift.backup_person = chosen_backup_person
+        self._last_shift_index.add_shift(shift)
+        self._spacing_mask.add_shift(shift)
 
-    def _get_total_days(self, shift_type: ShiftType):
-        return sum(shift.dates.total_days for shift in self._shifts if shift.type == shift_type)
+    def assign_shifts(self) -> list[Shift]:
+        """
+        Assigns people to all the shifts of the period and updates the justice table.
+        """
+        with INSTRUMENTATION.phase('add_debts'):
+            self._justice_table.add_debts(
+                workdays=self._total_days[ShiftType.WORKDAY],
+                weekend_days=self._total_days[ShiftType.WEEKEND],
+                holidays=self._total_days[ShiftType.HOLIDAY],
+                people=self._people_pool
+            )
 
-    def schedule(self) -> Schedule:
-        self._justice_table.add_debts(
-            workdays=self._get_total_days(ShiftType.WORKDAY),
-            weekend_days=self._get_total_days(ShiftType.WEEKEND),
-            holidays=self._get_total_days(ShiftType.HOLIDAY),
-            people=self._people_pool
-        )
+        with INSTRUMENTATION.phase('assignment'):
+            if self._engine == SchedulingEngine.OPTIMAL:
+                OptimalEngine(self._shifts, self._previous_shifts, self._people_pool, self._justice_table,
+                              time_budget=self._time_budget).solve()
+            else:
+                # The candidates are the people of the justice table, which has records for the whole pool by now
+                self._availability = AvailabilityBitmap(
+                    self._shifts, [record.person for record in self._justice_table.iter_records()])
+                for position, shift in enumerate(self._shifts):
+                    self._choose_person_for_shift(position, shift)
 
-        for shift in self._shifts:
-            self._choose_person_for_shift(shift)
+        return self._shifts
 
-        return Schedule(self._shifts)
+    def schedule(self) -> Schedule:
+        return Schedule(self.assign_shifts())
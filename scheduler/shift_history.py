@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from itertools import groupby
+from logging import getLogger
+from pathlib import Path
+from typing import Optional, Union
+
+from pydantic.json import pydantic_encoder
+
+from .atomic_write import write_text_atomically
+from .last_shift_index import LastShiftIndex
+from .shift_table import ShiftTable
+from .spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+ARCHIVE_FILE_NAME_FORMAT = 'shifts_{year}.json'
+
+_logger = getLogger(__name__)
+
+
+def get_index_path(shifts_path: Union[str, Path]) -> Path:
+    """
+    :return: Path of the index of the archived shifts, that is kept next to the file of the recent shifts.
+    """
+    shifts_path = Path(shifts_path)
+    return shifts_path.with_name(f'{shifts_path.stem}.index.json')
+
+
+def _copy_rows(table: ShiftTable, start: int = 0, stop: Optional[int] = None) -> ShiftTable:
+    copied_table = ShiftTable()
+    for row in table.iter_rows(start, stop):
+        copied_table.append(*row)
+    return copied_table
+
+
+class ShiftHistory:
+    """
+    The shifts before a period: the recent shifts, which the spacing rules look at, and the last shift index of the
+    older shifts, which were moved to the archive by compact_history. Only the recent shifts are read when a period is
+    scheduled, so loading the history does not get slower as it grows.
+    """
+    recent_shifts: ShiftTable
+    # Index of the archived shifts, that all come before the recent shifts
+    archived_index: LastShiftIndex
+    # End date of the last archived shift
+    archived_until: Optional[date]
+
+    def __init__(self, recent_shifts: Optional[ShiftTable] = None, archived_index: Optional[LastShiftIndex] = None,
+                 archived_until: Optional[date] = None):
+        self.recent_shifts = recent_shifts if recent_shifts is not None else ShiftTable()
+        self.archived_index = archived_index or LastShiftIndex()
+        self.archived_until = archived_until
+
+    @staticmethod
+    def from_json_file(file_path: Union[str, Path]) -> ShiftHistory:
+        """
+        Reads the recent shifts from a file that was written by Schedule.save_to_json_file, and the index of the
+        archived shifts from next to it (if the history was ever compacted).
+        """
+        recent_shifts = ShiftTable.from_json_file(file_path)
+        index_path = get_index_path(file_path)
+        if not index_path.is_file():
+            return ShiftHistory(recent_shifts)
+
+        raw_index = json.loads(index_path.read_text())
+        archived_until = date.fromisoformat(raw_index['archived_until'])
+        if len(recent_shifts) and recent_shifts.get_row(0)[0] <= archived_until:
+            raise ValueError(f'Shifts of {file_path} overlap the archived shifts (until {archived_until}) of '
+                             f'{index_path}, the history was changed since it was compacted')
+        return ShiftHistory(recent_shifts, LastShiftIndex.from_dict(raw_index['index']), archived_until)
+
+    def get_last_shift_index(self) -> LastShiftIndex:
+        """
+        :return: Index of all the shifts, archived and recent.
+        """
+        index = self.archived_index.copy()
+        index.add_shift_table(self.recent_shifts)
+        return index
+
+
+def compact_history(shifts_path: Union[str, Path], archive_dir: Union[str, Path], min_recent_shifts: int = 0) -> int:
+    """
+    Moves the shifts that the spacing rules do not need anymore from the file of the recent shifts to the archive (a
+    file per year in the archive directory), and adds them to the index of the archived shifts.
+    :param min_recent_shifts: Keep at least this amount of recent shifts, even if the spacing rules need less.
+    :return: The amount of shifts that were archived.
+    """
+    shifts_path, archive_dir = Path(shifts_path), Path(archive_dir)
+    history = ShiftHistory.from_json_file(shifts_path)
+    tail_start = history.recent_shifts.get_tail_start(max(MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, min_recent_shifts),
+                                                      SPACE_BETWEEN_SHIFT_TYPES_MAPPING)
+    if tail_start == 0:
+        return 0
+
+    archived_shifts = _copy_rows(history.recent_shifts, stop=tail_start)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for year, shifts in groupby(archived_shifts.iter_shifts(), key=lambda shift: shift.dates.start.year):
+        archive_path = archive_dir / ARCHIVE_FILE_NAME_FORMAT.format(year=year)
+        raw_shifts = json.loads(archive_path.read_text()) if archive_path.is_file() else list()
+        write_text_atomically(archive_path, json.dumps(raw_shifts + list(shifts), default=pydantic_encoder))
+
+    # The index is written before the recent shifts, a failure in between is found by ShiftHistory.from_json_file
+    archived_index = history.archived_index.copy()
+    archived_index.add_shift_table(archived_shifts)
+    archived_until = archived_shifts.get_row(len(archived_shifts) - 1)[1]
+    write_text_atomically(get_index_path(shifts_path), json.dumps({
+        'archived_until': archived_until.isoformat(),
+        'index': archived_index.to_dict(),
+    }, default=pydantic_encoder))
+    recent_shifts = _copy_rows(history.recent_shifts, start=tail_start)
+    write_text_atomically(shifts_path, json.dumps(list(recent_shifts.iter_shifts()), default=pydantic_encoder))
+
+    _logger.info(f'Archived {len(archived_shifts)} shifts until {archived_until} to {archive_dir}')
+    return len(archived_shifts)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from .models import DateRange, Person, Shift, ShiftType
+from .models.person_registry import PERSON_REGISTRY
+
+SHIFT_TYPES = list(ShiftType)
+SHIFT_TYPE_CODES = {shift_type: code for code, shift_type in enumerate(SHIFT_TYPES)}
+# Person id of a role that is not assigned
+NO_PERSON = -1
+
+# A decoded row: start, end, type, person id, backup person id and title
+ShiftRow = tuple[date, date, ShiftType, int, int, str]
+
+
+class ShiftTable:
+    """
+    Shifts in chronological order, stored as columns of integers: the dates as ordinals, the types as codes (indexes in
+    SHIFT_TYPES), the people as person ids (see PersonRegistry) and the titles as indexes of distinct titles.
+    Holds years of shifts in a fraction of the memory of Shift models, which are built only when asked for.
+    """
+    # The people of the shifts by their ids, which keeps them (and so their ids) alive in the registry
+    _people: dict[int, Person]
+    _starts: array
+    _ends: array
+    _types: array
+    _person_ids: array
+    _backup_person_ids: array
+    _title_ids: array
+    _titles: list[str]
+    _title_ids_by_title: dict[str, int]
+
+    def __init__(self, shifts: Iterable[Shift] = ()):
+        self._starts = array('l')
+        self._ends = array('l')
+        self._types = array('b')
+        self._person_ids = array('l')
+        self._backup_person_ids = array('l')
+        self._title_ids = array('l')
+        self._titles = list()
+        self._title_ids_by_title = dict()
+        self._people = dict()
+
+        for shift in shifts:
+            self.add_shift(shift)
+
+    @staticmethod
+    def from_json_file(file_path: Union[str, Path]) -> ShiftTable:
+        """
+        Reads a file that was written by Schedule.save_to_json_file, without building a model for every shift. A person
+        model is built only the first time the person appears in the file.
+        """
+        table = ShiftTable()
+        people = dict()
+
+        def get_person_id(raw_person: Optional[dict]) -> int:
+            if raw_person is None:
+                return NO_PERSON
+            identity = raw_person['full_name'], raw_person['email_address']
+            if identity not in people:
+                people[identity] = Person.parse_obj(raw_person)
+            return people[identity].id
+
+        for raw_shift in json.loads(Path(file_path).read_text()):
+            table.append(date.fromisoformat(raw_shift['dates']['start']), date.fromisoformat(raw_shift['dates']['end']),
+                         ShiftType(raw_shift['type']), get_person_id(raw_shift['person']),
+                         get_person_id(raw_shift['backup_person']), raw_shift['title'])
+
+        return table
+
+    def append(self, start: date, end: date, shift_type: ShiftType, person_id: int, backup_person_id: int,
+               title: str) -> None:
+        """
+        The people with the given ids must be alive (held by the caller).
+        """
+        for row_person_id in (person_id, backup_person_id):
+            if row_person_id != NO_PERSON and row_person_id not in self._people:
+                self._people[row_person_id] = PERSON_REGISTRY.get_person(row_person_id)
+
+        title_id = self._title_ids_by_title.get(title)
+        if title_id is None:
+            title_id = len(self._titles)
+            self._title_ids_by_title[title] = title_id
+            self._titles.append(title)
+
+        self._starts.append(start.toordinal())
+        self._ends.append(end.toordinal())
+        self._types.append(SHIFT_TYPE_CODES[shift_type])
+        self._person_ids.append(person_id)
+        self._backup_person_ids.append(backup_person_id)
+        self._title_ids.append(title_id)
+
+    def add_shift(self, shift: Shift) -> None:
+        self.append(shift.dates.start, shift.dates.end, shift.type,
+                    shift.person.id if shift.person is not None else NO_PERSON,
+                    shift.backup_person.id if shift.backup_person is not None else NO_PERSON, shift.title)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    # Read only views of the columns, that share the memory of the table
+    @property
+    def starts(self) -> memoryview:
+        return memoryview(self._starts).toreadonly()
+
+    @property
+    def ends(self) -> memoryview:
+        return memoryview(self._ends).toreadonly()
+
+    @property
+    def types(self) -> memoryview:
+        return memoryview(self._types).toreadonly()
+
+    @property
+    def person_ids(self) -> memoryview:
+        return memoryview(self._person_ids).toreadonly()
+
+    @property
+    def backup_person_ids(self) -> memoryview:
+        return memoryview(self._backup_person_ids).toreadonly()
+
+    def get_row(self, index: int) -> ShiftRow:
+        return (date.fromordinal(self._starts[index]), date.fromordinal(self._ends[index]),
+                SHIFT_TYPES[self._types[index]], self._person_ids[index], self._backup_person_ids[index],
+                self._titles[self._title_ids[index]])
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[ShiftRow]:
+        for index in range(*slice(start, stop).indices(len(self))):
+            yield self.get_row(index)
+
+    def get_shift(self, index: int) -> Shift:
+        start, end, shift_type, person_id, backup_person_id, title = self.get_row(index)
+        # The rows are valid already, and validating the shift would copy the interned people
+        return Shift.construct(person=PERSON_REGISTRY.get_person(person_id) if person_id != NO_PERSON else None,
+                               backup_person=PERSON_REGISTRY.get_person(backup_person_id)
+                               if backup_person_id != NO_PERSON else None,
+                               dates=DateRange(start=start, end=end), type=shift_type, title=title)
+
+    def iter_shifts(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Shift]:
+        for index in range(*slice(start, stop).indices(len(self))):
+            yield self.get_shift(index)
+
+    def get_tail_start(self, min_shifts: int, min_shifts_by_type: dict[ShiftType, int]) -> int:
+        """
+        :return: Index of the first shift of the shortest tail that contains at least min_shifts shifts, and at least
+        the given amount of shifts of every type (or the whole table, if there are not enough shifts).
+        """
+        missing_by_type = [max(min_shifts_by_type.get(shift_type, 0), 0) for shift_type in SHIFT_TYPES]
+        missing_types = sum(missing > 0 for missing in missing_by_type)
+        index = len(self)
+
+        while index > 0 and (len(self) - index < min_shifts or missing_types):
+            index -= 1
+            type_code = self._types[index]
+            if missing_by_type[type_code]:
+                missing_by_type[type_code] -= 1
+                if not missing_by_type[type_code]:
+                    missing_types -= 1
+
+        return index
+
+    def __setstate__(self, state: dict) -> None:
+        # Person ids are only stable within a process, so the people (which are sent with the table) get new ids
+        self.__dict__.update(state)
+
+        new_ids = {person_id: person.id for person_id, person in self._people.items()}
+        self._people = {person.id: person for person in self._people.values()}
+        new_ids[NO_PERSON] = NO_PERSON
+        self._person_ids = array('l', (new_ids[person_id] for person_id in self._person_ids))
+        self._backup_person_ids = array('l', (new_ids[person_id] for person_id in self._backup_person_ids))
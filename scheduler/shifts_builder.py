@@ -1,60 +1,81 @@
 from datetime import date, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 
-from .holidays import get_holiday_name
+from .holidays import HOLIDAY_CALENDAR, HolidayCalendar
 from .models import Shift, ShiftType, DateRange
 
 WEEKEND_DAYS = [3, 4, 5]
 TITLE_PREFIX = '[947shift]'
+ONE_DAY = timedelta(days=1)
+
+# Holiday name of a day that was not looked up yet (None means that the day is not a holiday)
+_UNKNOWN = object()
+
+
+class _CalendarCursor:
+    """
+    A forward pass over the days of the calendar, that looks up the holiday name of every day once and keeps only the
+    holiday names of the current day and the next one.
+    """
+    day: date
+    _holiday_calendar: HolidayCalendar
+    _day_holiday_name: Optional[str]
+    _next_day_holiday_name: Optional[str]
+
+    def __init__(self, start_date: date, holiday_calendar: HolidayCalendar):
+        self.day = start_date
+        self._holiday_calendar = holiday_calendar
+        self._day_holiday_name = holiday_calendar.get_holiday_name(start_date)
+        self._next_day_holiday_name = _UNKNOWN
+
+    def _get_next_day_holiday_name(self) -> Optional[str]:
+        if self._next_day_holiday_name is _UNKNOWN:
+            self._next_day_holiday_name = self._holiday_calendar.get_holiday_name(self.day + ONE_DAY)
+        return self._next_day_holiday_name
+
+    def advance(self) -> None:
+        self._day_holiday_name = self._get_next_day_holiday_name()
+        self._next_day_holiday_name = _UNKNOWN
+        self.day += ONE_DAY
+
+    @property
+    def is_night_before_holiday(self) -> bool:
+        next_day_holiday_name = self._get_next_day_holiday_name()
+        return bool(next_day_holiday_name) and self._day_holiday_name != next_day_holiday_name
+
+    @property
+    def holiday_name(self) -> Optional[str]:
+        """
+        Name of the holiday of the shift of the day, the night before a holiday belongs to the holiday.
+        """
+        holiday_name = self._get_next_day_holiday_name() if self.is_night_before_holiday else self._day_holiday_name
+        return holiday_name or None
 
 
 class ShiftsBuilder:
     _start_date: date
     _end_date: date
+    _holiday_calendar: HolidayCalendar
 
-    def __init__(self, start_date: date, end_date: date):
+    def __init__(self, start_date: date, end_date: date, holiday_calendar: HolidayCalendar = HOLIDAY_CALENDAR):
         self._start_date = start_date
         self._end_date = end_date
-
-    @staticmethod
-    def _is_night_before_holiday(_date: date) -> bool:
-        next_day = _date + timedelta(days=1)
-        current_holiday, next_day_holiday = [get_holiday_name(d) for d in (_date, next_day)]
-        return next_day_holiday and current_holiday != next_day_holiday
-
-    def _get_holiday_name(self, _date: date) -> Optional[str]:
-        if self._is_night_before_holiday(_date):
-            _date = _date + timedelta(days=1)
-
-        holiday_name = get_holiday_name(_date)
-        if holiday_name:
-            return holiday_name
+        self._holiday_calendar = holiday_calendar
 
     @staticmethod
     def _is_weekend(_date: date) -> bool:
         return _date.weekday() in WEEKEND_DAYS
 
-    def _build_holiday_shift(self, start_date: date) -> Shift:
-        holiday_name = self._get_holiday_name(start_date)
-        end_date = start_date + timedelta(days=1)
-
-        while self._get_holiday_name(end_date) and not self._is_night_before_holiday(end_date):
-            end_date += timedelta(days=1)
-
-        end_date -= timedelta(days=1)
+    @staticmethod
+    def _build_holiday_shift(start_date: date, end_date: date, holiday_name: str) -> Shift:
         return Shift(
             dates=DateRange(start=start_date, end=end_date),
             type=ShiftType.HOLIDAY,
             title=f'{TITLE_PREFIX} Holiday shift - {holiday_name}'
         )
 
-    def _build_weekend_days_shift(self, start_date: date):
-        end_date = start_date
-
-        while self._is_weekend(end_date):
-            end_date += timedelta(days=1)
-
-        end_date -= timedelta(days=1)
+    @staticmethod
+    def _build_weekend_days_shift(start_date: date, end_date: date) -> Shift:
         return Shift(
             dates=DateRange(start=start_date, end=end_date),
             type=ShiftType.WEEKEND,
@@ -62,26 +83,36 @@ class ShiftsBuilder:
         )
 
     @staticmethod
-    def _build_workday_shift(start_date: date):
+    def _build_workday_shift(start_date: date) -> Shift:
         return Shift(
             dates=DateRange(start=start_date, end=start_date),
             type=ShiftType.WORKDAY,
             title=f'{TITLE_PREFIX} Workday shift'
         )
 
-    def build(self) -> list[Shift]:
-        shifts = list()
-        current_date = self._start_date
-
-        while current_date <= self._end_date:
-            if self._get_holiday_name(current_date):
-                shift = self._build_holiday_shift(current_date)
-            elif self._is_weekend(current_date):
-                shift = self._build_weekend_days_shift(current_date)
+    def iter_shifts(self) -> Iterator[Shift]:
+        """
+        Lazily yields the shifts of the period in a single forward pass over the days, so the memory does not depend on
+        the length of the period. The last shift may end after the end date.
+        """
+        cursor = _CalendarCursor(self._start_date, self._holiday_calendar)
+
+        while cursor.day <= self._end_date:
+            start_date = cursor.day
+            holiday_name = cursor.holiday_name
+            if holiday_name:
+                # A holiday shift lasts until the next day that is not a holiday, or the night before another holiday
+                cursor.advance()
+                while cursor.holiday_name and not cursor.is_night_before_holiday:
+                    cursor.advance()
+                yield self._build_holiday_shift(start_date, cursor.day - ONE_DAY, holiday_name)
+            elif self._is_weekend(start_date):
+                while self._is_weekend(cursor.day):
+                    cursor.advance()
+                yield self._build_weekend_days_shift(start_date, cursor.day - ONE_DAY)
             else:
-                shift = self._build_workday_shift(current_date)
-
-            shifts.append(shift)
-            current_date = shift.dates.end + timedelta(days=1)
+                cursor.advance()
+                yield self._build_workday_shift(start_date)
 
-        return shifts
+    def build(self) -> list[Shift]:
+        return list(self.iter_shifts())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+from logging import getLogger
+from pathlib import Path
+from typing import Callable, TypeVar, Union
+
+from pydantic import parse_obj_as
+
+from .atomic_write import write_atomically
+from .models import Person
+
+# Changed whenever the pickled classes change, so snapshots of older versions are not restored
+SNAPSHOT_VERSION = 1
+
+T = TypeVar('T')
+
+_logger = getLogger(__name__)
+
+
+def load_people(file_path: Union[str, Path]) -> list[Person]:
+    return parse_obj_as(list[Person], json.loads(Path(file_path).read_text()))
+
+
+def _dump(value, file_path: Path) -> None:
+    with file_path.open('wb') as snapshot_file:
+        pickle.dump(value, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class SnapshotCache:
+    """
+    Keeps what was loaded from an input file (people, a justice table, a shift history...) as a pickle snapshot, keyed
+    by the hash of the content of the file. A file that did not change since it was last loaded is restored from its
+    snapshot without parsing and validating it again, and a model that appears more than once in it is restored as a
+    single instance.
+    The snapshots are trusted input (unpickling runs code), the cache directory must be writable only by its owner.
+    """
+    _cache_dir: Path
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        self._cache_dir = Path(cache_dir)
+
+    def _get_snapshot_prefix(self, file_path: Path, loader: Callable[[Path], T]) -> str:
+        """
+        :return: The start of the names of the snapshots of the file by the loader, whatever the content of the file.
+        """
+        source = f'{file_path.resolve()}:{loader.__module__}.{loader.__qualname__}:{SNAPSHOT_VERSION}'
+        return f'{file_path.name}.{hashlib.sha256(source.encode()).hexdigest()[:16]}'
+
+    def load(self, file_path: Union[str, Path], loader: Callable[[Path], T]) -> T:
+        """
+        :param loader: Loads the file when it has no snapshot yet. Should be a named function, its name is part of the
+        key of the snapshot.
+        """
+        file_path = Path(file_path)
+        content = file_path.read_bytes()
+        snapshot_prefix = self._get_snapshot_prefix(file_path, loader)
+        snapshot_path = self._cache_dir / f'{snapshot_prefix}.{hashlib.sha256(content).hexdigest()}.pickle'
+        try:
+            with snapshot_path.open('rb') as snapshot_file:
+                return pickle.load(snapshot_file)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            _logger.warning(f'Could not restore snapshot {snapshot_path}, loading {file_path} again', exc_info=True)
+
+        value = loader(file_path)
+        # The file may have changed while it was loaded, then the snapshot would not match its key
+        if file_path.read_bytes() == content:
+            self._save(snapshot_prefix, snapshot_path, value)
+        return value
+
+    def _save(self, snapshot_prefix: str, snapshot_path: Path, value) -> None:
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written atomically, so a snapshot is never restored while it is being written
+        write_atomically(snapshot_path, lambda temporary_path: _dump(value, temporary_path))
+
+        # The snapshots of older contents of the file will not be restored again
+        for old_snapshot_path in self._cache_dir.glob(f'{snapshot_prefix}.*.pickle'):
+            if old_snapshot_path != snapshot_path:
+                old_snapshot_path.unlink(missing_ok=True)
@@ -0,0 +1,11 @@
+from .models import ShiftType
+
+# Minimal amount of shifts of the same type between two shifts of a person
+SPACE_BETWEEN_SHIFT_TYPES_MAPPING = {
+    ShiftType.WEEKEND: 2,
+    ShiftType.WORKDAY: 5,
+    ShiftType.HOLIDAY: 0
+}
+
+# Minimal amount of shifts of any type between two shifts of a person
+MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES = 2
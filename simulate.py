@@ -0,0 +1,62 @@
+import argparse
+import json
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+from scheduler.fairness_simulator import REPORTED_PERCENTILES, FairnessSimulator, WeightingScheme
+from scheduler.snapshot_cache import load_people
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Simulates how the debts drift over many periods under different '
+                                                 'weighting schemes and spacing settings.')
+    parser.add_argument('schemes', nargs='?', type=Path, default=None,
+                        help='Path of a JSON file with a list of schemes, every scheme has a name, the weights of '
+                             'every person and optionally "spacing" (by shift type) and "min_space"')
+    parser.add_argument('--people', type=Path, default=None,
+                        help='Simulate the weights of the people of this file as well, as the scheme "current"')
+    parser.add_argument('--start-date', type=date.fromisoformat, default=date.today(),
+                        help='First day of the first period (default: today)')
+    parser.add_argument('--periods', type=int, default=24, help='Amount of periods (default: 24)')
+    parser.add_argument('--period-months', type=int, default=1, help='Length of a period in months (default: 1)')
+    parser.add_argument('--scenarios', type=int, default=100, help='Amount of scenarios (default: 100)')
+    parser.add_argument('--density', type=float, nargs=2, default=(0.02, 0.15), metavar=('MIN', 'MAX'),
+                        help='Range of the probability that a person has a constraint on a day (default: 0.02 0.15)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='Amount of worker processes (default: CPUs)')
+    parser.add_argument('--output', type=Path, default=None, help='Write the reports to this file, as JSON')
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    schemes = WeightingScheme.from_file(args.schemes) if args.schemes is not None else list()
+    if args.people is not None:
+        schemes.append(WeightingScheme.from_people('current', load_people(args.people)))
+    if not schemes:
+        print('Nothing to simulate, give a schemes file or --people')
+        return 1
+
+    simulator = FairnessSimulator(args.start_date, args.periods, period_months=args.period_months,
+                                  scenarios=args.scenarios, density_range=tuple(args.density), seed=args.seed,
+                                  max_workers=args.workers)
+    reports = simulator.run(schemes)
+    median = REPORTED_PERCENTILES.index(50)
+
+    for report in reports:
+        spreads = ', '.join(f'{shift_type.value} {spread:.2f}'
+                            for shift_type, spread in report.mean_debt_spread.items())
+        print(f'{report.name}: mean debt spread ({spreads}), median violations per scenario: '
+              f'{report.spacing_violation_percentiles[median]:.0f} spacing, '
+              f'{report.constraint_violation_percentiles[median]:.0f} constraints')
+
+    if args.output is not None:
+        args.output.write_text(json.dumps([report.to_dict() for report in reports], indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from scheduler.atomic_write import write_atomically, write_text_atomically
+
+
+def test_write_text_atomically(tmp_path: Path) -> None:
+    write_text_atomically(tmp_path / 'file.json', '[]')
+    write_text_atomically(tmp_path / 'file.json', '[1]')
+
+    assert (tmp_path / 'file.json').read_text() == '[1]'
+    assert [path.name for path in tmp_path.iterdir()] == ['file.json']
+
+
+def test_failed_write_keeps_file(tmp_path: Path) -> None:
+    def write(file_path: Path) -> None:
+        file_path.write_text('partial')
+        raise RuntimeError('Failed')
+
+    write_text_atomically(tmp_path / 'file.json', '[]')
+    with pytest.raises(RuntimeError):
+        write_atomically(tmp_path / 'file.json', write)
+
+    assert (tmp_path / 'file.json').read_text() == '[]'
+    assert [path.name for path in tmp_path.iterdir()] == ['file.json']
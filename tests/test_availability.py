@@ -0,0 +1,55 @@
+import random
+from datetime import date
+
+from scheduler.availability import AvailabilityBitmap, SpacingMask
+from scheduler.justice_table import JusticeTable
+from scheduler.last_shift_index import LastShiftIndex
+from scheduler.models import DateRange, Person, RecurringConstraint
+from scheduler.scheduler import Scheduler
+from scheduler.shifts_builder import ShiftsBuilder
+from scheduler.spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES, SPACE_BETWEEN_SHIFT_TYPES_MAPPING
+
+
+def _get_people(amount: int) -> list[Person]:
+    _random = random.Random(0)
+    people = list()
+    for i in range(amount):
+        constraints = [date(2023, 1, _random.randrange(1, 32)),
+                       DateRange(start=date(2023, 2, i + 1), end=date(2023, 2, i + 3)),
+                       RecurringConstraint(weekdays=[i % 7], start=date(2023, 3, 1), every_n_weeks=2)]
+        people.append(Person(full_name=f'AvailabilityPerson{i}', email_address=f'availability.person{i}@gmail.com',
+                             workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1,
+                             constraints=constraints))
+    return people
+
+
+def test_availability_bitmap() -> None:
+    people = _get_people(15)
+    shifts = ShiftsBuilder(date(2023, 1, 1), date(2023, 3, 31)).build()
+    availability = AvailabilityBitmap(shifts, people[:10])
+
+    for position, shift in enumerate(shifts):
+        expected_people = [person for person in people[:10] if not person.has_constraint_on(shift.dates)]
+        assert availability.get_available_people(position, people) == expected_people
+        assert not availability.is_available(position, people[12])
+
+
+def test_spacing_mask() -> None:
+    people = _get_people(15)
+    random.seed(0)
+    shifts = Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 3, 31), people_pool=people,
+                       justice_table=JusticeTable()).schedule().shifts
+    index = LastShiftIndex()
+    mask = SpacingMask()
+
+    for shift in shifts:
+        blocked_people = [person for person in people
+                          if index.get_space_from_last_shift(person, shift.type) <
+                          SPACE_BETWEEN_SHIFT_TYPES_MAPPING[shift.type] or
+                          index.get_space_from_last_shift(person, shift.type, any_type=True) <
+                          MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES]
+        blocked = mask.get_blocked() | mask.get_blocked_by_type(shift.type)
+        assert [person for person in people if blocked >> person.id & 1] == blocked_people
+
+        index.add_shift(shift)
+        mask.add_shift(shift)
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scheduler.batch_runner import BatchManifest, BatchRunner, SUMMARY_FILE_NAME, JUSTICE_TABLE_FILE_NAME, \
+    SCHEDULE_CSV_FILE_NAME, SCHEDULE_JSON_FILE_NAME
+from scheduler.shift_table import ShiftTable
+
+
+@pytest.fixture
+def manifest_path(tmp_path: Path) -> Path:
+    people = [{'full_name': f'BatchPerson{i}', 'email_address': f'batch.person{i}@gmail.com',
+               'workdays_shifts_weight': 1, 'weekend_days_shifts_weight': 1, 'holidays_shifts_weight': 1}
+              for i in range(13)]
+    (tmp_path / 'team_a').mkdir()
+    (tmp_path / 'team_a' / 'people.json').write_text(json.dumps(people))
+
+    manifest = {
+        'output_dir': 'output',
+        'jobs': [
+            {'name': 'team_a', 'start_date': '2023-03-01', 'end_date': '2023-04-30',
+             'people_path': 'team_a/people.json', 'justice_table_path': 'team_a/justice_table.json', 'seed': 0},
+            {'name': 'team_a_next', 'start_date': '2023-05-01', 'end_date': '2023-05-31',
+             'people_path': 'team_a/people.json', 'previous_shifts_path': 'missing.json', 'seed': 1},
+            {'name': 'no_people', 'start_date': '2023-03-01', 'end_date': '2023-03-31',
+             'people_path': 'missing.json'},
+        ]
+    }
+    (tmp_path / 'manifest.json').write_text(json.dumps(manifest))
+    return tmp_path / 'manifest.json'
+
+
+def test_batch(manifest_path: Path) -> None:
+    results = BatchRunner(BatchManifest.from_file(manifest_path), max_workers=2).run()
+
+    assert [result.succeeded for result in results] == [True, True, False]
+    assert 'FileNotFoundError' in results[2].error
+
+    output_dir = manifest_path.parent / 'output'
+    for name in ('team_a', 'team_a_next'):
+        for file_name in (SCHEDULE_CSV_FILE_NAME, SCHEDULE_JSON_FILE_NAME, JUSTICE_TABLE_FILE_NAME):
+            assert (output_dir / name / file_name).is_file()
+    assert not list(output_dir.glob('**/*.tmp'))
+
+    assert len(ShiftTable.from_json_file(output_dir / 'team_a' / SCHEDULE_JSON_FILE_NAME)) == results[0].shifts
+    summary = json.loads((output_dir / SUMMARY_FILE_NAME).read_text())
+    assert summary['failed'] == 1
+    assert [job['name'] for job in summary['jobs']] == ['team_a', 'team_a_next', 'no_people']
+
+
+@pytest.mark.parametrize('name', ['../team_a', '/tmp/team_a', 'teams/team_a', '..', ''])
+def test_invalid_job_name(manifest_path: Path, name: str) -> None:
+    manifest = BatchManifest.from_file(manifest_path)
+    manifest.jobs[0].name = name
+
+    with pytest.raises(ValueError):
+        BatchRunner(manifest, max_workers=1).run()
+    assert not (manifest_path.parent / 'output').exists()
@@ -0,0 +1,26 @@
+from datetime import date
+
+from benchmarks.run_benchmarks import BenchmarkResult, compare_with_baseline, run_benchmark, _shifts_builder_benchmark
+from benchmarks.synthetic import DENSE_CONSTRAINTS, make_history, make_people
+
+
+def test_synthetic_rosters_are_reproducible() -> None:
+    rosters = [make_people(20, date(2024, 1, 1), date(2024, 12, 31), constraint_density=DENSE_CONSTRAINTS, seed=3)
+               for _ in range(2)]
+    assert [person.constraints for person in rosters[0]] == [person.constraints for person in rosters[1]]
+
+    histories = [make_history(rosters[0], date(2023, 12, 31), years=2, seed=3) for _ in range(2)]
+    assert list(histories[0].iter_rows()) == list(histories[1].iter_rows())
+
+
+def test_compare_with_baseline() -> None:
+    result = run_benchmark(_shifts_builder_benchmark('1m'))
+    baseline = {result.name: {'wall_time': result.wall_time, 'peak_memory': result.peak_memory,
+                              'operations': result.operations}}
+    compare_with_baseline(result, baseline, threshold=2.0)
+    assert not result.regressions
+
+    slower_result = BenchmarkResult(result.name, max(result.wall_time, 1) * 2, result.peak_memory,
+                                    result.operations + 1)
+    compare_with_baseline(slower_result, baseline, threshold=2.0)
+    assert len(slower_result.regressions) == 2
@@ -0,0 +1,74 @@
+import json
+from datetime import date
+
+from pydantic import parse_obj_as
+from pydantic.json import pydantic_encoder
+
+from scheduler.models import DateRange, Person, RecurringConstraint
+
+
+def _get_person(constraints: list) -> Person:
+    return parse_obj_as(Person, {
+        'full_name': 'Person1',
+        'email_address': 'person1@gmail.com',
+        'workdays_shifts_weight': 1,
+        'weekend_days_shifts_weight': 1,
+        'holidays_shifts_weight': 1,
+        'constraints': constraints
+    })
+
+
+def _date_range(start: date, end: date) -> DateRange:
+    return DateRange(start=start, end=end)
+
+
+def test_constraints_index() -> None:
+    person = _get_person([
+        '2023-05-12',
+        {'start': '2023-05-01', 'end': '2023-05-03'},
+        {'start': '2023-05-02', 'end': '2023-05-05'},
+        {'start': '2023-06-26', 'end': '2023-06-30'},
+    ])
+
+    assert person.has_constraint_on(_date_range(date(2023, 5, 5), date(2023, 5, 6)))
+    assert person.has_constraint_on(_date_range(date(2023, 5, 12), date(2023, 5, 12)))
+    assert person.has_constraint_on(_date_range(date(2023, 6, 1), date(2023, 7, 3)))
+    assert not person.has_constraint_on(_date_range(date(2023, 5, 6), date(2023, 5, 11)))
+    assert not person.has_constraint_on(_date_range(date(2023, 4, 1), date(2023, 4, 30)))
+
+
+def test_recurring_constraints() -> None:
+    person = _get_person([
+        {'weekdays': [1]},
+        {'weekdays': [3, 4, 5], 'start': '2023-05-01', 'end': '2023-05-31', 'every_n_weeks': 2},
+    ])
+
+    assert isinstance(person.constraints[0], RecurringConstraint)
+    assert person.has_constraint_on(_date_range(date(2023, 5, 16), date(2023, 5, 16)))
+    assert not person.has_constraint_on(_date_range(date(2023, 5, 17), date(2023, 5, 17)))
+    assert person.has_constraint_on(_date_range(date(2023, 5, 4), date(2023, 5, 6)))
+    assert not person.has_constraint_on(_date_range(date(2023, 5, 11), date(2023, 5, 13)))
+    assert person.has_constraint_on(_date_range(date(2023, 5, 18), date(2023, 5, 20)))
+    assert not person.has_constraint_on(_date_range(date(2023, 6, 1), date(2023, 6, 3)))
+
+
+def test_constraints_serialization() -> None:
+    person = _get_person([{'weekdays': [1]}, {'start': '2023-05-01', 'end': '2023-05-03'}, '2023-05-12'])
+    loaded_person = parse_obj_as(Person, json.loads(json.dumps(person, default=pydantic_encoder)))
+
+    assert loaded_person.constraints == person.constraints
+
+
+def test_constraints_index_follows_constraints() -> None:
+    person = _get_person(['2023-05-12'])
+    constrained_range = _date_range(date(2023, 5, 1), date(2023, 5, 3))
+    assert not person.has_constraint_on(constrained_range)
+
+    copied_person = person.copy(update={'constraints': [constrained_range]})
+    assert copied_person.has_constraint_on(constrained_range)
+    assert not person.has_constraint_on(constrained_range)
+
+    person.constraints = [constrained_range]
+    assert person.has_constraint_on(constrained_range)
+    constructed_person = Person.construct(**{**person.dict(), 'constraints': [constrained_range]})
+    assert constructed_person.has_constraint_on(constrained_range)
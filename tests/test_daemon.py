@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+from datetime import date
+from pathlib import Path
+
+import pytest
+from pydantic.json import pydantic_encoder
+
+from scheduler.daemon import DaemonConfig, SchedulerDaemon, send_request
+from scheduler.justice_table import JusticeTable
+from scheduler.models import DateRange, Person, Shift, ShiftType
+from scheduler.shift_table import ShiftTable
+from scheduler.snapshot_cache import load_people
+from scheduler.spacing import MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES
+
+SCHEDULE_REQUEST = {'start_date': '2023-01-01', 'end_date': '2023-01-31', 'seed': 0}
+
+
+def _write_people(file_path: Path, amount: int) -> None:
+    people = [Person(full_name=f'DaemonPerson{i}', email_address=f'daemon.person{i}@gmail.com',
+                     workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+              for i in range(amount)]
+    file_path.write_text(json.dumps(people, default=pydantic_encoder))
+
+
+@pytest.fixture
+def daemon(tmp_path: Path) -> SchedulerDaemon:
+    _write_people(tmp_path / 'people.json', 13)
+    return SchedulerDaemon(DaemonConfig(
+        people_path=tmp_path / 'people.json',
+        justice_table_path=tmp_path / 'justice_table.json',
+        previous_shifts_path=tmp_path / 'previous_shifts.json',
+        schedule_path=tmp_path / 'schedule.json',
+    ))
+
+
+def test_preview_and_schedule(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    preview = daemon.handle_request({'command': 'preview', **SCHEDULE_REQUEST})
+    assert preview['ok']
+    assert not (tmp_path / 'justice_table.json').exists()
+
+    schedule = daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})
+    assert schedule['result'] == preview['result']
+    assert (tmp_path / 'schedule.json').is_file()
+    assert len(list(JusticeTable.from_file(tmp_path / 'justice_table.json').iter_records())) == 13
+
+
+def test_schedule_adds_to_previous_shifts(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    january = daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})['result']
+    february_request = {'command': 'schedule', 'start_date': '2023-02-01', 'end_date': '2023-02-28', 'seed': 0}
+    daemon.handle_request(february_request)
+    # Scheduling a period again replaces its shifts
+    february = daemon.handle_request(february_request)['result']
+
+    previous_shifts = ShiftTable.from_json_file(tmp_path / 'previous_shifts.json')
+    assert [row[0].isoformat() for row in previous_shifts.iter_rows()] == \
+        [shift['start_date'] for shift in january + february]
+
+    # February keeps the spacing from the end of January
+    people = [(shift['person'], shift['backup_person']) for shift in january[-MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES:]]
+    for shift in february[:MIN_SPACE_BETWEEN_ALL_SHIFT_TYPES]:
+        assert not any({shift['person'], shift['backup_person']} & set(previous_people) for previous_people in people)
+        people = people[1:] + [(shift['person'], shift['backup_person'])]
+
+
+def test_candidates(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    _write_people(tmp_path / 'people.json', 30)
+    assert not daemon.handle_request({'command': 'candidates', 'date': '2023-01-10'})['ok']
+
+    schedule = daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})['result']
+    shift = next(shift for shift in schedule if shift['start_date'] == '2023-01-10')
+    candidates = daemon.handle_request({'command': 'candidates', 'date': '2023-01-10', 'count': 3})['result']
+
+    assert 0 < len(candidates) <= 3
+    assert not {candidate['full_name'] for candidate in candidates} & {shift['person'], shift['backup_person']}
+
+
+def test_candidates_keep_spacing_from_previous_shifts(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    _write_people(tmp_path / 'people.json', 30)
+    people = load_people(tmp_path / 'people.json')
+    previous_shift = Shift(person=people[0], backup_person=people[1], type=ShiftType.WORKDAY, title='Workday shift',
+                           dates=DateRange(start=date(2022, 12, 31), end=date(2022, 12, 31)))
+    (tmp_path / 'previous_shifts.json').write_text(json.dumps([previous_shift], default=pydantic_encoder))
+
+    schedule = daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})['result']
+    candidates = daemon.handle_request({'command': 'candidates', 'date': schedule[0]['start_date'],
+                                        'count': len(people)})['result']
+
+    assert candidates
+    assert not {candidate['full_name'] for candidate in candidates} & {people[0].full_name, people[1].full_name}
+
+
+def test_reload_changed_files(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    daemon.warm_up()
+    _write_people(tmp_path / 'people.json', 15)
+
+    schedule = daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})['result']
+    assert {shift['person'] for shift in schedule} & {'DaemonPerson13', 'DaemonPerson14'}
+
+
+def test_export(daemon: SchedulerDaemon, tmp_path: Path) -> None:
+    daemon.handle_request({'command': 'schedule', **SCHEDULE_REQUEST})
+    response = daemon.handle_request({'command': 'export', 'path': str(tmp_path / 'schedule.csv')})
+
+    assert response['ok']
+    assert (tmp_path / 'schedule.csv').read_text().startswith(',person,backup_person')
+    assert not daemon.handle_request({'command': 'unknown'})['ok']
+
+
+def test_serve(daemon: SchedulerDaemon) -> None:
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    servers = list()
+
+    def on_started(server: asyncio.AbstractServer) -> None:
+        servers.append(server)
+        started.set()
+
+    def serve() -> None:
+        try:
+            loop.run_until_complete(daemon.serve(port=0, on_started=on_started))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    assert started.wait(timeout=10)
+    port = servers[0].sockets[0].getsockname()[1]
+
+    try:
+        assert send_request({'command': 'ping'}, port=port) == {'ok': True, 'result': 'pong'}
+        assert send_request({'command': 'preview', **SCHEDULE_REQUEST}, port=port)['ok']
+    finally:
+        loop.call_soon_threadsafe(servers[0].close)
+        thread.join(timeout=10)
@@ -0,0 +1,48 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from scheduler.fairness_simulator import FairnessSimulator, WeightingScheme, build_periods, simulate
+from scheduler.models import ShiftType
+
+EQUAL_WEIGHTS = WeightingScheme(name='equal', weights=[(1, 1, 1)] * 15)
+
+
+def test_build_periods() -> None:
+    periods = build_periods(date(2024, 1, 1), 12)
+
+    assert len(periods) == 12
+    assert sum(period.days.sum() for period in periods) >= 366
+    assert all(period.totals[list(ShiftType).index(ShiftType.HOLIDAY)] > 0 for period in periods[8:10])
+
+
+def test_simulate_keeps_total_debt() -> None:
+    periods = build_periods(date(2024, 1, 1), 6)
+    result = simulate(periods, EQUAL_WEIGHTS, np.zeros(10), np.random.default_rng(0))
+
+    assert result.debts.shape == (10, 15, 3)
+    assert result.debts.sum(axis=1) == pytest.approx(np.zeros((10, 3)))
+    # Without constraints, the greedy choice keeps the workday debts within two days of each other
+    assert (result.debts[:, :, 0].max(axis=1) - result.debts[:, :, 0].min(axis=1)).max() <= 2
+    assert not result.constraint_violations.any()
+
+
+def test_simulate_counts_violations() -> None:
+    periods = build_periods(date(2024, 1, 1), 3)
+    small_roster = WeightingScheme(name='small', weights=[(1, 1, 1)] * 4)
+    result = simulate(periods, small_roster, np.full(5, 0.3), np.random.default_rng(0))
+
+    assert result.spacing_violations.all()
+    assert result.constraint_violations.any()
+
+
+def test_fairness_simulator() -> None:
+    strict_spacing = EQUAL_WEIGHTS.copy(update={'name': 'strict', 'spacing': {ShiftType.WORKDAY: 12}})
+    simulator = FairnessSimulator(date(2024, 1, 1), periods=3, scenarios=12, max_workers=2, batch_size=5)
+    reports = simulator.run([EQUAL_WEIGHTS, strict_spacing])
+
+    assert [report.name for report in reports] == ['equal', 'strict']
+    assert all(report.scenarios == 12 for report in reports)
+    assert reports[1].spacing_violation_percentiles[-1] > reports[0].spacing_violation_percentiles[-1]
+    assert reports[0].to_dict()['mean_debt_spread'].keys() == {shift_type.value for shift_type in ShiftType}
@@ -0,0 +1,79 @@
+import json
+import threading
+from datetime import date
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from scheduler.google_api_client import GoogleAPIClient, Appointment
+
+BOUNDARY = 'batch_boundary'
+
+
+class CalendarStubHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the batch endpoint of Google Calendar API, that answers every insert with a new event id.
+    Every request whose event summary starts with "RATE_LIMITED" fails once on rate limits.
+    """
+    server: ThreadingHTTPServer
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def _get_response(self, request_payload: str) -> str:
+        body = json.loads(request_payload[request_payload.index('{'):])
+        with self.server.lock:
+            self.server.requests.append(body['summary'])
+            if body['summary'].startswith('RATE_LIMITED') and body['summary'] not in self.server.rate_limited:
+                self.server.rate_limited.add(body['summary'])
+                error = {'error': {'code': 403, 'errors': [{'reason': 'rateLimitExceeded'}]}}
+                return f'HTTP/1.1 403 Forbidden\r\nContent-Type: application/json\r\n\r\n{json.dumps(error)}'
+
+            event_id = f'event{len(self.server.requests)}'
+        return f'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{json.dumps({"id": event_id})}'
+
+    def do_POST(self) -> None:
+        content = self.rfile.read(int(self.headers['Content-Length']))
+        message = BytesParser().parsebytes(f'Content-Type: {self.headers["Content-Type"]}\r\n\r\n'.encode() + content)
+
+        parts = list()
+        for part in message.get_payload():
+            content_id = part['Content-ID'].replace('<', '<response-', 1)
+            parts.append(f'--{BOUNDARY}\r\nContent-Type: application/http\r\nContent-ID: {content_id}\r\n\r\n'
+                         f'{self._get_response(part.get_payload())}\r\n')
+        response = (''.join(parts) + f'--{BOUNDARY}--').encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/mixed; boundary={BOUNDARY}')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CalendarStubHandler)
+    server.lock, server.requests, server.rate_limited = threading.Lock(), list(), set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def test_schedule_appointments(server: ThreadingHTTPServer) -> None:
+    client = GoogleAPIClient(credentials=AnonymousCredentials(), root_url=f'http://127.0.0.1:{server.server_port}/',
+                             initial_backoff=0.01)
+    appointments = [Appointment(title=f'{"RATE_LIMITED" if index % 10 == 0 else "Shift"} {index}',
+                                start_date=date(2023, 3, 1), end_date=date(2023, 3, 1),
+                                target_email='person1@gmail.com') for index in range(120)]
+
+    results = client.schedule_appointments(appointments)
+
+    assert [result.appointment for result in results] == appointments
+    assert all(result.succeeded for result in results)
+    assert len({result.event_id for result in results}) == len(appointments)
+    assert [result.attempts for result in results[:2]] == [2, 1]
+    assert len(server.requests) == len(appointments) + len(server.rate_limited)
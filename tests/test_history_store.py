@@ -0,0 +1,143 @@
+import random
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from scheduler.history_store import HistoryStore
+from scheduler.justice_table import JusticeTable
+from scheduler.last_shift_index import LastShiftIndex
+from scheduler.models import Person, ShiftType
+from scheduler.schedule import Schedule
+from scheduler.scheduler import Scheduler
+from scheduler.shift_table import ShiftTable
+
+
+@pytest.fixture
+def people() -> list[Person]:
+    return [Person(full_name=f'StorePerson{i}', email_address=f'store.person{i}@gmail.com', workdays_shifts_weight=1,
+                   weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(11)]
+
+
+@pytest.fixture
+def justice_table(people: list[Person]) -> JusticeTable:
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=22, weekend_days=11, holidays=0, people=people)
+    return justice_table
+
+
+@pytest.fixture
+def schedule(people: list[Person], justice_table: JusticeTable) -> Schedule:
+    random.seed(0)
+    return Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 3, 31), people_pool=people,
+                     justice_table=justice_table).schedule()
+
+
+def test_migrate_from_json(tmp_path: Path, justice_table: JusticeTable, schedule: Schedule,
+                           people: list[Person]) -> None:
+    justice_table.save_to_file(tmp_path / 'justice_table.json')
+    schedule.save_to_json_file(tmp_path / 'previous_shifts.json')
+
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.migrate_from_json(tmp_path / 'justice_table.json', tmp_path / 'previous_shifts.json')
+        with pytest.raises(ValueError):
+            history_store.migrate_from_json(tmp_path / 'justice_table.json')
+
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        loaded_justice_table = history_store.load_justice_table()
+        assert list(history_store.load_shift_table().iter_shifts()) == schedule.shifts
+
+    for person in people:
+        for shift_type in ShiftType:
+            assert loaded_justice_table.get_person_record(person).get_debt(shift_type) == \
+                pytest.approx(justice_table.get_person_record(person).get_debt(shift_type))
+
+
+def test_save_only_changes(tmp_path: Path, justice_table: JusticeTable, people: list[Person]) -> None:
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        assert history_store.save(justice_table) == len(people)
+        assert history_store.save(justice_table) == 0
+
+        justice_table.get_person_record(people[0]).add_debt(ShiftType.WORKDAY, 1)
+        assert history_store.save(justice_table, people_whitelist=people[1:]) == 0
+        assert history_store.save(justice_table) == 1
+
+        justice_table.get_person_record(people[0]).add_debt(ShiftType.WORKDAY, 1)
+        assert history_store.save(justice_table, people_whitelist=[]) == 1
+
+
+def test_concurrent_saves_add_up(tmp_path: Path, justice_table: JusticeTable, people: list[Person]) -> None:
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.save(justice_table)
+
+    first_store, second_store = HistoryStore(tmp_path / 'history.db'), HistoryStore(tmp_path / 'history.db')
+    first_table, second_table = first_store.load_justice_table(), second_store.load_justice_table()
+    first_table.get_person_record(people[0]).add_debt(ShiftType.WEEKEND, 2)
+    second_table.get_person_record(people[0]).substract_debt(ShiftType.WEEKEND, 5)
+    first_store.save(first_table)
+    second_store.save(second_table)
+    first_store.close()
+    second_store.close()
+
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        record = history_store.load_justice_table().get_person_record(people[0])
+    assert record.get_debt(ShiftType.WEEKEND) == \
+        pytest.approx(justice_table.get_person_record(people[0]).get_debt(ShiftType.WEEKEND) - 3)
+
+
+def test_shifts_by_date_and_person(tmp_path: Path, schedule: Schedule, people: list[Person]) -> None:
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.save(shifts=schedule.shift_table)
+        march_shifts = list(history_store.load_shift_table(start_date=date(2023, 3, 1)).iter_shifts())
+        person_shifts = history_store.get_person_shifts(people[0], end_date=date(2023, 2, 28))
+
+    assert march_shifts == [shift for shift in schedule.shifts if shift.dates.start >= date(2023, 3, 1)]
+    assert person_shifts == [shift for shift in schedule.shifts if shift.dates.start <= date(2023, 2, 28) and
+                             people[0] in (shift.person, shift.backup_person)]
+    assert person_shifts
+
+
+def test_load_shift_history(tmp_path: Path, schedule: Schedule) -> None:
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.save(shifts=schedule.shift_table)
+        history = history_store.load_shift_history()
+
+    full_index = LastShiftIndex(schedule.shift_table)
+    index = history.get_last_shift_index()
+    assert 0 < len(history.recent_shifts) < len(schedule.shifts)
+    assert list(history.recent_shifts.iter_shifts()) == schedule.shifts[-len(history.recent_shifts):]
+    assert index.total_shifts == full_index.total_shifts
+    for person in {shift.person for shift in schedule.shifts}:
+        for shift_type in [None, *ShiftType]:
+            assert index.get_last_shift(person, shift_type) == full_index.get_last_shift(person, shift_type)
+
+
+def test_save_shifts_again(tmp_path: Path, schedule: Schedule, people: list[Person]) -> None:
+    changed_shifts = ShiftTable()
+    start, end, shift_type, _, backup_person_id, _ = schedule.shift_table.get_row(0)
+    changed_shifts.append(start, end, shift_type, people[-1].id, backup_person_id, 'Changed')
+
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.save(shifts=schedule.shift_table)
+        history_store.save(shifts=schedule.shift_table)
+        history_store.save(shifts=changed_shifts)
+        shifts = list(history_store.load_shift_table().iter_shifts())
+
+    assert len(shifts) == len(schedule.shifts)
+    assert shifts[0].person == people[-1] and shifts[0].title == 'Changed'
+    assert shifts[1:] == schedule.shifts[1:]
+
+
+def test_duplicate_shifts_migration(tmp_path: Path, schedule: Schedule) -> None:
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        history_store.save(shifts=schedule.shift_table)
+    connection = sqlite3.connect(tmp_path / 'history.db')
+    connection.execute('DROP INDEX shifts_by_dates_and_type')
+    connection.execute('INSERT INTO shifts (start_date, end_date, type, person_id, backup_person_id, title) '
+                       'SELECT start_date, end_date, type, person_id, backup_person_id, title FROM shifts')
+    connection.commit()
+    connection.close()
+
+    with HistoryStore(tmp_path / 'history.db') as history_store:
+        assert list(history_store.load_shift_table().iter_shifts()) == schedule.shifts
@@ -0,0 +1,54 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from scheduler import holidays as holidays_module
+from scheduler.holidays import CustomHebrewHoliday, Date, HebrewMonth, HolidayCalendar, HolidaysDateRange
+
+
+def test_holiday_calendar() -> None:
+    calendar = HolidayCalendar()
+
+    assert calendar.get_holiday_name(date(2023, 4, 26)) == 'Yom Haatzmaut'
+    assert calendar.get_holiday_name(date(2023, 4, 6)) == 'Pesach'
+    assert calendar.get_holiday_name(date(2023, 4, 8)) is None
+    assert calendar.get_holiday_name(date(2023, 3, 15)) is None
+
+
+def test_holiday_calendar_max_cached_years() -> None:
+    calendar = HolidayCalendar(max_cached_years=2)
+    first_year = calendar.get_year(2023)
+    calendar.get_year(2024)
+    calendar.get_year(2025)
+
+    assert calendar.get_year(2023) is not first_year
+    with pytest.raises(TypeError):
+        first_year[date(2023, 3, 15)] = 'Purim'
+
+
+def test_holiday_calendar_disk_cache(tmp_path: Path) -> None:
+    holidays = HolidayCalendar(cache_dir=tmp_path).get_year(2023)
+
+    assert len(list(tmp_path.glob('holidays_2023_*.json'))) == 1
+    assert HolidayCalendar(cache_dir=tmp_path).get_year(2023) == holidays
+
+
+def test_holiday_calendar_broken_disk_cache(tmp_path: Path) -> None:
+    holidays = HolidayCalendar(cache_dir=tmp_path).get_year(2023)
+    cache_file_path, = tmp_path.glob('holidays_2023_*.json')
+    cache_file_path.write_text(cache_file_path.read_text()[:10])
+
+    assert HolidayCalendar(cache_dir=tmp_path).get_year(2023) == holidays
+    assert HolidayCalendar(cache_dir=tmp_path).get_year(2023) == holidays
+    assert [path.name for path in tmp_path.iterdir()] == [cache_file_path.name]
+
+
+def test_holiday_calendar_disk_cache_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    HolidayCalendar(cache_dir=tmp_path).get_year(2023)
+    ignored_holiday = CustomHebrewHoliday(name='Pesach', date_range=HolidaysDateRange(
+        Date(day=15, month=HebrewMonth.NISSAN.value), Date(day=15, month=HebrewMonth.NISSAN.value)))
+    monkeypatch.setattr(holidays_module, 'IGNORED_HOLIDAYS', [*holidays_module.IGNORED_HOLIDAYS, ignored_holiday])
+
+    assert HolidayCalendar(cache_dir=tmp_path).get_holiday_name(date(2023, 4, 6)) is None
+    assert len(list(tmp_path.glob('holidays_2023_*.json'))) == 2
@@ -0,0 +1,48 @@
+import json
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from scheduler.holidays import HolidayCalendar
+from scheduler.instrumentation import INSTRUMENTATION, Instrumentation
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person
+from scheduler.scheduler import Scheduler
+
+
+@pytest.fixture
+def instrumentation() -> Iterator[Instrumentation]:
+    INSTRUMENTATION.enabled = True
+    INSTRUMENTATION.reset()
+    yield INSTRUMENTATION
+    INSTRUMENTATION.enabled = False
+    INSTRUMENTATION.reset()
+
+
+def test_disabled() -> None:
+    instrumentation = Instrumentation()
+    with instrumentation.phase('build'):
+        instrumentation.count('counter')
+        instrumentation.record('distribution', 1)
+
+    assert instrumentation.get_report() == {'phases': dict(), 'counters': dict(), 'distributions': dict()}
+
+
+def test_scheduler_report(instrumentation: Instrumentation, tmp_path: Path) -> None:
+    people = [Person(full_name=f'Person{i}', email_address=f'person{i}@gmail.com', workdays_shifts_weight=1,
+                     weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(13)]
+    schedule = Scheduler(start_date=date(2023, 3, 1), end_date=date(2023, 4, 30), people_pool=people,
+                         justice_table=JusticeTable()).schedule()
+    schedule.save_to_csv_file(tmp_path / 'schedule.csv')
+    HolidayCalendar().get_holiday_name(date(2023, 3, 1))
+
+    instrumentation.save_report(tmp_path / 'profile.json')
+    report = json.loads((tmp_path / 'profile.json').read_text())
+
+    assert set(report['phases']) == {'build', 'add_debts', 'assignment', 'export'}
+    assert report['distributions']['scheduler.candidates_examined_per_shift']['count'] == len(schedule.shifts)
+    assert report['counters']['scheduler.compatibility_checks'] >= 2 * len(schedule.shifts)
+    assert report['counters']['holidays.cache_misses'] >= 1
+    assert report['counters']['holidays.cache_hits'] >= 1
@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+
+import pytest
+from pydantic import parse_obj_as
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person, ShiftType
+
+PEOPLE_JSON_PATH = Path(__file__).parent / 'people.json'
+
+
+def _get_people() -> list[Person]:
+    return parse_obj_as(list[Person], json.loads(PEOPLE_JSON_PATH.read_text()))
+
+
+def test_person_record() -> None:
+    justice_table = JusticeTable()
+    people, same_people = _get_people(), _get_people()
+
+    record = justice_table.get_person_record(people[0])
+    record.substract_debt(ShiftType.WORKDAY, 2)
+
+    assert people[0].id == same_people[0].id
+    assert people[0].id != people[1].id
+    assert justice_table.get_person_record(same_people[0]) is record
+    assert record.get_debt(ShiftType.WORKDAY) == -2
+
+
+def test_save_with_whitelist(tmp_path: Path) -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=8, weekend_days=4, holidays=0, people=people)
+
+    file_path = tmp_path / 'justice_table.json'
+    justice_table.save_to_file(file_path, people_whitelist=_get_people()[:3])
+    loaded_justice_table = JusticeTable.from_file(file_path)
+
+    assert {person.id for person in loaded_justice_table.get_shift_candidates(ShiftType.WORKDAY)} == \
+        {person.id for person in people[:3]}
+
+
+def test_shift_candidates_order() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=8, weekend_days=8, holidays=8, people=people)
+
+    justice_table.get_person_record(people[3]).add_debt(ShiftType.WEEKEND, 1)
+    justice_table.get_person_record(people[5]).substract_debt(ShiftType.WEEKEND, 1)
+    candidates = justice_table.get_shift_candidates(ShiftType.WEEKEND)
+
+    assert candidates[0] == people[3]
+    assert candidates[-1] == people[5]
+    assert set(candidates) == set(people)
+    assert next(justice_table.iter_shift_candidates(ShiftType.WEEKEND)) == people[3]
+
+
+def test_add_debts_by_weights() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=10, weekend_days=4, holidays=2, people=people)
+
+    workdays_availability = sum(person.workdays_shifts_weight for person in people)
+    debts = justice_table.get_debts(people)
+
+    assert debts.shape == (len(people), len(ShiftType))
+    assert debts[:, list(ShiftType).index(ShiftType.WEEKEND)].sum() == pytest.approx(4)
+    for person, person_debts in zip(people, debts):
+        expected_debt = 10 / workdays_availability * person.workdays_shifts_weight
+        assert justice_table.get_person_record(person).get_debt(ShiftType.WORKDAY) == pytest.approx(expected_debt)
+        assert person_debts[list(ShiftType).index(ShiftType.WORKDAY)] == pytest.approx(expected_debt)
+
+
+def test_fairness_metrics() -> None:
+    people = _get_people()[:4]
+    justice_table = JusticeTable()
+    for person in people:
+        justice_table.get_person_record(person)
+    justice_table.get_person_record(people[0]).add_debt(ShiftType.HOLIDAY, 4)
+
+    metrics = justice_table.get_fairness_metrics()
+
+    assert metrics[ShiftType.WORKDAY].variance == 0
+    assert metrics[ShiftType.WORKDAY].gini == 0
+    # Debts of 4, 0, 0, 0: the mean is 1
+    assert metrics[ShiftType.HOLIDAY].variance == pytest.approx(3)
+    assert metrics[ShiftType.HOLIDAY].max_deviation == pytest.approx(3)
+    assert metrics[ShiftType.HOLIDAY].gini == pytest.approx(0.75)
+    assert justice_table.get_fairness_metrics(people[1:])[ShiftType.HOLIDAY].variance == 0
+
+
+def test_record_fields_follow_debts(tmp_path: Path) -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=8, weekend_days=4, holidays=2, people=people)
+    justice_table.get_person_record(people[0]).substract_debt(ShiftType.WORKDAY, 3)
+
+    file_path = tmp_path / 'justice_table.json'
+    justice_table.save_to_file(file_path)
+    loaded_record = JusticeTable.from_file(file_path).get_person_record(people[0])
+
+    assert loaded_record.get_debt(ShiftType.WORKDAY) == \
+        pytest.approx(justice_table.get_person_record(people[0]).get_debt(ShiftType.WORKDAY))
+    assert loaded_record.dict()['workdays_debt'] == pytest.approx(loaded_record.get_debt(ShiftType.WORKDAY))
+
+
+def test_assigned_debts_update_candidates() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=8, weekend_days=8, holidays=8, people=people)
+
+    justice_table.get_person_record(people[2]).weekend_days_debt = 100
+    justice_table.get_person_record(people[4]).set_debt(ShiftType.WEEKEND, -100)
+    candidates = justice_table.get_shift_candidates(ShiftType.WEEKEND)
+
+    assert candidates[0] == people[2]
+    assert candidates[-1] == people[4]
+    assert justice_table.get_person_record(people[2]).get_debt(ShiftType.WEEKEND) == 100
+    assert set(candidates) == set(people)
+
+
+def test_record_fields_are_current() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    justice_table.add_debts(workdays=8, weekend_days=4, holidays=2, people=people)
+    record = justice_table.get_person_record(people[0])
+    record.substract_debt(ShiftType.WORKDAY, 3)
+    debt = justice_table.get_debts(people[:1])[0, list(ShiftType).index(ShiftType.WORKDAY)]
+
+    assert record.workdays_debt == pytest.approx(debt)
+    assert json.loads(record.json())['workdays_debt'] == pytest.approx(debt)
+    copied_record = record.copy()
+    assert copied_record.workdays_debt == pytest.approx(debt)
+
+    # Copies do not change the justice table
+    copied_record.add_debt(ShiftType.WORKDAY, 10)
+    assert record.workdays_debt == pytest.approx(debt)
@@ -0,0 +1,33 @@
+import sys
+from datetime import date, timedelta
+
+from scheduler.last_shift_index import LastShiftIndex
+from scheduler.models import DateRange, Person, Shift, ShiftType
+
+
+def _person(name: str) -> Person:
+    return Person(full_name=name, email_address=f'{name}@gmail.com', workdays_shifts_weight=1,
+                  weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+
+
+def _shift(day: int, shift_type: ShiftType, person: Person, backup_person: Person) -> Shift:
+    _date = date(2023, 3, 1) + timedelta(days=day)
+    return Shift(person=person, backup_person=backup_person, dates=DateRange(start=_date, end=_date), type=shift_type,
+                 title='shift')
+
+
+def test_space_from_last_shift() -> None:
+    person1, person2, person3, person4 = [_person(f'person{i}') for i in range(1, 5)]
+    index = LastShiftIndex([
+        _shift(0, ShiftType.WORKDAY, person1, person2),
+        _shift(1, ShiftType.WEEKEND, person3, person1),
+        _shift(2, ShiftType.WORKDAY, person3, person2),
+        _shift(3, ShiftType.WORKDAY, person2, person3),
+    ])
+
+    assert index.get_space_from_last_shift(person1, ShiftType.WORKDAY) == 2
+    assert index.get_space_from_last_shift(person1, ShiftType.WEEKEND) == 0
+    assert index.get_space_from_last_shift(person1, ShiftType.WORKDAY, any_type=True) == 2
+    assert index.get_space_from_last_shift(person2, ShiftType.WORKDAY) == 0
+    assert index.get_space_from_last_shift(person2, ShiftType.WEEKEND) == sys.maxsize
+    assert index.get_space_from_last_shift(person4, ShiftType.WORKDAY, any_type=True) == sys.maxsize
@@ -0,0 +1,68 @@
+import json
+import random
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+from pydantic import parse_obj_as
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person, ShiftType
+from scheduler.optimal_engine import MAX_TIME_BUDGET, MIN_TIME_BUDGET, OptimalEngine, get_default_time_budget
+from scheduler.scheduler import Scheduler
+from scheduler.shifts_builder import ShiftsBuilder
+
+PEOPLE_JSON_PATH = Path(__file__).parent / 'people.json'
+
+
+@pytest.fixture
+def people() -> list[Person]:
+    return parse_obj_as(list[Person], json.loads(PEOPLE_JSON_PATH.read_text()))
+
+
+def test_optimal_engine(people: list[Person]) -> None:
+    shifts = ShiftsBuilder(date(2023, 3, 1), date(2023, 5, 1)).build()
+    justice_table = JusticeTable()
+    justice_table.add_debts(
+        workdays=sum(shift.dates.total_days for shift in shifts if shift.type == ShiftType.WORKDAY),
+        weekend_days=sum(shift.dates.total_days for shift in shifts if shift.type == ShiftType.WEEKEND),
+        holidays=sum(shift.dates.total_days for shift in shifts if shift.type == ShiftType.HOLIDAY),
+        people=people
+    )
+    OptimalEngine(shifts, list(), people, justice_table, time_budget=0.5).solve()
+
+    for shift in shifts:
+        assert shift.person in people
+        assert shift.backup_person in people
+        assert shift.person != shift.backup_person
+
+    # All the debts that were added for the period are paid
+    for shift_type in ShiftType:
+        total_debt = sum(justice_table.get_person_record(person).get_debt(shift_type) for person in people)
+        assert total_debt == pytest.approx(0)
+
+
+def test_unknown_engine(people: list[Person]) -> None:
+    with pytest.raises(ValueError):
+        Scheduler(start_date=date(2023, 3, 1), end_date=date(2023, 5, 1), people_pool=people,
+                  justice_table=JusticeTable(), engine='unknown')
+
+
+def test_early_stop() -> None:
+    people = [Person(full_name=f'OptimalPerson{i}', email_address=f'optimal.person{i}@gmail.com',
+                     workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+              for i in range(15)]
+    random.seed(0)
+    start_time = time.perf_counter()
+    Scheduler(start_date=date(2023, 3, 1), end_date=date(2023, 3, 31), people_pool=people,
+              justice_table=JusticeTable(), engine='optimal', time_budget=5).schedule()
+
+    # The roster is easy to schedule without breaking any rule, so the search stops long before its budget is over
+    assert time.perf_counter() - start_time < 2.5
+
+
+def test_default_time_budget() -> None:
+    assert get_default_time_budget(31, 10) == MIN_TIME_BUDGET
+    assert MIN_TIME_BUDGET < get_default_time_budget(180, 30) < MAX_TIME_BUDGET
+    assert get_default_time_budget(365 * 5, 100) == MAX_TIME_BUDGET
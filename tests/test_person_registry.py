@@ -0,0 +1,67 @@
+import gc
+from datetime import date
+
+from scheduler.models import Person, ShiftType
+from scheduler.models.person_registry import PERSON_REGISTRY
+from scheduler.shift_table import NO_PERSON, ShiftTable
+
+
+def _get_person(index: int, weight: float = 1) -> Person:
+    return Person(full_name=f'RegistryPerson{index}', email_address=f'registry.person{index}@gmail.com',
+                  workdays_shifts_weight=weight, weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+
+
+def test_current_person() -> None:
+    person = _get_person(0)
+    updated_person = _get_person(0, weight=2)
+    assert updated_person.id == person.id
+    assert PERSON_REGISTRY.get_person(person.id) is updated_person
+
+    PERSON_REGISTRY.make_current(person)
+    assert PERSON_REGISTRY.get_person(person.id) is person
+
+    copied_person = person.copy(update={'workdays_shifts_weight': 3})
+    assert PERSON_REGISTRY.get_person(person.id) is copied_person
+
+    del copied_person, updated_person
+    gc.collect()
+    assert PERSON_REGISTRY.get_person(person.id) is person
+
+
+def test_ids_are_freed() -> None:
+    people = [_get_person(index) for index in range(1, 4)]
+    freed_id = people[1].id
+    del people[1]
+    gc.collect()
+
+    new_person = _get_person(4)
+    assert new_person.id == freed_id
+    assert _get_person(5).id not in {person.id for person in [*people, new_person]}
+
+
+def test_shift_table_keeps_people() -> None:
+    person = _get_person(6)
+    person_id = person.id
+    table = ShiftTable()
+    table.append(date(2023, 1, 1), date(2023, 1, 1), ShiftType.WORKDAY, person_id, NO_PERSON, 'Shift')
+    del person
+    gc.collect()
+
+    assert table.get_shift(0).person.full_name == 'RegistryPerson6'
+    assert _get_person(7).id != person_id
+
+
+def test_many_copies() -> None:
+    person = _get_person(8)
+    copies = [person.copy() for _ in range(1000)]
+    assert PERSON_REGISTRY.get_person(person.id) is copies[-1]
+
+    PERSON_REGISTRY.make_current(copies[10])
+    del copies[11:]
+    gc.collect()
+    assert PERSON_REGISTRY.get_person(person.id) is copies[10]
+
+    PERSON_REGISTRY.make_current(person)
+    del copies
+    gc.collect()
+    assert PERSON_REGISTRY.get_person(person.id) is person
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+from scheduler.google_api_client import AppointmentAction
+from scheduler.models import DateRange, Person, Shift, ShiftType
+from scheduler.published_events import PublishedEvents
+
+
+def _person(name: str) -> Person:
+    return Person(full_name=name, email_address=f'{name}@gmail.com', workdays_shifts_weight=1,
+                  weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+
+
+def _get_shifts(people: list[Person]) -> list[Shift]:
+    shifts = list()
+    for day in range(5):
+        _date = date(2023, 3, 5) + timedelta(days=day)
+        shifts.append(Shift(person=people[day % len(people)], backup_person=people[(day + 1) % len(people)],
+                            dates=DateRange(start=_date, end=_date), type=ShiftType.WORKDAY, title='Workday shift'))
+    return shifts
+
+
+def _publish(published_events: PublishedEvents, shifts: list[Shift]) -> list[AppointmentAction]:
+    actions = published_events.get_actions(shifts)
+    for index, (_, result) in enumerate(actions):
+        result.succeeded = True
+        if result.action == AppointmentAction.INSERT:
+            result.event_id = f'event{index}'
+
+    published_events.apply(actions)
+    return [result.action for _, result in actions]
+
+
+def test_sync_only_changes(tmp_path: Path) -> None:
+    people = [_person(f'person{i}') for i in range(4)]
+    shifts = _get_shifts(people)
+    published_events = PublishedEvents()
+
+    assert _publish(published_events, shifts) == [AppointmentAction.INSERT] * 10
+    assert _publish(published_events, shifts) == list()
+
+    published_events.save_to_file(tmp_path / 'published_events.json')
+    published_events = PublishedEvents.from_file(tmp_path / 'published_events.json')
+    shifts[2].person = people[3]
+    assert _publish(published_events, shifts) == [AppointmentAction.PATCH]
+
+    assert _publish(published_events, shifts[:1] + shifts[2:]) == [AppointmentAction.DELETE] * 2
+    assert _publish(published_events, shifts[:1] + shifts[2:]) == list()
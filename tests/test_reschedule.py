@@ -0,0 +1,66 @@
+import random
+from datetime import date
+
+import pytest
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import DateRange, Person, ShiftType
+from scheduler.reschedule import reschedule
+from scheduler.schedule_repair import ScheduleRepair
+from scheduler.scheduler import Scheduler
+
+CONSTRAINT = DateRange(start=date(2023, 2, 1), end=date(2023, 2, 14))
+
+
+def _get_people() -> list[Person]:
+    return [Person(full_name=f'ReschedulePerson{i}', email_address=f'reschedule.person{i}@gmail.com',
+                   workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+            for i in range(20)]
+
+
+def test_reschedule() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    random.seed(0)
+    schedule = Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 3, 31), people_pool=people,
+                         justice_table=justice_table).schedule()
+    original_people = [(shift.person, shift.backup_person) for shift in schedule.shifts]
+    original_debts = justice_table.get_debts(people)
+
+    person = next(shift.person for shift in schedule.shifts if shift.dates.overlaps_with(CONSTRAINT))
+    changed_person = person.copy(update={'constraints': [CONSTRAINT]})
+    changes = reschedule(schedule, justice_table, [changed_person])
+
+    assert changes
+    assert {change.previous_person for change in changes} == {person}
+    for position, shift in enumerate(schedule.shifts):
+        if shift.dates.overlaps_with(CONSTRAINT):
+            assert person not in (shift.person, shift.backup_person)
+        if position not in {change.position for change in changes}:
+            assert (shift.person, shift.backup_person) == original_people[position]
+
+    # The new people keep the spacing rules with the shifts on both of their sides
+    repair = ScheduleRepair(schedule.shifts, 0, justice_table)
+    for change in changes:
+        shift = schedule.shifts[change.position]
+        setattr(shift, change.role, None)
+        assert repair.is_compatible(change.person, change.position)
+        setattr(shift, change.role, change.person)
+
+    # Only the debts of the changed main roles moved, from the freed person to the new people
+    debts = justice_table.get_debts(people)
+    assert debts.sum(axis=0) == pytest.approx(original_debts.sum(axis=0))
+    freed_days = sum(schedule.shifts[change.position].dates.total_days for change in changes
+                     if change.role == 'person' and schedule.shifts[change.position].type == ShiftType.WORKDAY)
+    row, column = people.index(person), list(ShiftType).index(ShiftType.WORKDAY)
+    assert debts[row, column] == pytest.approx(original_debts[row, column] + freed_days)
+
+
+def test_reschedule_without_changes() -> None:
+    people = _get_people()
+    justice_table = JusticeTable()
+    random.seed(0)
+    schedule = Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 1, 31), people_pool=people,
+                         justice_table=justice_table).schedule()
+
+    assert reschedule(schedule, justice_table, [people[1]]) == []
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from scheduler.models import DateRange, Person, Shift, ShiftType
+from scheduler.schedule import Schedule
+from scheduler.schedule_export import write_csv
+
+
+@pytest.fixture
+def schedule() -> Schedule:
+    people = [Person(full_name=name, email_address=f'person{i}@gmail.com', workdays_shifts_weight=1,
+                     weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+              for i, name in enumerate(['Person0', 'Last, "First"'])]
+
+    shifts = list()
+    for day in range(5):
+        _date = date(2023, 3, 5) + timedelta(days=day)
+        shifts.append(Shift(person=people[day % 2], backup_person=people[(day + 1) % 2],
+                            dates=DateRange(start=_date, end=_date + timedelta(days=1)), type=ShiftType.WORKDAY,
+                            title='Workday shift'))
+    return Schedule(shifts)
+
+
+def test_csv_matches_pandas(schedule: Schedule, tmp_path: Path) -> None:
+    output_path = tmp_path / 'schedule.csv'
+    schedule.save_to_csv_file(output_path)
+
+    expected = pd.DataFrame([{
+        'person': shift.person.full_name,
+        'backup_person': shift.backup_person.full_name,
+        'type': shift.type.value,
+        'title': shift.title,
+        'start_date': shift.dates.start.isoformat(),
+        'end_date': shift.dates.end.isoformat(),
+    } for shift in schedule.shifts])
+    assert output_path.read_text() == expected.to_csv()
+
+
+def test_parquet(schedule: Schedule, tmp_path: Path) -> None:
+    pytest.importorskip('pyarrow')
+    output_path = tmp_path / 'schedule.parquet'
+    schedule.save_to_parquet_file(output_path)
+
+    df = pd.read_parquet(output_path)
+    assert list(df['person']) == [shift.person.full_name for shift in schedule.shifts]
+    assert list(df['end_date']) == [shift.dates.end for shift in schedule.shifts]
+
+
+def test_csv_without_backup_person(schedule: Schedule, tmp_path: Path) -> None:
+    schedule.shifts[1].backup_person = None
+    output_path = tmp_path / 'schedule.csv'
+    write_csv(schedule.shift_table, output_path)
+
+    df = pd.read_csv(output_path, index_col=0)
+    assert df['backup_person'].isna().tolist() == [False, True, False, False, False]
+    assert list(df['person']) == [shift.person.full_name for shift in schedule.shifts]
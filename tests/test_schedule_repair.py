@@ -0,0 +1,67 @@
+import random
+from datetime import date
+
+from scheduler.availability import SpacingMask
+from scheduler.justice_table import JusticeTable
+from scheduler.last_shift_index import LastShiftIndex
+from scheduler.models import Person, ShiftType
+from scheduler.schedule_repair import Change
+from scheduler.scheduler import Scheduler
+
+
+def _get_people(amount: int) -> list[Person]:
+    return [Person(full_name=f'Person{i}', email_address=f'person{i}@gmail.com', workdays_shifts_weight=1,
+                   weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(amount)]
+
+
+def test_small_roster() -> None:
+    people = _get_people(13)
+    shifts = Scheduler(start_date=date(2023, 3, 20), end_date=date(2023, 5, 10), people_pool=people,
+                       justice_table=JusticeTable()).assign_shifts()
+
+    for shift in shifts:
+        assert shift.person in people
+        assert shift.backup_person in people
+        assert shift.person != shift.backup_person
+
+
+def test_too_small_roster() -> None:
+    people = _get_people(4)
+    shifts = Scheduler(start_date=date(2023, 3, 20), end_date=date(2023, 4, 10), people_pool=people,
+                       justice_table=JusticeTable()).assign_shifts()
+
+    assert all(shift.person != shift.backup_person for shift in shifts)
+
+
+def _get_last_shifts(index: LastShiftIndex) -> dict:
+    return {raw_person['person']: (raw_person['last_shift'], raw_person['last_shift_by_type'])
+            for raw_person in index.to_dict()['people']}
+
+
+class CheckedScheduler(Scheduler):
+    """
+    Checks that the last shift index and the spacing mask are the same as if they were built again after every repair.
+    """
+    repairs: int = 0
+
+    def _apply_repair(self, position: int, reverse_changes: list[Change]) -> None:
+        super()._apply_repair(position, reverse_changes)
+        self.repairs += bool(reverse_changes)
+
+        assigned_shifts = self._timeline[:position]
+        index = LastShiftIndex(assigned_shifts)
+        spacing_mask = SpacingMask(assigned_shifts)
+        assert _get_last_shifts(self._last_shift_index) == _get_last_shifts(index)
+        assert self._spacing_mask.get_blocked() == spacing_mask.get_blocked()
+        for shift_type in ShiftType:
+            assert self._spacing_mask.get_blocked_by_type(shift_type) == spacing_mask.get_blocked_by_type(shift_type)
+
+
+def test_repairs_update_spacing() -> None:
+    people = _get_people(11)
+    random.seed(0)
+    scheduler = CheckedScheduler(start_date=date(2023, 1, 1), end_date=date(2023, 6, 30), people_pool=people,
+                                 justice_table=JusticeTable())
+    scheduler.assign_shifts()
+
+    assert scheduler.repairs > 0
@@ -0,0 +1,29 @@
+from datetime import date
+
+import pytest
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person
+from scheduler.schedule_search import ScheduleSearch, get_spacing_score
+
+
+@pytest.fixture
+def search() -> ScheduleSearch:
+    people = [Person(full_name=f'Person{i}', email_address=f'person{i}@gmail.com', workdays_shifts_weight=1,
+                     weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(20)]
+    return ScheduleSearch(start_date=date(2023, 3, 1), end_date=date(2023, 5, 1), people_pool=people,
+                          justice_table=JusticeTable())
+
+
+def test_trial_is_reproducible(search: ScheduleSearch) -> None:
+    first_result, second_result = search.run_trial(seed=3), search.run_trial(seed=3)
+
+    assert first_result.score == second_result.score
+    assert [shift.person for shift in first_result.shifts] == [shift.person for shift in second_result.shifts]
+
+
+def test_search(search: ScheduleSearch) -> None:
+    result = search.search(trials=4, max_workers=2)
+
+    assert result.score == min(search.get_trial_score(seed) for seed in range(4))
+    assert get_spacing_score(result.shifts, result.justice_table, list()) > 0
@@ -0,0 +1,70 @@
+import random
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person
+from scheduler.schedule import Schedule
+from scheduler.scheduler import Scheduler
+from scheduler.shift_history import ShiftHistory, compact_history, get_index_path
+from scheduler.shift_table import ShiftTable
+
+
+@pytest.fixture
+def people() -> list[Person]:
+    return [Person(full_name=f'HistoryPerson{i}', email_address=f'history.person{i}@gmail.com',
+                   workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(13)]
+
+
+@pytest.fixture
+def shifts_path(people: list[Person], tmp_path: Path) -> Path:
+    random.seed(0)
+    schedule = Scheduler(start_date=date(2022, 1, 1), end_date=date(2022, 12, 31), people_pool=people,
+                         justice_table=JusticeTable()).schedule()
+    schedule.save_to_json_file(tmp_path / 'previous_shifts.json')
+    return tmp_path / 'previous_shifts.json'
+
+
+def _schedule_next_period(people: list[Person], previous_schedule) -> Schedule:
+    random.seed(1)
+    return Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 3, 31), people_pool=people,
+                     justice_table=JusticeTable(), previous_schedule=previous_schedule).schedule()
+
+
+def test_compact_history(shifts_path: Path, people: list[Person], tmp_path: Path) -> None:
+    full_history = ShiftTable.from_json_file(shifts_path)
+    expected_shifts = _schedule_next_period(people, full_history).shifts
+
+    archived_shifts = compact_history(shifts_path, tmp_path / 'archive')
+    history = ShiftHistory.from_json_file(shifts_path)
+    archive = ShiftTable.from_json_file(tmp_path / 'archive' / 'shifts_2022.json')
+
+    assert 0 < len(history.recent_shifts) < 20
+    assert archived_shifts + len(history.recent_shifts) == len(full_history)
+    assert list(archive.iter_rows()) == list(full_history.iter_rows(stop=archived_shifts))
+    assert _schedule_next_period(people, history).shifts == expected_shifts
+    assert compact_history(shifts_path, tmp_path / 'archive') == 0
+
+
+def test_compact_history_twice(shifts_path: Path, people: list[Person], tmp_path: Path) -> None:
+    full_history = ShiftTable.from_json_file(shifts_path)
+    expected_shifts = _schedule_next_period(people, full_history).shifts
+
+    archived_shifts = compact_history(shifts_path, tmp_path / 'archive', min_recent_shifts=100)
+    archived_shifts += compact_history(shifts_path, tmp_path / 'archive')
+    archive = ShiftTable.from_json_file(tmp_path / 'archive' / 'shifts_2022.json')
+
+    assert list(archive.iter_rows()) == list(full_history.iter_rows(stop=archived_shifts))
+    assert _schedule_next_period(people, ShiftHistory.from_json_file(shifts_path)).shifts == expected_shifts
+
+
+def test_changed_history(shifts_path: Path, tmp_path: Path) -> None:
+    full_history = shifts_path.read_text()
+    compact_history(shifts_path, tmp_path / 'archive')
+    shifts_path.write_text(full_history)
+
+    assert get_index_path(shifts_path).is_file()
+    with pytest.raises(ValueError):
+        ShiftHistory.from_json_file(shifts_path)
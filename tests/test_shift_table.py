@@ -0,0 +1,60 @@
+import pickle
+import random
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person, ShiftType
+from scheduler.schedule import Schedule
+from scheduler.scheduler import Scheduler
+from scheduler.shift_table import ShiftTable
+
+
+@pytest.fixture
+def people() -> list[Person]:
+    return [Person(full_name=f'TablePerson{i}', email_address=f'table.person{i}@gmail.com', workdays_shifts_weight=1,
+                   weekend_days_shifts_weight=1, holidays_shifts_weight=1) for i in range(13)]
+
+
+@pytest.fixture
+def schedule(people: list[Person]) -> Schedule:
+    random.seed(0)
+    return Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 4, 30), people_pool=people,
+                     justice_table=JusticeTable()).schedule()
+
+
+def test_json_file(schedule: Schedule, tmp_path: Path) -> None:
+    schedule.save_to_json_file(tmp_path / 'shifts.json')
+    table = ShiftTable.from_json_file(tmp_path / 'shifts.json')
+
+    assert len(table) == len(schedule.shifts)
+    assert list(table.iter_shifts()) == schedule.shifts
+    assert list(table.person_ids) == [shift.person.id for shift in schedule.shifts]
+
+
+def test_pickle(schedule: Schedule) -> None:
+    table = schedule.shift_table
+    assert list(pickle.loads(pickle.dumps(table)).iter_rows()) == list(table.iter_rows())
+
+
+def test_tail_start(schedule: Schedule) -> None:
+    table = schedule.shift_table
+    tail_start = table.get_tail_start(2, {ShiftType.WORKDAY: 5, ShiftType.WEEKEND: 2})
+    tail_types = [shift.type for shift in table.iter_shifts(tail_start)]
+
+    assert len(tail_types) >= 2
+    assert tail_types.count(ShiftType.WORKDAY) >= 5
+    assert tail_types.count(ShiftType.WEEKEND) == 2
+    assert table.get_tail_start(len(table) + 1, dict()) == 0
+
+
+def test_previous_shift_table(schedule: Schedule, people: list[Person]) -> None:
+    shifts = list()
+    for previous_schedule in (schedule, schedule.shift_table):
+        random.seed(1)
+        shifts.append(Scheduler(start_date=date(2023, 5, 1), end_date=date(2023, 6, 30), people_pool=people,
+                                justice_table=JusticeTable(), previous_schedule=previous_schedule).assign_shifts())
+
+    assert shifts[0] == shifts[1]
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from scheduler.holidays import HolidayCalendar
+from scheduler.models import DateRange, ShiftType
+from scheduler.shifts_builder import ShiftsBuilder
+
+
+class CountingHolidayCalendar(HolidayCalendar):
+    lookups: list[date]
+
+    def __init__(self):
+        super().__init__()
+        self.lookups = list()
+
+    def get_holiday_name(self, _date: date) -> Optional[str]:
+        self.lookups.append(_date)
+        return super().get_holiday_name(_date)
+
+
+def test_holiday_shifts() -> None:
+    shifts = ShiftsBuilder(date(2023, 4, 3), date(2023, 4, 14)).build()
+    holiday_shifts = [(shift.dates.start, shift.dates.end) for shift in shifts if shift.type == ShiftType.HOLIDAY]
+
+    # The nights before the holidays belong to the holiday shifts
+    assert holiday_shifts == [(date(2023, 4, 5), date(2023, 4, 6)), (date(2023, 4, 11), date(2023, 4, 13))]
+    assert shifts[-1].dates == DateRange(start=date(2023, 4, 14), end=date(2023, 4, 15))
+    for shift, next_shift in zip(shifts, shifts[1:]):
+        assert next_shift.dates.start == shift.dates.end + timedelta(days=1)
+
+
+def test_iter_shifts_single_pass() -> None:
+    holiday_calendar = CountingHolidayCalendar()
+    shifts = list(ShiftsBuilder(date(2023, 1, 1), date(2024, 12, 31), holiday_calendar=holiday_calendar).iter_shifts())
+
+    assert shifts == ShiftsBuilder(date(2023, 1, 1), date(2024, 12, 31)).build()
+    assert len(holiday_calendar.lookups) == len(set(holiday_calendar.lookups))
+    assert holiday_calendar.lookups == sorted(holiday_calendar.lookups)
+
+
+def test_iter_shifts_is_lazy() -> None:
+    holiday_calendar = CountingHolidayCalendar()
+    shifts = ShiftsBuilder(date(2023, 1, 1), date(2123, 12, 31), holiday_calendar=holiday_calendar).iter_shifts()
+
+    assert next(shifts).dates.start == date(2023, 1, 1)
+    assert max(holiday_calendar.lookups) < date(2023, 1, 10)
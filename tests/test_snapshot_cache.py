@@ -0,0 +1,103 @@
+import json
+import random
+from datetime import date
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError, parse_obj_as
+from pydantic.json import pydantic_encoder
+
+from scheduler.justice_table import JusticeTable
+from scheduler.models import Person, Shift
+from scheduler.schedule import Schedule
+from scheduler.scheduler import Scheduler
+from scheduler.shift_history import ShiftHistory
+from scheduler.snapshot_cache import SnapshotCache, load_people
+
+
+def _get_people(amount: int) -> list[Person]:
+    return [Person(full_name=f'SnapshotPerson{i}', email_address=f'snapshot.person{i}@gmail.com',
+                   workdays_shifts_weight=1, weekend_days_shifts_weight=1, holidays_shifts_weight=1)
+            for i in range(amount)]
+
+
+def _write_schedule(people: list[Person], tmp_path: Path) -> JusticeTable:
+    justice_table = JusticeTable()
+    random.seed(0)
+    Scheduler(start_date=date(2023, 1, 1), end_date=date(2023, 3, 31), people_pool=people,
+              justice_table=justice_table).schedule().save_to_json_file(tmp_path / 'shifts.json')
+    justice_table.save_to_file(tmp_path / 'justice_table.json')
+    (tmp_path / 'people.json').write_text(json.dumps(people, default=pydantic_encoder))
+    return justice_table
+
+
+def test_restore_snapshots(tmp_path: Path) -> None:
+    people = _get_people(13)
+    justice_table = _write_schedule(people, tmp_path)
+    loaded_paths = list()
+
+    def load_history(path: Path) -> ShiftHistory:
+        loaded_paths.append(path)
+        return ShiftHistory.from_json_file(path)
+
+    cache = SnapshotCache(tmp_path / 'snapshots')
+    history = cache.load(tmp_path / 'shifts.json', load_history)
+    restored_history = cache.load(tmp_path / 'shifts.json', load_history)
+    cache.load(tmp_path / 'justice_table.json', JusticeTable.from_file)
+    restored_justice_table = SnapshotCache(tmp_path / 'snapshots').load(tmp_path / 'justice_table.json',
+                                                                        JusticeTable.from_file)
+
+    assert loaded_paths == [tmp_path / 'shifts.json']
+    assert list(restored_history.recent_shifts.iter_rows()) == list(history.recent_shifts.iter_rows())
+    assert (restored_justice_table.get_debts(people) == justice_table.get_debts(people)).all()
+    assert cache.load(tmp_path / 'people.json', load_people) == cache.load(tmp_path / 'people.json', load_people)
+    assert len(list((tmp_path / 'snapshots').glob('*.pickle'))) == 3
+
+
+def test_changed_file(tmp_path: Path) -> None:
+    people = _get_people(13)
+    cache = SnapshotCache(tmp_path / 'snapshots')
+    (tmp_path / 'people.json').write_text(json.dumps(people, default=pydantic_encoder))
+    cache.load(tmp_path / 'people.json', load_people)
+
+    (tmp_path / 'people.json').write_text(json.dumps(people[:5], default=pydantic_encoder))
+    assert cache.load(tmp_path / 'people.json', load_people) == people[:5]
+    assert len(list((tmp_path / 'snapshots').glob('*.pickle'))) == 1
+
+
+def test_schedule_shares_people(tmp_path: Path) -> None:
+    people = _get_people(13)
+    _write_schedule(people, tmp_path)
+
+    shifts = Schedule.from_json_file(tmp_path / 'shifts.json').shifts
+    SnapshotCache(tmp_path / 'snapshots').load(tmp_path / 'shifts.json', Schedule.from_json_file)
+    restored_shifts = SnapshotCache(tmp_path / 'snapshots').load(tmp_path / 'shifts.json', Schedule.from_json_file)
+
+    for schedule_shifts in (shifts, restored_shifts.shifts):
+        assert len({id(shift.person) for shift in schedule_shifts}) == len({shift.person for shift in schedule_shifts})
+    assert restored_shifts.shifts == shifts
+
+
+def test_schedule_file_defaults(tmp_path: Path) -> None:
+    raw_shift = {'person': json.loads(_get_people(1)[0].json()), 'dates': {'start': '2023-01-01', 'end': '2023-01-02'},
+                 'type': 'workday', 'title': 1}
+    (tmp_path / 'shifts.json').write_text(json.dumps([raw_shift]))
+
+    shifts = Schedule.from_json_file(tmp_path / 'shifts.json').shifts
+    assert shifts == parse_obj_as(list[Shift], [raw_shift])
+    assert shifts[0].backup_person is None and shifts[0].title == '1'
+
+
+@pytest.mark.parametrize('raw_shifts', [
+    {'shifts': []},
+    ['shift'],
+    [{'dates': {'start': '2023-01-01', 'end': '2023-01-02'}, 'type': 'workday'}],
+    [{'dates': {'start': '2023-01-01'}, 'type': 'workday', 'title': 'Shift'}],
+    [{'dates': {'start': '2023-01-01', 'end': '2023-01-02'}, 'type': 'night', 'title': 'Shift'}],
+    [{'person': {'full_name': 'SnapshotPerson'}, 'dates': {'start': '2023-01-01', 'end': '2023-01-02'},
+      'type': 'workday', 'title': 'Shift'}],
+])
+def test_invalid_schedule_file(raw_shifts, tmp_path: Path) -> None:
+    (tmp_path / 'shifts.json').write_text(json.dumps(raw_shifts))
+    with pytest.raises(ValidationError):
+        Schedule.from_json_file(tmp_path / 'shifts.json')
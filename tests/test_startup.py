@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_PATH = Path(__file__).parent.parent
+HEAVY_MODULES = ['pandas', 'numpy', 'googleapiclient', 'google_auth_oauthlib']
+# Seconds that starting the scheduler may take at most, it takes about 0.2 seconds (and importing pandas alone about
+# 0.6 seconds)
+STARTUP_BUDGET = 1.0
+STARTUP_REPEATS = 3
+
+
+def _get_loaded_modules(module: str) -> set[str]:
+    code = f'import sys, {module}; print(" ".join(sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT_PATH, capture_output=True, text=True, check=True)
+    return set(output.stdout.split())
+
+
+def test_scheduler_import_is_light() -> None:
+    loaded_modules = _get_loaded_modules('scheduler.scheduler')
+    assert not loaded_modules & set(HEAVY_MODULES)
+
+
+def _get_startup_time(*args: str, repeats: int = STARTUP_REPEATS) -> float:
+    """
+    :return: The best wall time of running python with the given arguments.
+    """
+    times = list()
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT_PATH, capture_output=True, check=True)
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def test_startup_time() -> None:
+    # Importing a heavy module again would cost at least as much as importing pandas alone
+    pandas_time = _get_startup_time('-c', 'import pandas', repeats=1)
+    for args in (('-c', 'import scheduler.scheduler'), ('main.py', '--help')):
+        startup_time = _get_startup_time(*args)
+        assert startup_time < STARTUP_BUDGET
+        assert startup_time < pandas_time
+
+
+def test_google_api_client_is_loaded_on_access() -> None:
+    from scheduler.google_api_client import GoogleAPIClient
+    from scheduler.schedule import Schedule
+
+    schedule = Schedule(list(), google_api_client=GoogleAPIClient(root_url='http://127.0.0.1/'))
+    assert schedule.google_api_client._credentials is None